@@ -1 +1 @@
-python src/main.py
+python src/main.py build --template template.html "$@"
@@ -0,0 +1,268 @@
+"""
+Static asset stage: copies files from the static directory into the output
+directory under content-hashed names, and points rendered pages at them.
+
+Every asset ``css/site.css`` is published as ``css/site.<hash>.css``, where
+``<hash>`` is the start of the SHA-256 digest of its contents, so the file can
+be cached forever and a new version always gets a new URL. A record of what
+was published is kept in ``<output_dir>/.assets.json``::
+
+    {
+        "version": 1,
+        "assets": {
+            "css/site.css": {
+                "hash": "<sha256 hex digest>",
+                "size": 1234,
+                "mtime_ns": 1700000000000000000,
+                "output": "css/site.0123456789.css"
+            }
+        }
+    }
+
+When size and mtime of a source match its record and the output exists, the
+asset costs two ``stat`` calls and is not read.
+"""
+import json
+import os
+import posixpath
+import shutil
+
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+ASSET_MANIFEST_NAME = ".assets.json"
+ASSET_MANIFEST_VERSION = 1
+# Number of hex digits of the content hash put into file names
+FINGERPRINT_LENGTH = 10
+# Linux ioctl that makes a copy-on-write clone of a whole file (a reflink)
+_FICLONE = 0x40049409
+
+
+class AssetResult:
+    """
+    What the asset stage did.
+
+    Attributes:
+        urls: Dictionary of site-absolute asset path (``/css/site.css``) to
+            the fingerprinted path it was published under
+        copied: Number of assets written to the output directory
+        unchanged: Number of assets whose output was already up to date
+        removed: Number of outdated outputs deleted
+    """
+    __slots__ = ("urls", "copied", "unchanged", "removed")
+
+    def __init__(self):
+        self.urls = {}
+        self.copied = 0
+        self.unchanged = 0
+        self.removed = 0
+
+
+def fingerprinted_name(path, content_hash):
+    """Inserts the fingerprint before the extension: ``a/b.css`` -> ``a/b.<hash>.css``."""
+    root, extension = posixpath.splitext(path)
+    return f"{root}.{content_hash[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def _find_assets(static_dir):
+    assets = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(files):
+            asset = os.path.relpath(os.path.join(root, name), static_dir)
+            assets.append(asset.replace(os.sep, "/"))
+    return assets
+
+
+def _load_records(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != ASSET_MANIFEST_VERSION:
+        return {}
+    return data.get("assets", {})
+
+
+def _save_records(path, records):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": ASSET_MANIFEST_VERSION, "assets": records}, f,
+                  indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _reflink(source, target):
+    # A reflink shares the data blocks of the source until either file is
+    # changed, so it costs no data I/O; not every file system supports it
+    if fcntl is None:
+        return False
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            return False
+    return True
+
+
+def _clone_file(source, target):
+    tmp_path = f"{target}.tmp"
+    try:
+        if not _reflink(source, tmp_path):
+            shutil.copyfile(source, tmp_path)
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_assets(static_dir="static", output_dir="public"):
+    """
+    Publishes the files of ``static_dir`` into ``output_dir`` under
+    fingerprinted names, copying only what changed.
+
+    Unchanged assets (same size and mtime as recorded, output present) are
+    skipped without reading them. Changed ones are hashed; if an output with
+    that hash already exists it is kept, otherwise the file is cloned or
+    copied into place through a temporary file. Outputs of assets that
+    changed or were deleted are removed. A missing ``static_dir`` publishes
+    nothing.
+
+    Returns:
+        AssetResult: The URL mapping and what was copied, kept and removed
+    """
+    result = AssetResult()
+    records_path = os.path.join(output_dir, ASSET_MANIFEST_NAME)
+    old_records = _load_records(records_path)
+    records = {}
+
+    assets = _find_assets(static_dir) if os.path.isdir(static_dir) else []
+    for asset in assets:
+        source = os.path.join(static_dir, asset)
+        stat = os.stat(source)
+        record = old_records.get(asset)
+
+        if record is None or record["size"] != stat.st_size or \
+                record["mtime_ns"] != stat.st_mtime_ns or \
+                not os.path.exists(os.path.join(output_dir, record["output"])):
+            content_hash = hash_file(source)
+            output = fingerprinted_name(asset, content_hash)
+            target = os.path.join(output_dir, output)
+            if os.path.exists(target):
+                result.unchanged += 1
+            else:
+                os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                _clone_file(source, target)
+                result.copied += 1
+            record = {"hash": content_hash, "size": stat.st_size,
+                      "mtime_ns": stat.st_mtime_ns, "output": output}
+        else:
+            result.unchanged += 1
+
+        records[asset] = record
+        result.urls[f"/{asset}"] = f"/{record['output']}"
+
+    outputs = {record["output"] for record in records.values()}
+    for asset, record in old_records.items():
+        if record["output"] not in outputs:
+            try:
+                os.remove(os.path.join(output_dir, record["output"]))
+                result.removed += 1
+            except FileNotFoundError:
+                pass
+
+    if records != old_records:
+        os.makedirs(output_dir, exist_ok=True)
+        _save_records(records_path, records)
+    return result
+
+
+def _split_url(url):
+    # Returns the path of an internal URL and the index where its query or
+    # fragment starts, or None for external URLs
+    if not url or "//" in url or url.startswith(("#", "data:", "mailto:")):
+        return None
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    return url[:end], end
+
+
+def asset_path(url, asset_urls, page_dir=""):
+    """
+    Returns the site-absolute path of the asset that ``url`` on a page in
+    ``page_dir`` points at, or None if it points at a page or another site.
+
+    A URL points at an asset if its path is in ``asset_urls`` or does not
+    look like a page (end with ``.html`` or ``/``), so a page can depend on
+    an asset that does not exist yet.
+    """
+    split = _split_url(url)
+    if split is None or not split[0]:
+        return None
+    path = split[0]
+    absolute = posixpath.normpath(posixpath.join("/", page_dir, path))
+    if absolute in asset_urls or not path.endswith((".html", "/")):
+        return absolute
+    return None
+
+
+def asset_url(url, asset_urls, page_dir=""):
+    """
+    Returns the fingerprinted form of ``url`` on a page in ``page_dir``, or
+    None if it does not point at a published asset (see ``rewrite_asset_urls``).
+    """
+    split = _split_url(url)
+    if split is None:
+        return None
+    path, end = split
+    published = asset_urls.get(posixpath.normpath(posixpath.join("/", page_dir, path)))
+    if published is None:
+        return None
+    # Only the file name changes, so relative URLs stay relative
+    return path[:len(path) - len(posixpath.basename(path))] + posixpath.basename(published) + \
+        url[end:]
+
+
+def rewrite_asset_urls(node, asset_urls, page_dir=""):
+    """
+    Points the ``href`` and ``src`` props in an HTML node tree at the
+    fingerprinted assets.
+
+    URLs are resolved against ``page_dir``, the directory of the page
+    relative to the site root, and looked up in ``asset_urls`` (see
+    ``AssetResult.urls``). Matching URLs keep their form, relative or
+    absolute, query and fragment; only the file name is replaced. The props
+    of a rewritten node are replaced with a new dictionary rather than
+    changed in place, since props may be shared between nodes.
+
+    Returns:
+        HTMLNode: ``node``, for chaining
+    """
+    if not asset_urls:
+        return node
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        props = current.props
+        if props:
+            for name in ("href", "src"):
+                url = props.get(name)
+                if url is not None:
+                    new_url = asset_url(url, asset_urls, page_dir)
+                    if new_url is not None:
+                        props = {**props, name: new_url}
+            if props is not current.props:
+                current.props = props
+        if current.children:
+            stack.extend(current.children)
+    return node
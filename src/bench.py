@@ -0,0 +1,1067 @@
+"""
+Benchmarks for the static site generator.
+
+Run every benchmark with ``python src/bench.py`` or pick some by name, e.g.
+``python src/bench.py inline``. Each benchmark returns a dictionary of cases,
+and each case maps metric names to numbers so results can be printed or saved.
+
+``--save results.json`` stores the results, and ``--compare base.json
+results.json`` reports every time, memory or throughput metric that got
+worse by more than ``--threshold`` (10% by default) and every case that is
+gone, exiting with status 1 if any did. The
+``corpus`` benchmark runs every pipeline stage over a synthetic corpus whose
+shape is set with the options of ``corpus.py`` (``--pages``,
+``--markup-density``, ``--nesting-depth``, ...).
+"""
+import argparse
+import html
+import inspect
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from assets import copy_assets
+from blocks import markdown_to_html_node, write_markdown_html
+from corpus import CorpusSpec, add_spec_arguments, generate_pages, generate_paragraphs, \
+    spec_from_args, write_corpus
+from escaping import Markup, escape_text, escape_texts
+from build import BuildOptions, build_site
+from depgraph import DEPENDENCY_GRAPH_NAME, DependencyGraph
+from flatdoc import FlatDocument
+from inline_cache import InlineCache
+from htmlnode import HTMLNode, LeafNode, ParentNode, RenderCache, escape_tree
+from inline_tree import text_to_inline_nodes
+from linkgraph import LINK_GRAPH_NAME, LinkGraph
+from serve import DevSite
+from template import Template, breadcrumb_nav
+from writer import OutputWriter
+from textnode import TextNode, TextType, text_nodes_to_html_nodes, text_nodes_to_html, \
+    write_text_nodes_html
+from md_helpers import split_nodes_delimiter, text_to_textnodes, extract_markdown_images, \
+    extract_markdown_links, extract_markdown_links_and_images
+
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Registers a benchmark function under its name without the 'bench_' prefix."""
+    BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def best_time(func, *args, repeat=3):
+    """Returns the fastest wall-clock time in seconds of ``repeat`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func, *args):
+    """Returns the peak number of bytes traced by tracemalloc during one call."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _sample_paragraph():
+    return ("Some **bold text** and some *italic text* next to `inline code`, "
+            "plain words in between, more **bold** and *more italic* words, "
+            "then a trailing run of ordinary text without any markup at all.")
+
+
+def _chained_split(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    return split_nodes_delimiter(nodes, "`", TextType.CODE)
+
+
+@benchmark
+def bench_inline(size=2_000_000):
+    """Chained split_nodes_delimiter passes against the single-pass tokenizer."""
+    paragraph = _sample_paragraph()
+    text = " ".join([paragraph] * (size // (len(paragraph) + 1)))
+    return {
+        "chained_split": {
+            "seconds": best_time(_chained_split, text),
+            "peak_bytes": peak_memory(_chained_split, text),
+        },
+        "text_to_textnodes": {
+            "seconds": best_time(text_to_textnodes, text),
+            "peak_bytes": peak_memory(text_to_textnodes, text),
+        },
+    }
+
+
+def _separate_extract(text):
+    return extract_markdown_images(text, strict=False), extract_markdown_links(text, strict=False)
+
+
+def _missed_extract(paragraphs):
+    for paragraph in paragraphs:
+        try:
+            extract_markdown_images(paragraph)
+        except ValueError:
+            pass
+
+
+def _missed_extract_no_raise(paragraphs):
+    for paragraph in paragraphs:
+        extract_markdown_images(paragraph, strict=False)
+
+
+@benchmark
+def bench_extract(size=2_000_000):
+    """Separate image/link extraction against the combined single-pass extractor."""
+    dense = "Text with ![an image](/img/a.png) and [a link](/docs/page.html) in it. "
+    dense = dense * (size // len(dense))
+    sparse = _sample_paragraph() * 3 + " See [the docs](/docs/page.html). "
+    sparse = sparse * (size // len(sparse))
+    plain = ["A paragraph without any links or images at all."] * 100_000
+    return {
+        "dense_separate": {"seconds": best_time(_separate_extract, dense)},
+        "dense_combined": {"seconds": best_time(extract_markdown_links_and_images, dense)},
+        "sparse_separate": {"seconds": best_time(_separate_extract, sparse)},
+        "sparse_combined": {"seconds": best_time(extract_markdown_links_and_images, sparse)},
+        "miss_raising": {"seconds": best_time(_missed_extract, plain)},
+        "miss_no_raise": {"seconds": best_time(_missed_extract_no_raise, plain)},
+    }
+
+
+def _recursive_to_html(node):
+    # The renderer ParentNode.to_html used before the explicit-stack walk
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    children_html = "".join(_recursive_to_html(child) for child in node.children)
+    return f"{node.generate_tag_with_props()}{children_html}</{node.tag}>"
+
+
+def _wide_tree(width):
+    rows = [ParentNode("li", [LeafNode(value="item "), LeafNode("b", "bold", {"class": "x"})])
+            for _ in range(width)]
+    return ParentNode("ul", rows)
+
+
+def _deep_tree(depth):
+    node = LeafNode("span", "leaf")
+    for _ in range(depth):
+        node = ParentNode("div", [LeafNode(value="text"), node])
+    return node
+
+
+@benchmark
+def bench_render(width=200_000, depth=300):
+    """Recursive rendering against the explicit-stack ParentNode renderer.
+
+    The recursive renderer cannot go much deeper than ``depth`` under the
+    default recursion limit, so the iterative one is also timed on a tree a
+    hundred times deeper.
+    """
+    wide = _wide_tree(width)
+    deep = [_deep_tree(depth) for _ in range(50)]
+    very_deep = _deep_tree(depth * 100)
+    render_all = lambda render: [render(tree) for tree in deep]
+    return {
+        "wide_recursive": {"seconds": best_time(_recursive_to_html, wide)},
+        "wide_iterative": {"seconds": best_time(ParentNode.to_html, wide)},
+        "deep_recursive": {"seconds": best_time(render_all, _recursive_to_html)},
+        "deep_iterative": {"seconds": best_time(render_all, ParentNode.to_html)},
+        "very_deep_iterative": {"seconds": best_time(ParentNode.to_html, very_deep)},
+    }
+
+
+def _synthetic_pages(count):
+    # Small deterministic pages with a mix of inline markup
+    words = ["static", "site", "node", "markdown", "render", "page", "tree", "text"]
+    pages = []
+    for i in range(count):
+        word = words[i % len(words)]
+        pages.append([
+            f"Page {i} is about **{word}** and *{words[(i + 3) % len(words)]}* things.",
+            f"See [the {word} docs](/docs/{word}.html) or run `build {i}` again.",
+            f"An image ![{word}](/images/{word}.png) with plain trailing text.",
+        ])
+    return pages
+
+
+class _DictTextNode:
+    # TextNode as it was before __slots__, for the memory comparison
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class _DictHTMLNode:
+    # HTMLNode as it was before __slots__, for the memory comparison
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def _build_corpus_nodes(parsed, text_node_class, leaf_class, parent_class):
+    pages = []
+    text_nodes = []
+    for paragraphs in parsed:
+        blocks = []
+        for spans in paragraphs:
+            leaves = []
+            for text, text_type, url in spans:
+                text_nodes.append(text_node_class(text, text_type, url))
+                leaves.append(leaf_class(None, text, None, None))
+            blocks.append(parent_class("p", None, leaves, None))
+        pages.append(parent_class("div", None, blocks, None))
+    return pages, text_nodes
+
+
+@benchmark
+def bench_memory(page_count=10_000):
+    """Memory per node of dict-based node classes against the slotted ones."""
+    parsed = [[[(node.text, node.text_type, node.url) for node in text_to_textnodes(paragraph)]
+               for paragraph in page] for page in _synthetic_pages(page_count)]
+    node_count = sum(2 * len(spans) + 1 for page in parsed for spans in page) + len(parsed)
+
+    slotted_leaf = lambda tag, value, children, props: LeafNode(tag, value, props)
+    slotted_parent = lambda tag, value, children, props: ParentNode(tag, children, props)
+    variants = {
+        "dict_nodes": (_DictTextNode, _DictHTMLNode, _DictHTMLNode),
+        "slotted_nodes": (TextNode, slotted_leaf, slotted_parent),
+    }
+    results = {}
+    for name, classes in variants.items():
+        tracemalloc.start()
+        try:
+            pages = _build_corpus_nodes(parsed, *classes)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del pages
+        results[name] = {"nodes": node_count, "bytes_per_node": current / node_count,
+                         "peak_bytes": peak}
+    return results
+
+
+def _page_trees(page_count):
+    return [ParentNode("div", [
+        ParentNode("p", [node.text_node_to_html_node() for node in text_to_textnodes(paragraph)])
+        for paragraph in page]) for page in _synthetic_pages(page_count)]
+
+
+@benchmark
+def bench_flat(page_count=10_000, pages_per_document=100):
+    """Object trees against array-backed FlatDocuments: memory and render time.
+
+    Pages are grouped into large documents, which is where the flat layout
+    matters; the reported bytes per node include the text of the leaves.
+    """
+    tracemalloc.start()
+    try:
+        pages = _page_trees(page_count)
+        trees = [ParentNode("body", pages[i:i + pages_per_document])
+                 for i in range(0, page_count, pages_per_document)]
+        tree_bytes, _ = tracemalloc.get_traced_memory()
+        docs = [FlatDocument.from_node(tree) for tree in trees]
+        doc_bytes = tracemalloc.get_traced_memory()[0] - tree_bytes
+    finally:
+        tracemalloc.stop()
+    node_count = sum(len(doc) for doc in docs)
+    return {
+        "object_tree": {"nodes": node_count, "bytes_per_node": tree_bytes / node_count,
+                        "seconds": best_time(lambda: [tree.to_html() for tree in trees])},
+        "flat_document": {"nodes": node_count, "bytes_per_node": doc_bytes / node_count,
+                          "seconds": best_time(lambda: [doc.to_html() for doc in docs])},
+    }
+
+
+def _whole_file_render(source, target):
+    with open(source, encoding="utf-8") as f:
+        html = markdown_to_html_node(f.read().splitlines()).to_html()
+    with open(target, "w", encoding="utf-8") as out:
+        out.write(html)
+
+
+def _streaming_render(source, target):
+    with open(source, encoding="utf-8") as f, open(target, "w", encoding="utf-8") as out:
+        write_markdown_html(f, out)
+
+
+@benchmark
+def bench_blocks(paragraphs=20_000):
+    """Whole-file markdown rendering against streaming block-by-block rendering."""
+    block = f"## Section\n\n{_sample_paragraph()}\n\n- one *item*\n- two\n\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "page.md")
+        target = os.path.join(tmp, "page.html")
+        with open(source, "w", encoding="utf-8") as f:
+            for _ in range(paragraphs):
+                f.write(block)
+        size = os.path.getsize(source)
+        return {
+            "whole_file": {"file_bytes": size, "peak_bytes": peak_memory(_whole_file_render, source, target),
+                           "seconds": best_time(_whole_file_render, source, target, repeat=1)},
+            "streaming": {"file_bytes": size, "peak_bytes": peak_memory(_streaming_render, source, target),
+                          "seconds": best_time(_streaming_render, source, target, repeat=1)},
+        }
+
+
+def _write_markdown_corpus(content_dir, page_count):
+    for i, paragraphs in enumerate(_synthetic_pages(page_count)):
+        section = os.path.join(content_dir, f"section{i % 100}")
+        os.makedirs(section, exist_ok=True)
+        with open(os.path.join(section, f"page{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Page {i}\n\n" + "\n\n".join(paragraphs) + "\n")
+
+
+@benchmark
+def bench_build(page_count=10_000):
+    """End-to-end site builds with 1 to N worker processes, then a no-op rebuild."""
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        _write_markdown_corpus(content, page_count)
+        output = os.path.join(tmp, "public")
+        for workers in worker_counts:
+            summary = build_site(content, output, BuildOptions(workers=workers, full=True))
+            results[f"workers_{workers}"] = {"pages": summary.pages, "seconds": summary.seconds,
+                                             "pages_per_second": summary.pages_per_second}
+        summary = build_site(content, output, BuildOptions(workers=cores))
+        results["noop_rebuild"] = {"pages": summary.pages, "skipped": summary.skipped,
+                                   "seconds": summary.seconds}
+    return results
+
+
+@benchmark
+def bench_inline_cache(page_count=10_000):
+    """Parsing every paragraph against a cold and a warm InlineCache."""
+    paragraphs = [paragraph for page in _synthetic_pages(page_count) for paragraph in page]
+
+    def parse_all(parse):
+        for paragraph in paragraphs:
+            parse(paragraph)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inline.sqlite")
+        with InlineCache(path) as cache:
+            cold = best_time(parse_all, cache.parse, repeat=1)
+        with InlineCache(path) as cache:
+            warm = best_time(parse_all, cache.parse, repeat=1)
+            hits = cache.hits
+    return {
+        "parser": {"seconds": best_time(parse_all, text_to_textnodes)},
+        "cache_cold": {"seconds": cold},
+        "cache_warm": {"seconds": warm, "hits": hits},
+    }
+
+
+def _shared_fragment():
+    links = [LeafNode("a", f"Section {i}", {"href": f"/section{i}/", "class": "nav-link"})
+             for i in range(30)]
+    return ParentNode("nav", [ParentNode("ul", [ParentNode("li", [link]) for link in links])])
+
+
+@benchmark
+def bench_frozen(page_count=10_000):
+    """Pages re-rendering a shared nav fragment against a frozen, cached one.
+
+    The fragment is built once per build, as a layout would. Freezing pays a
+    copy and a structural key up front, so it only wins when the frozen node
+    is reused rather than rebuilt for every page.
+    """
+    body = _page_trees(1)[0]
+    cache = RenderCache()
+    plain = _shared_fragment()
+    frozen = _shared_fragment().freeze(cache)
+
+    def render(nav):
+        for _ in range(page_count):
+            ParentNode("body", [nav, body]).to_html()
+
+    return {
+        "plain": {"seconds": best_time(render, plain, repeat=1)},
+        "frozen": {"seconds": best_time(render, frozen, repeat=1), "bytes_saved": cache.bytes_saved},
+    }
+
+
+def _formatted_open_tag(node):
+    # generate_tag_with_props as it was before open tags were interned
+    props_html = None if node.props is None else \
+        ' '.join([f'{key}="{value}"' for key, value in node.props.items()])
+    return f"<{node.tag} {props_html}>" if props_html else f"<{node.tag}>"
+
+
+@benchmark
+def bench_open_tag(count=500_000):
+    """Formatting opening tags on every render against interned open tags."""
+    props = [{"class": "nav-link", "rel": "noopener"}, {"href": "/docs/page.html"}, None]
+    nodes = [HTMLNode("a", "text", None, props[i % len(props)]) for i in range(count)]
+
+    def generate(make_tag):
+        for node in nodes:
+            make_tag(node)
+
+    return {
+        "formatted": {"seconds": best_time(generate, _formatted_open_tag)},
+        "interned": {"seconds": best_time(generate, HTMLNode.generate_tag_with_props)},
+    }
+
+
+@benchmark
+def bench_escape(page_count=10_000):
+    """Per-call html.escape against the fast-path and batch escaping functions.
+
+    The ``render_*`` cases stream pages block by block as the build does,
+    escaping every leaf as it is written or each block with ``escape_tree``.
+    """
+    pages = list(_synthetic_pages(page_count))
+    values = [node.text for page in pages for paragraph in page
+              for node in text_to_textnodes(paragraph)]
+    page_lines = [[line for paragraph in page for line in (paragraph, "")] for page in pages]
+
+    def render_pages(transform):
+        for lines in page_lines:
+            write_markdown_html(lines, io.StringIO(), transform=transform)
+
+    # One value in fifty carries a character that needs escaping
+    mixed = [value + " & <more>" if i % 50 == 0 else value for i, value in enumerate(values)]
+    per_call = lambda escape, batch: [escape(value) for value in batch]
+    html_escape = lambda value: html.escape(value, quote=False)
+    return {
+        "html_escape_safe": {"seconds": best_time(per_call, html_escape, values)},
+        "escape_text_safe": {"seconds": best_time(per_call, escape_text, values)},
+        "escape_texts_safe": {"seconds": best_time(escape_texts, values)},
+        "html_escape_mixed": {"seconds": best_time(per_call, html_escape, mixed)},
+        "escape_text_mixed": {"seconds": best_time(per_call, escape_text, mixed)},
+        "escape_texts_mixed": {"seconds": best_time(escape_texts, mixed)},
+        "render_per_leaf": {"seconds": best_time(render_pages, None)},
+        "render_escape_tree": {"seconds": best_time(render_pages, escape_tree)},
+    }
+
+
+@benchmark
+def bench_to_html_nodes(paragraph_count=10_000):
+    """Per-node text_node_to_html_node against the batch converters."""
+    paragraphs = [text_to_textnodes(paragraph)
+                  for page in _synthetic_pages(paragraph_count // 3 + 1) for paragraph in page]
+    per_node = lambda: [[node.text_node_to_html_node() for node in nodes] for nodes in paragraphs]
+    per_node_html = lambda: ["".join(node.text_node_to_html_node().to_html() for node in nodes)
+                             for nodes in paragraphs]
+    return {
+        "per_node_leaves": {"seconds": best_time(per_node)},
+        "batch_leaves": {"seconds": best_time(lambda: [text_nodes_to_html_nodes(nodes)
+                                                       for nodes in paragraphs])},
+        "per_node_html": {"seconds": best_time(per_node_html)},
+        "batch_html": {"seconds": best_time(lambda: [text_nodes_to_html(nodes)
+                                                     for nodes in paragraphs])},
+    }
+
+
+@benchmark
+def bench_nested_inline(size=20_000):
+    """Tree parser on nested emphasis and on adversarial runs of unmatched '*'."""
+    cases = {
+        "nested": "**bold *italic [link](https://boot.dev)* bold** text ",
+        "unmatched_openers": "*a ",
+        "unmatched_closers": "a* ",
+        "lone_stars": "* ",
+        "mixed_runs": "**a *b ",
+    }
+    results = {}
+    for name, unit in cases.items():
+        for repeat in (size // 10, size):
+            text = unit * repeat
+            seconds = best_time(lambda: text_to_inline_nodes(text))
+            results[f"{name}_{repeat}"] = {"chars": len(text), "seconds": seconds,
+                                           "us_per_kchar": seconds * 1e9 / len(text)}
+    return results
+
+
+@benchmark
+def bench_spans(paragraph_count=20_000):
+    """Peak memory and time of tokenizing a large document into TextNodes and TextSpans."""
+    prose = ("Plain prose runs on for a while without any inline markup in it, "
+             "the way most paragraphs of an ordinary page do, ") * 4
+    corpora = {
+        "dense": [f"{i}: " + _sample_paragraph() * 4 for i in range(paragraph_count)],
+        "prose": [f"{i}: {prose}with **one bold** phrase and {prose}" for i in range(paragraph_count)],
+    }
+    results = {}
+    for (corpus, paragraphs), (mode, spans) in itertools.product(
+            corpora.items(), (("copies", False), ("spans", True))):
+        name = f"{corpus}_{mode}"
+        tracemalloc.start()
+        try:
+            nodes = [text_to_textnodes(paragraph, spans) for paragraph in paragraphs]
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        with open(os.devnull, "w", encoding="utf-8") as out:
+            render = lambda: [write_text_nodes_html(paragraph, out) for paragraph in nodes]
+            render_seconds = best_time(render)
+        del nodes
+        results[name] = {
+            "peak_bytes": peak,
+            "parse_seconds": best_time(lambda: [text_to_textnodes(p, spans) for p in paragraphs]),
+            "render_seconds": render_seconds,
+        }
+    return results
+
+
+@benchmark
+def bench_serve(page_count=5_000, edits=20):
+    """Edit-to-refresh time of the watch mode: one poll of the site plus one page render."""
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        _write_markdown_corpus(content, page_count)
+        site = DevSite(content, os.path.join(tmp, "public"))
+        pages = sorted(site.watcher.snapshot)
+        poll = best_time(site.watcher.poll)
+
+        refresh_times = []
+        render_times = []
+        for i in range(edits):
+            source = os.path.join(content, pages[i * len(pages) // edits])
+            with open(source, "a", encoding="utf-8") as f:
+                f.write(f"\nAn edit adding paragraph {i} with **bold** text.\n")
+            start = time.perf_counter()
+            rebuilds = site.refresh()
+            refresh_times.append(time.perf_counter() - start)
+            render_times.extend(rebuild.seconds for rebuild in rebuilds)
+        site.close()
+    return {
+        "poll": {"pages": page_count, "seconds": poll},
+        "page_render": {"median_seconds": sorted(render_times)[len(render_times) // 2]},
+        "refresh": {"median_seconds": sorted(refresh_times)[len(refresh_times) // 2],
+                    "max_seconds": max(refresh_times)},
+    }
+
+
+@benchmark
+def bench_writer(file_count=5_000):
+    """Writing rendered pages one at a time against the threaded OutputWriter."""
+    pages = [(f"section{i % 100}/page{i}.html", f"<div><p>Page {i}</p></div>".encode() * 40)
+             for i in range(file_count)]
+    total = sum(len(data) for _, data in pages)
+
+    def synchronous(root, fsync):
+        for name, data in pages:
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def threaded(root, fsync):
+        with OutputWriter(fsync=fsync) as writer:
+            for name, data in pages:
+                writer.submit(os.path.join(root, name), data)
+        return writer
+
+    results = {}
+    for fsync in (False, True):
+        suffix = "fsync" if fsync else "no_fsync"
+        with tempfile.TemporaryDirectory() as tmp:
+            seconds = best_time(synchronous, tmp, fsync, repeat=1)
+            results[f"synchronous_{suffix}"] = {"seconds": seconds, "mb_per_second": total / seconds / 1e6}
+        with tempfile.TemporaryDirectory() as tmp:
+            seconds = best_time(threaded, tmp, fsync, repeat=1)
+            results[f"writer_{suffix}"] = {"seconds": seconds, "mb_per_second": total / seconds / 1e6}
+            start = time.perf_counter()
+            writer = threaded(tmp, fsync)
+            results[f"writer_unchanged_{suffix}"] = {"seconds": time.perf_counter() - start,
+                                                      "skipped": writer.unchanged}
+    return results
+
+
+@benchmark
+def bench_assets(asset_count=2_000, asset_bytes=32 * 1024):
+    """Publishing static assets cold, then again with nothing changed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        static = os.path.join(tmp, "static")
+        for i in range(asset_count):
+            directory = os.path.join(static, f"dir{i % 20}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"asset{i}.css"), "wb") as f:
+                f.write(i.to_bytes(4, "big") * (asset_bytes // 4))
+        output = os.path.join(tmp, "public")
+        start = time.perf_counter()
+        cold = copy_assets(static, output)
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = copy_assets(static, output)
+        warm_seconds = time.perf_counter() - start
+    return {
+        "cold": {"seconds": cold_seconds, "copied": cold.copied},
+        "unchanged": {"seconds": warm_seconds, "copied": warm.copied, "unchanged": warm.unchanged},
+    }
+
+
+@benchmark
+def bench_profile(page_count=5_000):
+    """Serial full builds with profiling off and on."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        _write_markdown_corpus(content, page_count)
+        output = os.path.join(tmp, "public")
+        for name, profile in (("disabled", False), ("enabled", True)):
+            seconds = best_time(lambda: build_site(content, output, BuildOptions(
+                workers=1, full=True, fsync=False, profile=profile)))
+            results[name] = {"pages": page_count, "seconds": seconds}
+    return results
+
+
+_LAYOUT = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>{{ title }} | Site</title>
+    <link rel="stylesheet" href="/styles.css">
+</head>
+<body>
+    <header>{{ nav }}</header>
+    <main>
+        {{ content }}
+    </main>
+    <footer>Built with a static site generator. <a href="/">Home</a></footer>
+</body>
+</html>
+"""
+
+
+@benchmark
+def bench_template(page_count=10_000):
+    """Wrapping pages in one layout: str.replace per page against a compiled Template."""
+    bodies = [ParentNode("div", [
+        ParentNode("p", [node.text_node_to_html_node() for node in text_to_textnodes(paragraph)])
+        for paragraph in page]) for page in _synthetic_pages(page_count)]
+    pages = [(f"Page {i}", f"section{i % 100}/page{i}.md", body) for i, body in enumerate(bodies)]
+
+    def replaced():
+        # The body has to be rendered to a string before it can be substituted
+        for title, page, body in pages:
+            out = io.StringIO()
+            out.write(_LAYOUT.replace("{{ title }}", escape_text(title))
+                      .replace("{{ nav }}", breadcrumb_nav(page).to_html())
+                      .replace("{{ content }}", body.to_html()))
+
+    def compiled(template):
+        for title, page, body in pages:
+            template.render_to(io.StringIO(), {"title": title, "nav": breadcrumb_nav(page),
+                                               "content": body})
+
+    def recompiled():
+        for title, page, body in pages:
+            compiled_once = Template(_LAYOUT)
+            compiled_once.render_to(io.StringIO(), {"title": title, "nav": breadcrumb_nav(page),
+                                                    "content": body})
+
+    def bodies_only():
+        for _, page, body in pages:
+            breadcrumb_nav(page).write_html(io.StringIO())
+            body.write_html(io.StringIO())
+
+    template = Template(_LAYOUT)
+    assert template.render({"title": "Page 0", "nav": breadcrumb_nav(pages[0][1]),
+                            "content": Markup(bodies[0].to_html())}) == \
+        _LAYOUT.replace("{{ title }}", "Page 0") \
+        .replace("{{ nav }}", breadcrumb_nav(pages[0][1]).to_html()) \
+        .replace("{{ content }}", bodies[0].to_html())
+    # One large page: str.replace holds the body string and copies of the page
+    large = ParentNode("div", [child for body in bodies[:2_000] for child in body.children])
+    large_replaced = lambda: io.StringIO().write(
+        _LAYOUT.replace("{{ title }}", "Large").replace("{{ nav }}", "")
+        .replace("{{ content }}", large.to_html()))
+    large_compiled = lambda: template.render_to(
+        io.StringIO(), {"title": "Large", "nav": Markup(""), "content": large})
+    return {
+        "bodies_only": {"pages": page_count, "seconds": best_time(bodies_only, repeat=5)},
+        "str_replace": {"pages": page_count, "seconds": best_time(replaced, repeat=5)},
+        "compiled": {"pages": page_count, "seconds": best_time(compiled, template, repeat=5)},
+        "compiled_per_page": {"pages": page_count, "seconds": best_time(recompiled)},
+        "large_page_str_replace": {"peak_bytes": peak_memory(large_replaced)},
+        "large_page_compiled": {"peak_bytes": peak_memory(large_compiled)},
+    }
+
+
+@benchmark
+def bench_links(page_count=10_000, links_per_page=10):
+    """Building, checking and updating the link graph of a site, alone and within builds."""
+    outputs = {f"section{i % 100}/page{i}.md": f"section{i % 100}/page{i}.html"
+               for i in range(page_count)}
+    pages = list(outputs)
+    page_links = {page: [f"/{outputs[pages[(i * 7 + j * 131) % page_count]]}#part{j}"
+                         for j in range(links_per_page)] + ["https://example.com/", "../x.png"]
+                  for i, page in enumerate(pages)}
+
+    def build_graph():
+        graph = LinkGraph()
+        for page, urls in page_links.items():
+            graph.set_page(page, urls)
+        return graph
+
+    graph = build_graph()
+    edges = sum(len(ids) for ids in graph.pages.values())
+    tracemalloc.start()
+    try:
+        kept = build_graph()
+        graph_bytes, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+
+    def update_one():
+        graph.set_page(pages[0], page_links[pages[0]])
+        return graph.check(outputs)
+
+    results = {
+        "graph": {"pages": page_count, "edges": edges, "seconds": best_time(build_graph),
+                  "bytes_per_edge": graph_bytes / edges},
+        "check": {"seconds": best_time(graph.check, outputs),
+                  "broken": len(graph.check(outputs).broken)},
+        "update_one_page_and_check": {"seconds": best_time(update_one)},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, LINK_GRAPH_NAME)
+        results["save_load"] = {"save_seconds": best_time(graph.save, path),
+                                "load_seconds": best_time(LinkGraph.load, path),
+                                "file_bytes": os.path.getsize(path)}
+
+        content = os.path.join(tmp, "content")
+        _write_markdown_corpus(content, page_count)
+        output = os.path.join(tmp, "public")
+        for name, check_links in (("build_without_links", False), ("build_with_links", True)):
+            seconds = best_time(lambda: build_site(content, output, BuildOptions(
+                workers=1, full=True, fsync=False, check_links=check_links)))
+            results[name] = {"pages": page_count, "seconds": seconds}
+        source = os.path.join(content, "section0", "page0.md")
+        with open(source, "a", encoding="utf-8") as f:
+            f.write("\nSee [page 1](../section1/page1.html).\n")
+        start = time.perf_counter()
+        summary = build_site(content, output, BuildOptions(workers=1, fsync=False))
+        results["incremental_build"] = {"pages": summary.pages,
+                                        "seconds": time.perf_counter() - start,
+                                        "check_seconds": summary.links.seconds}
+    return results
+
+
+@benchmark
+def bench_deps(page_count=10_000, snippet_count=100):
+    """Selective rebuilds through the dependency graph after a shared snippet changes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        snippets = [os.path.join(tmp, "_snippets", f"s{i}.md") for i in range(snippet_count)]
+        os.makedirs(os.path.dirname(snippets[0]))
+        for i, snippet in enumerate(snippets):
+            with open(snippet, "w", encoding="utf-8") as f:
+                f.write(f"Snippet {i}.\n")
+        # Every page reads two snippets; snippet 0 is also read by every tenth page
+        page_inputs = {}
+        for i in range(page_count):
+            inputs = [snippets[i % snippet_count], snippets[(i * 7 + 1) % snippet_count]]
+            if i % 10 == 0:
+                inputs.append(snippets[0])
+            page_inputs[f"section{i % 100}/page{i}.md"] = inputs
+
+        def record_all():
+            graph = DependencyGraph()
+            for page, inputs in page_inputs.items():
+                graph.record(page, os.path.join(tmp, page), inputs)
+            return graph
+
+        graph = record_all()
+        results = {
+            "record": {"pages": page_count, "seconds": best_time(record_all)},
+            "affected_one_snippet": {"pages": len(graph.affected([snippets[5]])),
+                                     "seconds": best_time(graph.affected, [snippets[5]])},
+            "affected_widest_snippet": {"pages": len(graph.affected([snippets[0]])),
+                                        "seconds": best_time(graph.affected, [snippets[0]])},
+            "changed_inputs": {"inputs": len(graph.states),
+                               "seconds": best_time(graph.changed_inputs)},
+        }
+        path = os.path.join(tmp, DEPENDENCY_GRAPH_NAME)
+        results["save_load"] = {"save_seconds": best_time(graph.save, path),
+                                "load_seconds": best_time(DependencyGraph.load, path),
+                                "file_bytes": os.path.getsize(path)}
+
+        content = os.path.join(tmp, "content")
+        _write_markdown_corpus(content, page_count)
+        output = os.path.join(tmp, "public")
+        results["build_without_includes"] = {
+            "pages": page_count,
+            "seconds": best_time(lambda: build_site(content, output, BuildOptions(
+                workers=1, full=True, fsync=False, check_links=False)))}
+        snippet_dir = os.path.join(content, "_snippets")
+        os.makedirs(snippet_dir)
+        for i in range(snippet_count):
+            with open(os.path.join(snippet_dir, f"s{i}.md"), "w", encoding="utf-8") as f:
+                f.write(f"> Snippet {i}.\n")
+        for i in range(page_count):
+            with open(os.path.join(content, f"section{i % 100}", f"page{i}.md"), "a",
+                      encoding="utf-8") as f:
+                f.write(f"\n{{{{ include /_snippets/s{i % snippet_count}.md }}}}\n")
+        results["build_with_includes"] = {
+            "pages": page_count,
+            "seconds": best_time(lambda: build_site(content, output, BuildOptions(
+                workers=1, full=True, fsync=False, check_links=False)))}
+        with open(os.path.join(snippet_dir, "s5.md"), "a", encoding="utf-8") as f:
+            f.write("> Edited.\n")
+        start = time.perf_counter()
+        summary = build_site(content, output, BuildOptions(workers=1, fsync=False,
+                                                           check_links=False))
+        results["incremental_build_after_snippet_edit"] = {
+            "pages": summary.pages, "seconds": time.perf_counter() - start}
+    return results
+
+
+# Renders one page in a fresh process and prints its peak RSS in kilobytes
+_RSS_SCRIPT = """
+import os, resource, sys
+from render import PageRenderer
+source, target, mode = sys.argv[1:]
+renderer = PageRenderer(os.path.dirname(source))
+if mode == "mapped":
+    renderer.render_mapped(os.path.basename(source), target)
+elif mode == "in_memory":
+    with open(target, "wb") as f:
+        f.write(renderer.render_html(os.path.basename(source)).html)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+@benchmark
+def bench_mapped(size_mb=500):
+    """Peak RSS of rendering one huge page in memory against memory-mapped input."""
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "huge.md")
+        pages = _synthetic_pages(1_000)
+        with open(source, "w", encoding="utf-8") as f:
+            written = 0
+            while written < size_mb * 1024 * 1024:
+                for i, paragraphs in enumerate(pages):
+                    chunk = f"## Section {i}\n\n" + "\n\n".join(paragraphs) + "\n\n"
+                    written += f.write(chunk)
+        size = os.path.getsize(source)
+        results = {}
+        for mode in ("in_memory", "mapped"):
+            target = os.path.join(tmp, f"{mode}.html")
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", _RSS_SCRIPT, source, target, mode],
+                                    cwd=src_dir, check=True, capture_output=True, text=True)
+            results[mode] = {"input_bytes": size, "seconds": time.perf_counter() - start,
+                             "peak_rss_bytes": int(output.stdout) * 1024}
+        # Importing the modules without rendering anything
+        baseline = subprocess.run([sys.executable, "-c", _RSS_SCRIPT, source, target, "none"],
+                                  cwd=src_dir, check=True, capture_output=True, text=True)
+        results["interpreter"] = {"peak_rss_bytes": int(baseline.stdout) * 1024}
+    return results
+
+
+def _split_or_reject(paragraphs):
+    # The chained split passes reject nested emphasis; count those paragraphs
+    rejected = 0
+    for paragraph in paragraphs:
+        try:
+            _chained_split(paragraph)
+        except ValueError:
+            rejected += 1
+    return rejected
+
+
+@benchmark
+def bench_corpus(spec=None):
+    """Every pipeline stage over one synthetic corpus (see corpus.py for the knobs)."""
+    spec = spec or CorpusSpec()
+    paragraphs = generate_paragraphs(spec)
+    documents = [markdown for _, markdown in generate_pages(spec)]
+    nodes = []
+    for paragraph in paragraphs:
+        try:
+            nodes.append(text_to_textnodes(paragraph))
+        except ValueError:
+            pass
+    trees = [markdown_to_html_node(document.splitlines()) for document in documents]
+    leaf_count = sum(len(paragraph_nodes) for paragraph_nodes in nodes)
+
+    results = {
+        "split_nodes_delimiter": {"seconds": best_time(_split_or_reject, paragraphs),
+                                  "rejected": _split_or_reject(paragraphs)},
+        "extractors": {"seconds": best_time(lambda: [(extract_markdown_links(p, strict=False),
+                                                       extract_markdown_images(p, strict=False))
+                                                      for p in paragraphs])},
+        "text_to_textnodes": {"seconds": best_time(
+            lambda: [_parse_or_none(paragraph) for paragraph in paragraphs]),
+            "parsed": len(nodes)},
+        "text_node_to_html_node": {"seconds": best_time(
+            lambda: [[node.text_node_to_html_node() for node in paragraph_nodes]
+                     for paragraph_nodes in nodes]), "nodes": leaf_count},
+        "text_nodes_to_html_nodes": {"seconds": best_time(
+            lambda: [text_nodes_to_html_nodes(paragraph_nodes) for paragraph_nodes in nodes])},
+        "parse_documents": {"seconds": best_time(
+            lambda: [markdown_to_html_node(document.splitlines()) for document in documents])},
+        "parent_to_html": {"seconds": best_time(lambda: [tree.to_html() for tree in trees])},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        write_corpus(content, spec)
+        output = os.path.join(tmp, "public")
+        summary = build_site(content, output, BuildOptions(workers=1, full=True, fsync=False))
+        results["build"] = {"seconds": summary.seconds, "pages": summary.pages,
+                            "pages_per_second": summary.pages_per_second}
+        summary = build_site(content, output, BuildOptions(workers=1, fsync=False))
+        results["noop_rebuild"] = {"seconds": summary.seconds, "skipped": summary.skipped}
+    return results
+
+
+def _parse_or_none(paragraph):
+    try:
+        return text_to_textnodes(paragraph)
+    except ValueError:
+        return None
+
+
+# Metrics for which a higher value in a new run is a regression, and those
+# for which a lower one is; the others (counts) are informational
+_LOWER_IS_BETTER = ("seconds", "bytes", "_per_node", "_per_kchar")
+_HIGHER_IS_BETTER = ("_per_second",)
+
+
+def save_results(path, results, spec):
+    """Writes benchmark results, the corpus knobs and the platform to ``path`` as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": 1,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "corpus": spec.to_dict(),
+            "results": results,
+        }, f, indent=1)
+
+
+def compare_results(base, new, threshold=0.1):
+    """
+    Compares two saved result files.
+
+    A time or size that grew by more than ``threshold``, or a throughput
+    that fell by more than it, is a regression. So is a case of ``base``
+    missing from a benchmark that ``new`` ran; benchmarks that ``new`` did
+    not run at all are only listed.
+
+    Returns:
+        tuple[list[str], list[str]]: One line per compared metric or missing
+        case, and the lines of the regressions
+    """
+    lines = []
+    regressions = []
+    for name, cases in new["results"].items():
+        for case, metrics in cases.items():
+            base_metrics = base["results"].get(name, {}).get(case, {})
+            for metric, value in metrics.items():
+                old = base_metrics.get(metric)
+                if not old or not isinstance(value, (int, float)):
+                    continue
+                if metric.endswith(_LOWER_IS_BETTER):
+                    worse = value / old - 1
+                elif metric.endswith(_HIGHER_IS_BETTER):
+                    worse = old / value - 1 if value > 0 else float("inf")
+                else:
+                    continue
+                label = f"{name}.{case}.{metric}"
+                line = f"  {label:<48} {old:12.6g} -> {value:12.6g} {value / old - 1:+8.1%}"
+                lines.append(line)
+                if worse > threshold:
+                    regressions.append(line)
+    for name, cases in base["results"].items():
+        new_cases = new["results"].get(name)
+        if new_cases is None:
+            lines.append(f"  {name:<48} not run")
+            continue
+        for case in cases:
+            if case not in new_cases:
+                line = f"  {f'{name}.{case}':<48} missing from the new results"
+                lines.append(line)
+                regressions.append(line)
+    return lines, regressions
+
+
+def print_results(name, cases):
+    """Prints the results of one benchmark as an aligned table."""
+    print(f"== {name}")
+    for case, metrics in cases.items():
+        columns = "  ".join(f"{key}={value:.6g}" if isinstance(value, float) else f"{key}={value}"
+                            for key, value in metrics.items())
+        print(f"  {case:<28} {columns}")
+
+
+def main(argv=None):
+    '''
+        Runs the requested benchmarks and prints their results
+    '''
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help=f"benchmarks to run (default: all): {', '.join(sorted(BENCHMARKS))}")
+    parser.add_argument("--save", metavar="PATH", help="write the results to PATH as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                        help="compare two saved result files instead of running benchmarks")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as a regression (default: 0.1)")
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        results = []
+        for path in args.compare:
+            with open(path, encoding="utf-8") as f:
+                results.append(json.load(f))
+        if results[0].get("corpus") != results[1].get("corpus"):
+            print("Warning: the results were measured on different corpora")
+        lines, regressions = compare_results(*results, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold:.0%}:")
+            print("\n".join(regressions))
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+        return 0
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    spec = spec_from_args(args)
+    results = {}
+    for name in args.names or sorted(BENCHMARKS):
+        func = BENCHMARKS[name]
+        cases = func(spec=spec) if "spec" in inspect.signature(func).parameters else func()
+        print_results(name, cases)
+        results[name] = cases
+    if args.save:
+        save_results(args.save, results, spec)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Block-level markdown parsing: headings, paragraphs, lists, quotes and code
+"""
+from enum import Enum
+import re
+
+from htmlnode import LeafNode, ParentNode
+from inline_tree import text_to_inline_nodes
+from md_helpers import text_to_textnodes
+from textnode import TextType, text_nodes_to_html_nodes
+
+
+class BlockType(Enum):
+    """
+    The kinds of block a markdown document is made of.
+    """
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
+
+
+_HEADING = re.compile(r"(#{1,6}) (.*)")
+_UNORDERED_ITEM = re.compile(r"[-*] (.*)")
+_ORDERED_ITEM = re.compile(r"\d+\. (.*)")
+_FENCE = "```"
+# Markup that the flat inline parser leaves as text inside bold or italic
+_NESTED_MARKUP = re.compile(r"[*`\[]")
+
+_BLOCK_TAGS = {
+    BlockType.PARAGRAPH: "p",
+    BlockType.QUOTE: "blockquote",
+    BlockType.UNORDERED_LIST: "ul",
+    BlockType.ORDERED_LIST: "ol",
+}
+
+
+class Block:
+    """
+    A single block of a markdown document.
+
+    Attributes:
+        block_type: The BlockType of the block
+        lines: The content lines of the block with the markdown markers removed.
+            For lists there is one line per item; for code the lines are verbatim.
+        level: The heading level (1-6) for headings, 0 otherwise
+    """
+    __slots__ = ("block_type", "lines", "level")
+
+    def __init__(self, block_type, lines, level=0):
+        self.block_type = block_type
+        self.lines = lines
+        self.level = level
+
+    def __eq__(self, other):
+        return self.block_type == other.block_type and \
+            self.lines == other.lines and \
+            self.level == other.level
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, {self.lines}, {self.level})"
+
+
+def iter_blocks(lines):
+    """
+    Groups a stream of markdown lines into blocks, yielding each block as soon
+    as it is complete.
+
+    Only the lines of the current block are held in memory, so a file object
+    can be passed directly and is never read as a whole.
+
+    Args:
+        lines: Any iterable of lines, with or without their line endings
+
+    Yields:
+        Block: The blocks of the document in order
+    """
+    current = None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if current is not None and current.block_type == BlockType.CODE:
+            if line.strip() == _FENCE:
+                yield current
+                current = None
+            else:
+                current.lines.append(line)
+            continue
+
+        stripped = line.strip()
+        if not stripped:
+            if current is not None:
+                yield current
+                current = None
+            continue
+
+        if stripped.startswith(_FENCE):
+            if current is not None:
+                yield current
+            current = Block(BlockType.CODE, [])
+            continue
+
+        heading = _HEADING.fullmatch(stripped)
+        if heading:
+            if current is not None:
+                yield current
+                current = None
+            yield Block(BlockType.HEADING, [heading.group(2).strip()], len(heading.group(1)))
+            continue
+
+        if stripped.startswith(">"):
+            block_type, content = BlockType.QUOTE, stripped[1:].strip()
+        else:
+            item = _UNORDERED_ITEM.fullmatch(stripped)
+            if item:
+                block_type, content = BlockType.UNORDERED_LIST, item.group(1)
+            else:
+                item = _ORDERED_ITEM.fullmatch(stripped)
+                if item:
+                    block_type, content = BlockType.ORDERED_LIST, item.group(1)
+                else:
+                    block_type, content = BlockType.PARAGRAPH, stripped
+
+        if current is not None and current.block_type != block_type:
+            yield current
+            current = None
+        if current is None:
+            current = Block(block_type, [])
+        current.lines.append(content)
+
+    if current is not None:
+        yield current
+
+
+def _inline_html_nodes(text, text_to_nodes):
+    # The flat TextNode parser handles almost every paragraph. Paragraphs it
+    # rejects (unmatched delimiters) or whose emphasis holds more markup are
+    # parsed again by the tree parser, which supports nesting.
+    try:
+        nodes = text_to_nodes(text)
+    except ValueError:
+        return text_to_inline_nodes(text)
+    search = _NESTED_MARKUP.search
+    for node in nodes:
+        if node.text_type in (TextType.BOLD, TextType.ITALIC) and search(node.text):
+            return text_to_inline_nodes(text)
+    return text_nodes_to_html_nodes(nodes)
+
+
+def block_to_html_node(block, text_to_nodes=text_to_textnodes):
+    """
+    Converts a Block into a ParentNode, parsing its inline markdown.
+
+    Inline text goes through ``text_to_nodes``; when it raises ValueError or
+    returns bold or italic text with further markup inside, the text is
+    parsed with ``inline_tree.text_to_inline_nodes`` instead, so nested
+    emphasis renders and unmatched delimiters stay literal.
+
+    Args:
+        block: The Block to convert
+        text_to_nodes: The inline parser turning text into a list of TextNodes
+
+    Returns:
+        ParentNode: The HTML node for the block
+    """
+    block_type = block.block_type
+
+    if block_type == BlockType.CODE:
+        code = "".join(f"{line}\n" for line in block.lines)
+        return ParentNode("pre", [LeafNode("code", code)])
+    if block_type == BlockType.HEADING:
+        return ParentNode(f"h{block.level}", _inline_html_nodes(block.lines[0], text_to_nodes))
+    if block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        items = [ParentNode("li", _inline_html_nodes(item, text_to_nodes)) for item in block.lines]
+        return ParentNode(_BLOCK_TAGS[block_type], items)
+    return ParentNode(_BLOCK_TAGS[block_type],
+                      _inline_html_nodes(" ".join(block.lines), text_to_nodes))
+
+
+def markdown_to_html_node(lines, text_to_nodes=text_to_textnodes, transform=None):
+    """
+    Converts a markdown document into a single ``<div>`` ParentNode.
+
+    Args:
+        lines: Any iterable of markdown lines, e.g. an open file
+        text_to_nodes: The inline parser turning text into a list of TextNodes
+        transform: Optional function applied to the node of every block,
+            returning the node to use in its place
+
+    Returns:
+        ParentNode: A div holding one child node per block
+    """
+    children = [block_to_html_node(block, text_to_nodes) for block in iter_blocks(lines)]
+    if transform is not None:
+        children = [transform(child) for child in children]
+    if not children:
+        children = [LeafNode(value="")]
+    return ParentNode("div", children)
+
+
+def write_markdown_html(lines, fp, text_to_nodes=text_to_textnodes, transform=None):
+    """
+    Streams the HTML of a markdown document to a text file object block by block.
+
+    Produces the same output as ``markdown_to_html_node(lines).write_html(fp)``,
+    but only one block and its nodes exist at a time, so peak memory follows
+    the largest block rather than the size of the document.
+
+    Args:
+        lines: Any iterable of markdown lines, e.g. an open file
+        fp: Any object with a ``write(str)`` method
+        text_to_nodes: The inline parser turning text into a list of TextNodes
+        transform: Optional function applied to the node of every block,
+            returning the node to write in its place
+    """
+    fp.write("<div>")
+    for block in iter_blocks(lines):
+        node = block_to_html_node(block, text_to_nodes)
+        if transform is not None:
+            node = transform(node)
+        node.write_html(fp)
+    fp.write("</div>")
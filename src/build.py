@@ -0,0 +1,518 @@
+"""
+Builds the site: renders every markdown page of a content directory into HTML
+"""
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+
+from assets import copy_assets
+from depgraph import DEPENDENCY_GRAPH_NAME, DependencyGraph
+from inline_cache import InlineCache
+from linkgraph import LINK_GRAPH_NAME, LinkGraph, scan_links
+from manifest import Manifest, hash_bytes, hash_file
+from md_helpers import text_to_textnodes
+from profiling import BuildProfile, PageProfile
+from render import PageRenderer, PageResult
+from template import template_cache
+from writer import OutputWriter
+
+# Sources at least this large are memory-mapped and rendered straight to disk
+MMAP_THRESHOLD = 32 * 1024 * 1024
+# Bump when a change to the renderer changes its output, so that
+# incremental builds re-render every page once.
+RENDER_VERSION = "3"
+MANIFEST_NAME = ".manifest.json"
+
+
+class BuildSummary:
+    """
+    Collects the numbers reported at the end of a build.
+
+    Attributes:
+        pages: Number of pages rendered
+        skipped: Number of pages left alone because their inputs did not change
+        removed: Number of stale pages deleted because their source is gone
+        bytes_written: Total size of the rendered HTML in bytes
+        seconds: Wall-clock duration of the build
+        workers: Number of worker processes used to render pages
+        cache_hits, cache_misses: Inline cache lookups, when the cache is enabled
+        unchanged: Number of rendered pages not written because the same
+            bytes were already on disk
+        write_bytes: Bytes actually written to disk
+        write_seconds: Time the output writer threads spent writing, summed
+        assets: AssetResult of the static asset stage
+        links: LinkReport of the broken links and orphan pages, when links
+            were checked
+        dependents: Number of pages rendered because a file they include,
+            or their layout, changed
+        profile: BuildProfile of the build, when profiling was requested
+        errors: One message per page that could not be rendered, naming
+            the page
+    """
+
+    def __init__(self, workers):
+        self.pages = 0
+        self.skipped = 0
+        self.removed = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.workers = workers
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.unchanged = 0
+        self.write_bytes = 0
+        self.write_seconds = 0.0
+        self.assets = None
+        self.links = None
+        self.dependents = 0
+        self.profile = None
+        self.errors = []
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def write_throughput(self):
+        """Bytes written per second of writer time."""
+        return self.write_bytes / self.write_seconds if self.write_seconds else 0.0
+
+    def __str__(self):
+        return (f"Built {self.pages} pages ({self.bytes_written} bytes) in {self.seconds:.2f}s "
+                f"with {self.workers} workers: {self.pages_per_second:.0f} pages/sec\n"
+                f"Skipped {self.skipped} unchanged pages, removed {self.removed} stale pages\n"
+                f"Wrote {self.write_bytes} bytes at {self.write_throughput / 1e6:.1f} MB/s, "
+                f"{self.unchanged} rendered pages were already up to date"
+                f"{self._dependents_line()}{self._assets_line()}{self._links_line()}{self._cache_line()}"
+                f"{self._errors_line()}")
+
+    def _dependents_line(self):
+        if not self.dependents:
+            return ""
+        return f"\nRendered {self.dependents} pages whose includes or layout changed"
+
+    def _assets_line(self):
+        assets = self.assets
+        if assets is None or not (assets.copied or assets.unchanged or assets.removed):
+            return ""
+        return (f"\nAssets: {assets.copied} copied, {assets.unchanged} unchanged, "
+                f"{assets.removed} removed")
+
+    def _links_line(self):
+        links = self.links
+        if links is None:
+            return ""
+        return (f"\nLinks: {links.links} checked, {len(links.broken)} broken, "
+                f"{len(links.orphans)} orphan pages")
+
+    def _errors_line(self):
+        if not self.errors:
+            return ""
+        return f"\nFailed to render {len(self.errors)} pages"
+
+    def _cache_line(self):
+        lookups = self.cache_hits + self.cache_misses
+        if not lookups:
+            return ""
+        return (f"\nInline cache: {self.cache_hits} hits, {self.cache_misses} misses "
+                f"({self.cache_hits / lookups:.0%} hit rate)")
+
+
+def template_hash(layout_hash=None):
+    """
+    Returns the hash of what affects the output of every page besides its
+    source, as stored in the manifest: the renderer version and the hash of
+    the page layout, if there is one. The assets a page uses are among its
+    inputs in the dependency graph instead, so a new or changed asset only
+    re-renders the pages that point at it.
+    """
+    inputs = [RENDER_VERSION]
+    if layout_hash:
+        inputs.append(layout_hash)
+    return hash_bytes(json.dumps(inputs).encode())
+
+
+def find_pages(content_dir):
+    """
+    Returns the paths of all markdown files under ``content_dir``, relative to
+    it with ``/`` separators and sorted so builds are deterministic.
+
+    Files and directories whose names start with ``_`` are left out; they
+    hold snippets for other pages to include (see the ``includes`` module).
+    """
+    pages = []
+    for root, dirs, files in os.walk(content_dir):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("_"))
+        for name in sorted(files):
+            if name.endswith(".md") and not name.startswith("_"):
+                page = os.path.relpath(os.path.join(root, name), content_dir)
+                pages.append(page.replace(os.sep, "/"))
+    return pages
+
+
+def output_path_for(page):
+    """Maps a relative markdown path to the relative path of its HTML page."""
+    return os.path.splitext(page)[0] + ".html"
+
+
+class BuildOptions:
+    """
+    How ``build_site`` builds a site.
+
+    Attributes:
+        workers: Number of worker processes; 1 renders in this process, None
+            starts one per CPU core
+        full: Render every page instead of skipping the fresh ones; outputs of
+            deleted sources are still removed
+        inline_cache: Path of the inline cache database, or None to disable it
+        inline_cache_bytes: Size cap of the inline cache
+        writer_threads: Number of threads writing output files
+        fsync: Sync written pages to disk before the build returns
+        static_dir: Directory holding static assets; it may not exist
+        profile: Time every stage of the build and of each page
+        template: Path of the page layout, or None for bare page bodies
+        mmap_threshold: Source size in bytes from which pages are memory-mapped
+        check_links: Collect the link graph and report broken links and orphans
+    """
+    __slots__ = ("workers", "full", "inline_cache", "inline_cache_bytes", "writer_threads",
+                 "fsync", "static_dir", "profile", "template", "mmap_threshold", "check_links")
+
+    def __init__(self, workers=None, full=False, inline_cache=None,
+                 inline_cache_bytes=64 * 1024 * 1024, writer_threads=4, fsync=True,
+                 static_dir="static", profile=False, template=None,
+                 mmap_threshold=MMAP_THRESHOLD, check_links=True):
+        self.workers = workers
+        self.full = full
+        self.inline_cache = inline_cache
+        self.inline_cache_bytes = inline_cache_bytes
+        self.writer_threads = writer_threads
+        self.fsync = fsync
+        self.static_dir = static_dir
+        self.profile = profile
+        self.template = template
+        self.mmap_threshold = mmap_threshold
+        self.check_links = check_links
+
+
+class _Worker:
+    # What a process rendering pages of a build holds on to between pages
+
+    def __init__(self, content_dir, options, asset_urls):
+        self.profile = options.profile
+        self.cache = InlineCache(options.inline_cache, options.inline_cache_bytes) \
+            if options.inline_cache else None
+        # Compiled once per process; the cache makes this free in the build process
+        template = template_cache.load(options.template) if options.template else None
+        self.renderer = PageRenderer(content_dir, template, asset_urls,
+                                     self.cache.parse if self.cache else text_to_textnodes,
+                                     options.check_links, options.static_dir)
+
+    def render(self, page, target):
+        # A page that cannot be rendered is reported by the build, which
+        # goes on with the other pages
+        try:
+            return self._render(page, target)
+        except (OSError, ValueError) as e:
+            return PageResult(0, None, error=str(e))
+
+    def _render(self, page, target):
+        # Renders a page into memory, or straight to disk if it has a target
+        cache = self.cache
+        if cache is not None:
+            hits, misses = cache.hits, cache.misses
+        if self.profile:
+            result = self.renderer.render_html(page, profile=PageProfile(page))
+        elif target is not None:
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            try:
+                result = self.renderer.render_mapped(page, tmp_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            result.path = tmp_path
+        else:
+            result = self.renderer.render_html(page)
+        if cache is not None:
+            # Worker processes are not shut down cleanly, so flush after every page
+            cache.flush()
+            result.cache_hits = cache.hits - hits
+            result.cache_misses = cache.misses - misses
+        return result
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+
+# The _Worker of the current process, set by _init_worker
+_worker = None
+
+
+def _init_worker(content_dir, options, asset_urls):
+    global _worker
+    _worker = _Worker(content_dir, options, asset_urls)
+
+
+def _close_worker():
+    global _worker
+    _worker.close()
+    _worker = None
+
+
+def _render_job(job):
+    return _worker.render(*job)
+
+
+def _replace_output(tmp_path, target, fsync):
+    # Moves a page rendered straight to disk into place
+    if fsync:
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    os.replace(tmp_path, target)
+
+
+def _ensure_links(graph, page, source):
+    # A page skipped by the build keeps its stored links; they only have to
+    # be found here if the graph has none, e.g. after it was deleted
+    if graph is not None and page not in graph.pages:
+        with open(source, encoding="utf-8") as f:
+            graph.set_page(page, scan_links(f))
+
+
+def _drop_links(path, pages):
+    # Pages rendered without collecting their links lose their stored ones,
+    # so the next build that checks links scans them again
+    graph = LinkGraph.load(path)
+    for page in pages:
+        graph.remove_page(page)
+    graph.save(path)
+
+
+def _remove_output(output_dir, output):
+    try:
+        os.remove(os.path.join(output_dir, output))
+    except FileNotFoundError:
+        pass
+
+
+def _render_all(jobs, workers, content_dir, options, asset_urls):
+    # Yields the PageResult of every job in order, as they are rendered
+    if workers == 1 or len(jobs) < 2:
+        _init_worker(content_dir, options, asset_urls)
+        try:
+            yield from map(_render_job, jobs)
+        finally:
+            _close_worker()
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(content_dir, options, asset_urls)) as pool:
+            yield from pool.map(_render_job, jobs, chunksize=chunksize)
+
+
+def build_site(content_dir="content", output_dir="public", options=None):
+    """
+    Renders the markdown pages in ``content_dir`` into ``output_dir``.
+
+    Every page is rendered by a ``render.PageRenderer``. The settings named
+    below (``workers``, ``template`` and so on) are the attributes of
+    ``options``, a BuildOptions.
+
+    The build is incremental: a manifest in the output directory (see the
+    ``manifest`` module) records the inputs of every page, and only pages
+    whose source or rendering inputs changed are rendered again. Outputs of
+    sources that no longer exist are deleted.
+
+    Pages can include shared snippets (see the ``includes`` module). A
+    DependencyGraph in the output directory records every file each page
+    read: its source, the layout and its partials, and its includes, and
+    every static asset its URLs point at. When a shared file changes,
+    exactly the pages that read it are rendered again.
+
+    Pages are spread over a pool of worker processes, one per CPU core by
+    default. Workers send the rendered HTML back, and an OutputWriter writes
+    it on ``writer_threads`` threads while rendering goes on; pages whose
+    bytes are already on disk are not written again. Writes go through
+    temporary files and renames, and with ``fsync`` they are synced to disk
+    in batches.
+
+    Files in ``static_dir`` are first published into the output directory
+    by ``assets.copy_assets`` under content-hashed names, and ``href`` and
+    ``src`` URLs of rendered pages, in their content and in the layout, are
+    rewritten to those names.
+
+    With ``inline_cache`` set, parsed paragraphs are kept in an InlineCache
+    database at that path and reused by later builds and by other pages with
+    the same text.
+
+    With ``template``, the path of a layout file (see the ``template``
+    module), every page is wrapped in the layout with its ``title``, ``nav``
+    and ``content`` slots filled. The layout is compiled once per process,
+    and a change to it re-renders every page.
+
+    Sources of ``mmap_threshold`` bytes or more are rendered by
+    ``PageRenderer.render_mapped``: memory-mapped and written straight to
+    their output by the worker, so neither their text nor their HTML is held
+    in memory as a whole. Profiled builds read them like any other page.
+
+    With ``check_links``, the ``href`` and ``src`` URLs of every rendered
+    page are collected into a LinkGraph kept in the output directory, which
+    is then checked for broken internal links and orphan pages (see the
+    ``linkgraph`` module). Only rendered pages get their links collected
+    again; the rest come from the stored graph. A build without
+    ``check_links`` drops the stored links of the pages it renders.
+
+    With ``profile``, every page is timed by a PageProfile (see the
+    ``profiling`` module) and the summary carries a BuildProfile with the
+    time of every stage and the counts of every page.
+
+    A page that cannot be rendered, for example because it includes a
+    missing file or is not valid UTF-8, does not stop the build: it is
+    listed in the summary's ``errors`` with its path, keeps its previous
+    output and is tried again by the next build.
+
+    Args:
+        content_dir: Directory holding the markdown sources
+        output_dir: Directory the HTML pages are written to
+        options: BuildOptions; None builds with the defaults
+
+    Returns:
+        BuildSummary: The page counts, bytes written and throughput of the build
+
+    Raises:
+        FileNotFoundError: If ``content_dir`` or ``template`` does not exist
+        ValueError: If a partial of the layout includes itself
+    """
+    options = options or BuildOptions()
+    if not os.path.isdir(content_dir):
+        raise FileNotFoundError(f"Content directory not found: {content_dir}")
+    template = options.template
+    layout_hash = template_cache.load(template).hash if template else None
+
+    workers = options.workers or os.cpu_count() or 1
+    summary = BuildSummary(workers)
+    clock = time.perf_counter
+    start = stage_start = clock()
+    if options.profile:
+        summary.profile = BuildProfile()
+        stages = summary.profile.stages
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    # Loaded for full builds too, to remove the outputs of deleted sources
+    old_manifest = Manifest.load(manifest_path)
+    links_path = os.path.join(output_dir, LINK_GRAPH_NAME)
+    graph = LinkGraph.load(links_path) if options.check_links else None
+    deps_path = os.path.join(output_dir, DEPENDENCY_GRAPH_NAME)
+    deps = DependencyGraph.load(deps_path)
+    affected = deps.affected(deps.changed_inputs())
+    manifest = Manifest()
+    summary.assets = copy_assets(options.static_dir, output_dir)
+    asset_urls = summary.assets.urls
+    current_template_hash = template_hash(layout_hash)
+    if options.profile:
+        stages["assets"], stage_start = clock() - stage_start, clock()
+
+    pages = find_pages(content_dir)
+    jobs = []
+    rendered = []
+    for page in pages:
+        source = os.path.join(content_dir, page)
+        output = output_path_for(page)
+        target = os.path.join(output_dir, output)
+        stat = os.stat(source)
+        entry = old_manifest.pages.get(page)
+
+        # Pages the dependency graph does not know may include anything
+        if options.full or page in affected or page not in deps.pages:
+            summary.dependents += page in affected and not options.full
+            jobs.append((page, target if stat.st_size >= options.mmap_threshold else None))
+            rendered.append((page, stat, output))
+            continue
+
+        if old_manifest.is_fresh(page, stat, current_template_hash) and os.path.exists(target):
+            manifest.pages[page] = entry
+            summary.skipped += 1
+            _ensure_links(graph, page, source)
+            continue
+
+        # Only hash here when there is something to compare against; new
+        # pages are hashed by the worker while it renders them
+        if entry is not None and entry["template_hash"] == current_template_hash and \
+                os.path.exists(target):
+            content_hash = hash_file(source)
+            if entry["hash"] == content_hash:
+                manifest.record(page, stat, content_hash, current_template_hash, output)
+                summary.skipped += 1
+                _ensure_links(graph, page, source)
+                continue
+
+        jobs.append((page, target if stat.st_size >= options.mmap_threshold else None))
+        rendered.append((page, stat, output))
+
+    current = set(pages)
+    for page, entry in old_manifest.pages.items():
+        if page not in current:
+            _remove_output(output_dir, entry["output"])
+            summary.removed += 1
+    if graph is not None:
+        for page in [page for page in graph.pages if page not in current]:
+            graph.remove_page(page)
+    for page in [page for page in deps.pages if page not in current]:
+        deps.remove(page)
+    if options.profile:
+        stages["discover"], stage_start = clock() - stage_start, clock()
+
+    results = _render_all(jobs, workers, content_dir, options, asset_urls)
+    failed = {}
+    with OutputWriter(options.writer_threads, fsync=options.fsync) as writer:
+        # results comes first so that it is run to the end and its cleanup runs
+        for result, (page, stat, output) in zip(results, rendered):
+            if result.error is not None:
+                # Left out of the manifest, so the page is tried again by the
+                # next build; its previous output stays
+                summary.errors.append(f"Failed to render {page}: {result.error}")
+                failed[page] = output
+                continue
+            if result.path is not None:
+                _replace_output(result.path, os.path.join(output_dir, output), options.fsync)
+            else:
+                writer.submit(os.path.join(output_dir, output), result.html)
+            result.html = None
+            summary.bytes_written += result.size
+            summary.cache_hits += result.cache_hits
+            summary.cache_misses += result.cache_misses
+            manifest.record(page, stat, result.content_hash, current_template_hash, output)
+            deps.record(page, os.path.join(content_dir, page), result.inputs)
+            if graph is not None:
+                graph.set_page(page, result.links)
+            if options.profile:
+                summary.profile.pages.append(result.profile)
+        if options.profile:
+            stages["render"], stage_start = clock() - stage_start, clock()
+    summary.unchanged = writer.unchanged
+    summary.write_bytes = writer.bytes_written
+    summary.write_seconds = writer.seconds
+    manifest.save(manifest_path)
+    deps.save(deps_path)
+    if options.profile:
+        stages["write"] = writer.seconds
+        stages["finish"], stage_start = clock() - stage_start, clock()
+    if graph is not None:
+        outputs = {page: entry["output"] for page, entry in manifest.pages.items()}
+        outputs.update(failed)
+        summary.links = graph.check(outputs, set(asset_urls) | set(asset_urls.values()))
+        graph.save(links_path)
+        if options.profile:
+            stages["links"] = clock() - stage_start
+    elif jobs and os.path.exists(links_path):
+        _drop_links(links_path, [page for page, _, _ in rendered])
+
+    summary.pages = len(jobs) - len(failed)
+    summary.seconds = clock() - start
+    return summary
@@ -0,0 +1,158 @@
+"""
+Deterministic generator of synthetic markdown corpora for benchmarks.
+
+The same CorpusSpec (including its seed) always produces the same pages, so
+benchmark results from different runs and machines are comparable. Write a
+corpus to disk with ``python src/corpus.py OUTPUT_DIR --pages 1000``.
+"""
+import argparse
+import os
+import random
+
+_WORDS = ("static", "site", "node", "markdown", "render", "page", "tree", "text", "block",
+          "inline", "parser", "html", "build", "cache", "link", "image", "bold", "quick",
+          "brown", "fox", "jumps", "over", "lazy", "dog", "lorem", "ipsum", "dolor", "amet")
+
+
+class CorpusSpec:
+    """
+    The knobs of a synthetic corpus.
+
+    Attributes:
+        pages: Number of pages
+        paragraphs: Number of paragraphs per page, besides a heading, a list
+            and a code block on every page
+        paragraph_words: Number of words per paragraph
+        markup_density: Fraction of words that start an inline construct
+            (emphasis, code, link or image), from 0 to 1
+        nesting_depth: Levels of emphasis nested inside each other; 1 is plain
+            ``**bold**``/``*italic*``, 2 and more nest them, which only the
+            nested-emphasis parser handles
+        link_ratio: Fraction of inline constructs that are links or images
+        image_ratio: Fraction of those links and images that are images
+        seed: Seed of the random generator
+    """
+    __slots__ = ("pages", "paragraphs", "paragraph_words", "markup_density", "nesting_depth",
+                 "link_ratio", "image_ratio", "seed")
+
+    def __init__(self, pages=1000, paragraphs=5, paragraph_words=60, markup_density=0.1,
+                 nesting_depth=1, link_ratio=0.2, image_ratio=0.25, seed=0):
+        self.pages = pages
+        self.paragraphs = paragraphs
+        self.paragraph_words = paragraph_words
+        self.markup_density = markup_density
+        self.nesting_depth = nesting_depth
+        self.link_ratio = link_ratio
+        self.image_ratio = image_ratio
+        self.seed = seed
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _emphasis(rng, words, depth):
+    # Emphasis nested ``depth`` levels deep, alternating bold and italic
+    inner = " ".join(words)
+    for level in range(depth):
+        delimiter = "**" if (depth - level) % 2 else "*"
+        if level:
+            inner = f"{rng.choice(_WORDS)} {inner} {rng.choice(_WORDS)}"
+        inner = f"{delimiter}{inner}{delimiter}"
+    return inner
+
+
+def generate_paragraph(rng, spec):
+    """Returns one paragraph of inline markdown drawn from ``rng``."""
+    parts = []
+    words = spec.paragraph_words
+    index = 0
+    while index < words:
+        word = rng.choice(_WORDS)
+        if rng.random() >= spec.markup_density:
+            parts.append(word)
+            index += 1
+            continue
+        span = [word] + [rng.choice(_WORDS) for _ in range(rng.randint(0, 2))]
+        index += len(span)
+        if rng.random() < spec.link_ratio:
+            text = " ".join(span)
+            if rng.random() < spec.image_ratio:
+                parts.append(f"![{text}](/images/{word}.png)")
+            else:
+                parts.append(f"[{text}](/docs/{word}.html)")
+        elif spec.nesting_depth > 0 and rng.random() < 0.8:
+            parts.append(_emphasis(rng, span, spec.nesting_depth))
+        else:
+            parts.append(f"`{' '.join(span)}`")
+    return " ".join(parts)
+
+
+def generate_page(rng, spec, number):
+    """Returns the markdown of one page drawn from ``rng``."""
+    blocks = [f"# Page {number}"]
+    blocks += [generate_paragraph(rng, spec) for _ in range(spec.paragraphs)]
+    blocks.append("\n".join(f"- {rng.choice(_WORDS)} {rng.choice(_WORDS)}" for _ in range(3)))
+    blocks.append(f"```\ncode {number}\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_pages(spec):
+    """Yields ``(relative path, markdown)`` for every page of the corpus."""
+    rng = random.Random(spec.seed)
+    for number in range(spec.pages):
+        yield f"section{number % 100}/page{number}.md", generate_page(rng, spec, number)
+
+
+def generate_paragraphs(spec):
+    """Returns ``spec.pages * spec.paragraphs`` paragraphs of the corpus."""
+    rng = random.Random(spec.seed)
+    return [generate_paragraph(rng, spec) for _ in range(spec.pages * spec.paragraphs)]
+
+
+def write_corpus(directory, spec):
+    """Writes the pages of the corpus as markdown files under ``directory``."""
+    for path, markdown in generate_pages(spec):
+        target = os.path.join(directory, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(markdown)
+
+
+def add_spec_arguments(parser):
+    """Adds an option for every CorpusSpec knob to an argparse parser."""
+    defaults = CorpusSpec()
+    parser.add_argument("--pages", type=int, default=defaults.pages, help="number of pages")
+    parser.add_argument("--paragraphs", type=int, default=defaults.paragraphs,
+                        help="paragraphs per page")
+    parser.add_argument("--paragraph-words", type=int, default=defaults.paragraph_words,
+                        help="words per paragraph")
+    parser.add_argument("--markup-density", type=float, default=defaults.markup_density,
+                        help="fraction of words starting inline markup")
+    parser.add_argument("--nesting-depth", type=int, default=defaults.nesting_depth,
+                        help="levels of nested emphasis")
+    parser.add_argument("--link-ratio", type=float, default=defaults.link_ratio,
+                        help="fraction of inline markup that is links or images")
+    parser.add_argument("--image-ratio", type=float, default=defaults.image_ratio,
+                        help="fraction of links and images that are images")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="random seed")
+
+
+def spec_from_args(args):
+    """Builds a CorpusSpec from arguments added by ``add_spec_arguments``."""
+    return CorpusSpec(args.pages, args.paragraphs, args.paragraph_words, args.markup_density,
+                      args.nesting_depth, args.link_ratio, args.image_ratio, args.seed)
+
+
+def main(argv=None):
+    '''
+        Writes a synthetic corpus to a directory
+    '''
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown corpus")
+    parser.add_argument("directory", help="directory to write the markdown pages to")
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+    write_corpus(args.directory, spec_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Defines the DependencyGraph class, which records every file each page read
+while it was rendered, so that a change to a shared file rebuilds exactly
+the pages that used it.
+
+A page's inputs are its markdown source, the page layout and its partials,
+every snippet it includes, nested includes too, and the static assets its
+URLs point at. An input may not exist, e.g. an asset that a page links to
+before it is added; it changes when it appears. The markdown source is
+checked by the manifest; every other input is a shared input, whose state
+the graph keeps. A reverse index maps each input to the pages that read it,
+so the pages affected by a set of changed inputs are found in time
+proportional to their number. The graph is stored as JSON, by default in
+``<output_dir>/.deps.json``::
+
+    {
+        "version": 1,
+        "inputs": ["content/blog/post.md", "content/_snippets/note.md", "template.html"],
+        "states": {
+            "1": {"hash": "<sha256 hex digest>", "size": 12, "mtime_ns": 1700000000000000000}
+        },
+        "pages": {
+            "blog/post.md": [0, 1, 2]
+        }
+    }
+
+Inputs are file system paths as the build saw them; ``pages`` holds indexes
+into ``inputs`` and ``states`` is keyed by them.
+"""
+import json
+import os
+from stat import S_ISREG
+
+from manifest import hash_file
+
+DEPENDENCY_GRAPH_NAME = ".deps.json"
+# The state of a shared input that does not exist
+_MISSING = {"size": -1, "mtime_ns": -1, "hash": None}
+
+
+class DependencyGraph:
+    """
+    Maps each page to the files it was rendered from, and back.
+
+    Attributes:
+        pages: Dictionary of source path (relative to the content directory)
+            to the tuple of input paths the page read, its own source first
+        states: Dictionary of shared input path to the ``hash``, ``size`` and
+            ``mtime_ns`` it had when the pages using it were rendered
+    """
+    VERSION = 1
+
+    def __init__(self):
+        self.pages = {}
+        self.states = {}
+        self._dependents = {}
+
+    def record(self, page, source, inputs=()):
+        """
+        Replaces the inputs of ``page`` after it was rendered from ``source``
+        and the shared ``inputs``. Shared inputs the graph has no state for
+        are stat'ed and hashed now.
+        """
+        self.remove(page)
+        files = tuple(dict.fromkeys((source, *inputs)))
+        self.pages[page] = files
+        for path in files:
+            dependents = self._dependents.get(path)
+            if dependents is None:
+                dependents = self._dependents[path] = set()
+            dependents.add(page)
+        for path in files[1:]:
+            if path not in self.states:
+                self.states[path] = _state(path)
+
+    def remove(self, page):
+        """Drops ``page``, and the state of inputs no other page uses."""
+        for path in self.pages.pop(page, ()):
+            dependents = self._dependents[path]
+            dependents.discard(page)
+            if not dependents:
+                del self._dependents[path]
+                self.states.pop(path, None)
+
+    def dependents(self, path):
+        """Returns the pages that read the file at ``path``."""
+        return set(self._dependents.get(path, ()))
+
+    def affected(self, changed):
+        """
+        Returns the pages to rebuild when the files in ``changed`` change:
+        every page that read any of them. Only the entries of those files in
+        the reverse index are visited.
+        """
+        pages = set()
+        dependents = self._dependents
+        for path in changed:
+            pages.update(dependents.get(path, ()))
+        return pages
+
+    def changed_inputs(self):
+        """
+        Checks every shared input against its recorded state, and records
+        its current state.
+
+        An input whose size and mtime match is not read; one that was only
+        touched is read and hashed but not reported. An input is reported
+        once per change, so a page that fails to render after one is tried
+        again on the next change rather than on every check.
+
+        Returns:
+            set[str]: The paths of the shared inputs that changed or are gone
+        """
+        changed = set()
+        for path, state in self.states.items():
+            stat = _stat(path)
+            if stat is None:
+                if state["hash"] is not None:
+                    changed.add(path)
+                    state.update(_MISSING)
+                continue
+            if stat.st_size == state["size"] and stat.st_mtime_ns == state["mtime_ns"]:
+                continue
+            content_hash = hash_file(path)
+            if content_hash != state["hash"]:
+                changed.add(path)
+            state.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, hash=content_hash)
+        return changed
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a graph from ``path``. A missing, unreadable or outdated file
+        gives an empty graph.
+        """
+        graph = cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return graph
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return graph
+        try:
+            inputs = data["inputs"]
+            states = {inputs[int(index)]: {name: state[name] for name in _MISSING}
+                      for index, state in data["states"].items()}
+            pages = {page: tuple(inputs[index] for index in indexes)
+                     for page, indexes in data["pages"].items()}
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            # Damaged: the right version but not the right shape
+            return graph
+        graph.states = states
+        for page, files in pages.items():
+            graph.pages[page] = files
+            for file in files:
+                dependents = graph._dependents.get(file)
+                if dependents is None:
+                    dependents = graph._dependents[file] = set()
+                dependents.add(page)
+        return graph
+
+    def save(self, path):
+        """Writes the graph to ``path`` through a temporary file and a rename."""
+        inputs = list(self._dependents)
+        indexes = {file: index for index, file in enumerate(inputs)}
+        data = {
+            "version": self.VERSION,
+            "inputs": inputs,
+            "states": {str(indexes[file]): state for file, state in self.states.items()},
+            "pages": {page: [indexes[file] for file in files] for page, files in self.pages.items()},
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+def _stat(path):
+    # Returns the stat of a file, or None if there is no file at path
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return stat if S_ISREG(stat.st_mode) else None
+
+
+def _state(path):
+    # Stat before reading, so a write in between shows up as a changed mtime
+    stat = _stat(path)
+    if stat is None:
+        return dict(_MISSING)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(path)}
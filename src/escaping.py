@@ -0,0 +1,78 @@
+"""
+HTML escaping for text and attribute values, built for the rendering hot path
+"""
+
+
+class Markup(str):
+    """
+    A string that is already escaped HTML.
+
+    The escaping functions return Markup values unchanged, so text that was
+    escaped once (or is trusted HTML to begin with) is never escaped twice.
+    """
+    __slots__ = ()
+
+
+def escape_text(value):
+    """
+    Escapes ``&``, ``<`` and ``>`` in text content.
+
+    Strings without any of those characters, which is most text, are returned
+    as they are after a scan for them; nothing is copied. Markup values are
+    returned unchanged.
+    """
+    if isinstance(value, Markup):
+        return value
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    return value
+
+
+def escape_attribute(value):
+    """
+    Escapes an attribute value for use inside double quotes.
+
+    Like ``escape_text`` but also escapes both quote characters. Non-string
+    values are converted with ``str`` first.
+    """
+    if isinstance(value, Markup):
+        return value
+    value = escape_text(str(value))
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "'" in value:
+        value = value.replace("'", "&#x27;")
+    return value
+
+
+def escape_texts(values):
+    """
+    Escapes a batch of text values at once.
+
+    The values are joined with a NUL separator and escaped with one pass of
+    each replacement over the joined string, instead of one call per value.
+    If nothing needs escaping the input values are returned in a new list.
+    Markup values are left as they are, as by ``escape_text``.
+
+    Returns:
+        list[str]: The escaped values, in order
+    """
+    joined = "\0".join(values)
+    escaped = escape_text(joined)
+    if escaped is joined:
+        return list(values)
+
+    parts = escaped.split("\0")
+    if len(parts) != len(values):
+        # A value contained the separator itself
+        return [escape_text(value) for value in values]
+
+    # Markup values were escaped along with the rest; put the originals back
+    for index, value in enumerate(values):
+        if isinstance(value, Markup):
+            parts[index] = value
+    return parts
@@ -0,0 +1,236 @@
+"""
+Defines the FlatDocument class, an array-backed alternative to HTMLNode trees
+"""
+from array import array
+
+from escaping import Markup, escape_text
+from htmlnode import LeafNode, ParentNode, open_tag
+
+
+def _unescape(value):
+    # Undoes escape_text exactly: every "&" in its output starts an entity
+    return str(value).replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+class FlatDocument:
+    """
+    Stores an HTML node tree as parallel arrays instead of one object per node.
+
+    Nodes are laid out in document (pre-order) order, so the children of a
+    node follow it directly and its subtree ends at ``ends[i]``. Every node is
+    described by one entry in each of the arrays below; tags and props are
+    interned into shared tables and all leaf text lives in a single string
+    buffer addressed by start/end offsets. A document costs a couple of dozen
+    bytes per node plus its text, against a few hundred bytes for an object
+    tree with its lists and dicts.
+
+    Attributes
+    ----------
+    tag_ids : array
+        Index into ``tags`` for each node. Tag id 0 is ``None`` (a bare text leaf).
+    parents : array
+        Index of each node's parent, or -1 for the root.
+    ends : array
+        One past the index of the last node in each node's subtree. A node is a
+        parent node exactly when ``ends[i] > i + 1``.
+    props_ids : array
+        Index into ``props`` for each node. Props id 0 is ``None``.
+    text_starts : array
+        Offset of each leaf's value in ``text``. The value ends where the next
+        node's starts, since parent nodes have empty spans.
+    tags : list
+        Interned tag names.
+    props : list
+        Interned props dictionaries, shared between nodes with equal props.
+    text : str
+        The concatenated values of all leaf nodes, escaped once when the
+        document is built so rendering copies them out verbatim.
+    markup : set
+        Indexes of the leaves whose value was Markup, and so was not
+        escaped. ``to_node`` unescapes the values of all other leaves, so
+        the rebuilt tree holds the same text as the original.
+
+    Examples
+    --------
+    >>> tree = ParentNode("p", [LeafNode(value="Hi "), LeafNode("b", "there")])
+    >>> doc = FlatDocument.from_node(tree)
+    >>> doc.to_html() == tree.to_html()
+    True
+    >>> doc.to_node() == tree
+    True
+
+    The round trip holds for text that needs escaping too:
+
+    >>> tree = LeafNode("p", "a < b & c")
+    >>> FlatDocument.from_node(tree).to_node() == tree
+    True
+    """
+    __slots__ = ("tag_ids", "parents", "ends", "props_ids", "text_starts",
+                 "tags", "props", "text", "markup")
+
+    def __init__(self):
+        self.tag_ids = array("H")
+        self.parents = array("i")
+        self.ends = array("I")
+        self.props_ids = array("I")
+        self.text_starts = array("I")
+        self.tags = [None]
+        self.props = [None]
+        self.text = ""
+        self.markup = set()
+
+    def __len__(self):
+        return len(self.tag_ids)
+
+    @classmethod
+    def from_node(cls, root):
+        """
+        Flattens a tree of LeafNode and ParentNode objects into a FlatDocument.
+
+        Raises:
+            TypeError: If the tree contains a node that is neither a LeafNode
+                nor a ParentNode.
+        """
+        doc = cls()
+        tag_index = {None: 0}
+        props_index = {}
+        text_parts = []
+        offset = 0
+
+        # Pre-order walk; a None node marks the end of a parent's subtree
+        stack = [(root, -1)]
+        while stack:
+            node, parent = stack.pop()
+            if node is None:
+                doc.ends[parent] = len(doc.tag_ids)
+                continue
+            if not isinstance(node, (LeafNode, ParentNode)):
+                raise TypeError(f"Cannot flatten node of type {type(node).__name__}")
+
+            index = len(doc.tag_ids)
+            tag_id = tag_index.get(node.tag)
+            if tag_id is None:
+                tag_id = tag_index[node.tag] = len(doc.tags)
+                doc.tags.append(node.tag)
+            doc.tag_ids.append(tag_id)
+            doc.parents.append(parent)
+            doc.ends.append(index + 1)
+            doc.props_ids.append(doc._intern_props(node.props, props_index))
+
+            doc.text_starts.append(offset)
+            if isinstance(node, LeafNode):
+                if isinstance(node.value, Markup):
+                    doc.markup.add(index)
+                value = escape_text(node.value)
+                text_parts.append(value)
+                offset += len(value)
+            else:
+                stack.append((None, index))
+                stack.extend((child, index) for child in reversed(node.children))
+
+        doc.text = "".join(text_parts)
+        doc.text_starts.append(offset)
+        return doc
+
+    def _intern_props(self, props, props_index):
+        if props is None:
+            return 0
+        key = tuple(props.items())
+        props_id = props_index.get(key)
+        if props_id is None:
+            props_id = props_index[key] = len(self.props)
+            self.props.append(props)
+        return props_id
+
+    def value(self, index):
+        """Returns the escaped text value of the leaf node at ``index``."""
+        return Markup(self.text[self.text_starts[index]:self.text_starts[index + 1]])
+
+    def children(self, index):
+        """Returns the indexes of the direct children of the node at ``index``."""
+        child = index + 1
+        end = self.ends[index]
+        result = []
+        while child < end:
+            result.append(child)
+            child = self.ends[child]
+        return result
+
+    def _open_tag(self, tag_id, props_id):
+        return open_tag(self.tags[tag_id], self.props[props_id])
+
+    def iter_html(self):
+        """
+        Yields the HTML of the document in order by walking the arrays directly.
+        """
+        close_tags = [f"</{tag}>" for tag in self.tags]
+        tag_count = len(self.tags)
+        open_tags = {}
+        ends = self.ends
+        props_ids = self.props_ids
+        starts = self.text_starts
+        text = self.text
+        # Open parents as flattened (tag id, subtree end) pairs
+        closing = []
+
+        for index, tag_id in enumerate(self.tag_ids):
+            while closing and closing[-1] <= index:
+                closing.pop()
+                yield close_tags[closing.pop()]
+
+            if tag_id == 0:
+                yield text[starts[index]:starts[index + 1]]
+                continue
+
+            key = props_ids[index] * tag_count + tag_id
+            open_tag = open_tags.get(key)
+            if open_tag is None:
+                open_tag = open_tags[key] = self._open_tag(tag_id, props_ids[index])
+
+            end = ends[index]
+            if end > index + 1:
+                yield open_tag
+                closing.append(tag_id)
+                closing.append(end)
+            else:
+                yield f"{open_tag}{text[starts[index]:starts[index + 1]]}{close_tags[tag_id]}"
+
+        while closing:
+            closing.pop()
+            yield close_tags[closing.pop()]
+
+    def to_html(self):
+        """Renders the document to a single HTML string."""
+        return "".join(self.iter_html())
+
+    def write_html(self, fp):
+        """Writes the rendered HTML of the document to a text file object."""
+        write = fp.write
+        for fragment in self.iter_html():
+            write(fragment)
+
+    def to_node(self):
+        """
+        Rebuilds the tree of LeafNode and ParentNode objects from the arrays.
+        """
+        tags = self.tags
+        props = self.props
+        node = None
+        children = {}
+
+        # Children always come after their parent, so walk backwards
+        for index in range(len(self.tag_ids) - 1, -1, -1):
+            tag = tags[self.tag_ids[index]]
+            node_props = props[self.props_ids[index]]
+            if self.ends[index] > index + 1:
+                node = ParentNode(tag, children.pop(index)[::-1], node_props)
+            else:
+                value = self.value(index)
+                if index not in self.markup:
+                    value = _unescape(value)
+                node = LeafNode(tag, value, node_props)
+            parent = self.parents[index]
+            if parent >= 0:
+                children.setdefault(parent, []).append(node)
+
+        return node
@@ -1,7 +1,53 @@
 """
 Defines the HTMLNode class
 """
+from collections import OrderedDict
 
+from escaping import Markup, escape_attribute, escape_text, escape_texts
+
+
+# Opening tags keyed by tag and props, shared by every node that has the same
+# ones. Cleared when it grows past _OPEN_TAG_LIMIT entries. Keys hold the type
+# of every value, since a Markup value equals the plain str with its text but
+# is not escaped.
+_OPEN_TAGS = {}
+_OPEN_TAG_LIMIT = 4096
+
+
+def _props_html(props):
+    return ' '.join([f'{key}="{escape_attribute(value)}"' for key, value in props.items()])
+
+
+def open_tag(tag, props=None):
+    """
+    Returns the opening tag for ``tag`` with the attributes in ``props``.
+
+    Attribute values are escaped. The result is interned, so nodes that
+    share a tag and props reuse one precomputed string instead of formatting
+    the attributes on every render.
+
+    Examples
+    --------
+    >>> open_tag("a", {"href": "/search?q=1&page=2"})
+    '<a href="/search?q=1&amp;page=2">'
+    """
+    if not props:
+        key = tag
+    else:
+        key = (tag, *[(name, value, type(value)) for name, value in props.items()])
+    try:
+        return _OPEN_TAGS[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable attribute values are formatted every time
+        return f"<{tag} {_props_html(props)}>"
+
+    result = f"<{tag} {_props_html(props)}>" if props else f"<{tag}>"
+    if len(_OPEN_TAGS) >= _OPEN_TAG_LIMIT:
+        _OPEN_TAGS.clear()
+    _OPEN_TAGS[key] = result
+    return result
 
 
 class HTMLNode:
@@ -15,7 +61,12 @@ class HTMLNode:
     to an HTML-compatible attribute string. It also defines standard methods for
     comparison and representation. Intended to be used as a base class for more
     specific types of HTML nodes.
+
+    Nodes store their attributes in ``__slots__`` rather than a per-instance
+    ``__dict__``, which keeps large trees compact. Subclasses should declare
+    their own (possibly empty) ``__slots__`` to keep that benefit.
     """
+    __slots__ = ("tag", "value", "children", "props")
 
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
@@ -24,17 +75,49 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        """
+        Renders the node to a single HTML string by joining ``iter_html``.
+        """
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         """
             Placeholder for later child class behavior
         """
         raise NotImplementedError
 
+    def write_html(self, fp):
+        """
+        Writes the rendered HTML of the node to a text file object.
+
+        Fragments are written as they are produced, so the full document is
+        never held in memory as one string.
+
+        Parameters
+        ----------
+        fp : file-like
+            Any object with a ``write(str)`` method, e.g. a file opened in text mode.
+        """
+        write = fp.write
+        for fragment in self.iter_html():
+            write(fragment)
+
+    def freeze(self, cache=None):
+        """
+        Returns an immutable FrozenNode snapshot of this node and its subtree.
+
+        Identical frozen subtrees share one rendered HTML string through a
+        RenderCache, so shared fragments are rendered once per process.
+        """
+        return FrozenNode(self, cache)
+
     def props_to_html(self):
         """
         Converts the properties (props) dictionary into a string of HTML attributes.
 
         If the 'props' attribute is None, it returns None. Otherwise, it generates
         a string of key-value pairs formatted as HTML attributes, joined by spaces.
+        Attribute values are escaped.
 
         Returns
         -------
@@ -42,13 +125,11 @@ class HTMLNode:
             A string of HTML attributes if 'props' is not None and contains attributes,
             otherwise None.
         """
-        return None if self.props is None else \
-            ' '.join([f'{key}="{value}"' for key, value in self.props.items()])
+        return None if self.props is None else _props_html(self.props)
 
     def generate_tag_with_props(self):
         """Helper method to generate a tag with optional properties."""
-        props_html = self.props_to_html()
-        return f"<{self.tag} {props_html}>" if props_html else f"<{self.tag}>"
+        return open_tag(self.tag, self.props)
 
     def __eq__(self, other):
         """
@@ -77,7 +158,8 @@ class LeafNode(HTMLNode):
     have any children. It encapsulates simple HTML elements with optional
     attributes and a required textual value. This class is useful for
     creating elements like <span>, <a>, <img> (without children), or
-    text nodes.
+    text nodes. The value is escaped when rendered unless it is an
+    ``escaping.Markup`` string.
 
     Attributes
     ----------
@@ -100,6 +182,8 @@ class LeafNode(HTMLNode):
     >>> print(text_node.to_html())
     Just text
     """
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         if value is None:
             raise ValueError("Value is required for leaf nodes")
@@ -109,9 +193,12 @@ class LeafNode(HTMLNode):
         if self.value is None:
             raise ValueError("Value is required for leaf nodes")
         if self.tag is None:
-            return self.value
+            return escape_text(self.value)
 
-        return f"{self.generate_tag_with_props()}{self.value}</{self.tag}>"
+        return f"{self.generate_tag_with_props()}{escape_text(self.value)}</{self.tag}>"
+
+    def iter_html(self):
+        yield self.to_html()
 
     def __repr__(self):
         return f"LeafNode('{self.tag}', {self.value}, {self.children}, {self.props})"
@@ -143,6 +230,8 @@ class ParentNode(HTMLNode):
         ValueError: If 'tag' or 'children' is not provided during initialization or
                     when converting to HTML.
     """
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
         if not children:
             raise ValueError("Children are required for parent nodes")
@@ -151,16 +240,192 @@ class ParentNode(HTMLNode):
 
         super().__init__(tag=tag, value=None, children=children, props=props)
 
-    def to_html(self):
+    def iter_html(self):
         """
-        Converts the current node and its child nodes into HTML string representation.
-        """
-        # Generate HTML for all children without re-wrapping their tags
-        children_html = "".join(child.to_html() for child in self.children)
+        Yields the HTML of the current node and its child nodes in document order.
 
-        # Generate the tag with properties for the parent node
-        parent_tag_with_props = self.generate_tag_with_props()
-        return f"{parent_tag_with_props}{children_html}</{self.tag}>"
+        Nested parent nodes are walked with an explicit stack of child iterators
+        instead of recursion, so the depth of the tree is not limited by the
+        interpreter's recursion limit and no intermediate string is built for
+        any subtree.
+        """
+        yield self.generate_tag_with_props()
+        stack = [(self.tag, iter(self.children))]
+        while stack:
+            tag, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    yield child.generate_tag_with_props()
+                    stack.append((child.tag, iter(child.children)))
+                    break
+                if isinstance(child, LeafNode):
+                    yield child.to_html()
+                else:
+                    yield from child.iter_html()
+            else:
+                stack.pop()
+                yield f"</{tag}>"
 
     def __repr__(self):
         return f"ParentNode('{self.tag}', {self.value}, {self.children}, {self.props})"
+
+
+
+def escape_tree(node):
+    """
+    Escapes the values of all LeafNodes under ``node`` in one batch.
+
+    Every value is replaced by an escaped ``Markup`` string, so rendering the
+    tree, as often as needed, does no further escaping work. Frozen subtrees
+    are left alone. Returns ``node``.
+
+    This pays off for trees rendered more than once. The build renders each
+    block once as it streams, and there the extra walk costs more than the
+    per-leaf ``escape_text`` fast path it replaces (``bench.py escape``).
+    """
+    leaves = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, LeafNode):
+            if not isinstance(current.value, Markup):
+                leaves.append(current)
+        elif isinstance(current, ParentNode):
+            stack.extend(current.children)
+
+    for leaf, value in zip(leaves, escape_texts([leaf.value for leaf in leaves])):
+        leaf.value = Markup(value)
+    return node
+
+
+class RenderCache:
+    """
+    A bounded least-recently-used cache of rendered HTML for frozen subtrees.
+
+    Attributes:
+        max_bytes: Upper bound on the total size of the cached HTML
+        hits: Number of renders answered from the cache
+        misses: Number of renders that had to walk the subtree
+        bytes_saved: Total size of the HTML served from the cache instead of rendered
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, key, node):
+        """Returns the HTML for the subtree with structural ``key``, rendering ``node`` on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.bytes_saved += entry[1]
+            return entry[0]
+
+        self.misses += 1
+        html = node.to_html()
+        size = len(html.encode("utf-8"))
+        if size <= self.max_bytes:
+            self._entries[key] = (html, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._size -= old_size
+        return html
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        self.__init__(self.max_bytes)
+
+
+# The cache frozen nodes use unless they are given their own
+render_cache = RenderCache()
+
+
+def _props_key(props):
+    # Types are part of keys for the reason given at _OPEN_TAGS
+    return None if props is None else \
+        tuple([(name, value, type(value)) for name, value in props.items()])
+
+
+def _freeze_tree(root):
+    # Copy a LeafNode/ParentNode tree and compute its structural key in one
+    # post-order walk. Results of finished subtrees wait on a stack until
+    # their parent is revisited.
+    results = []
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if isinstance(node, FrozenNode):
+            results.append((node, node.key))
+        elif isinstance(node, LeafNode):
+            props = None if node.props is None else dict(node.props)
+            results.append((LeafNode(node.tag, node.value, props),
+                            ("leaf", node.tag, node.value, type(node.value),
+                             _props_key(props))))
+        elif isinstance(node, ParentNode):
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+                continue
+            count = len(node.children)
+            done = results[-count:]
+            del results[-count:]
+            props = None if node.props is None else dict(node.props)
+            results.append((ParentNode(node.tag, [copy for copy, _ in done], props),
+                            ("parent", node.tag, _props_key(props), tuple(key for _, key in done))))
+        else:
+            raise TypeError(f"Cannot freeze node of type {type(node).__name__}")
+    return results[0]
+
+
+class FrozenNode(HTMLNode):
+    """
+    An immutable snapshot of a LeafNode or ParentNode subtree.
+
+    Freezing copies the subtree, so later changes to the original nodes do not
+    leak into it, and computes a structural key from the tags, values, props
+    and children of every node. Two frozen nodes built separately but with
+    the same structure have equal keys, compare equal, hash the same and
+    share one rendered string in the RenderCache. A frozen node can be used
+    as a child of a ParentNode; its cached HTML is spliced in as one fragment.
+
+    Attributes:
+        tag: The tag of the frozen root node
+        key: The structural key of the subtree
+    """
+    __slots__ = ("key", "_node", "_cache")
+
+    def __init__(self, node, cache=None):
+        copy, key = _freeze_tree(node)
+        if isinstance(copy, FrozenNode):
+            copy = copy._node
+        for name, value in (("tag", copy.tag), ("value", None), ("children", None),
+                            ("props", None), ("key", key), ("_node", copy),
+                            ("_cache", render_cache if cache is None else cache)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenNode is immutable")
+
+    def freeze(self, cache=None):
+        return self if cache is None or cache is self._cache else FrozenNode(self, cache)
+
+    def iter_html(self):
+        yield self._cache.render(self.key, self._node)
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenNode) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"FrozenNode({self._node!r})"
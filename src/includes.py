@@ -0,0 +1,74 @@
+"""
+Markdown includes: a line ``{{ include path }}`` is replaced with the lines
+of another markdown file.
+
+The path is relative to the file holding the line, or to the content
+directory if it starts with ``/``, and may not leave the content directory.
+Files and directories whose names start with ``_`` are not built as pages
+(see ``build.find_pages``), so shared snippets usually live in a directory
+such as ``_snippets``. Includes may nest, but not in a cycle. Include lines
+inside code blocks are left as they are.
+"""
+import os
+import re
+
+_INCLUDE = re.compile(r"\{\{\s*include\s+(\S+?)\s*\}\}")
+_FENCE = "```"
+
+
+def resolve_include(target, path, root):
+    """
+    Returns the path of the file that ``{{ include target }}`` in the file at
+    ``path`` names, with ``root`` being the content directory.
+
+    Raises:
+        ValueError: If the target lies outside ``root``
+    """
+    if target.startswith("/"):
+        resolved = os.path.join(root, target.lstrip("/"))
+    else:
+        resolved = os.path.join(os.path.dirname(path), target)
+    resolved = os.path.normpath(resolved)
+    absolute_root = os.path.abspath(root)
+    if os.path.commonpath([absolute_root, os.path.abspath(resolved)]) != absolute_root:
+        raise ValueError(f"Include outside the content directory: {target} in {path}")
+    return resolved
+
+
+def expand_includes(lines, path, root, reads=None, _including=()):
+    """
+    Yields the markdown ``lines`` of the file at ``path`` with every include
+    line replaced by the lines of the file it names, recursively.
+
+    Args:
+        lines: Any iterable of markdown lines, e.g. an open file
+        path: Path of the file the lines come from
+        root: The content directory
+        reads: Optional list every included file's path is appended to
+
+    Raises:
+        OSError: If an included file cannot be read
+        ValueError: If an include lies outside ``root`` or includes itself
+    """
+    including = _including + (os.path.normpath(path),)
+    in_code = False
+    for line in lines:
+        # Plain lines, which are nearly all of them, cost two substring tests
+        if _FENCE in line:
+            stripped = line.strip()
+            if in_code:
+                in_code = stripped != _FENCE
+            else:
+                in_code = stripped.startswith(_FENCE)
+        elif not in_code and "{{" in line:
+            match = _INCLUDE.fullmatch(line.strip())
+            if match is not None:
+                included = resolve_include(match.group(1), path, root)
+                if included in including:
+                    raise ValueError(f"Include includes itself: {included}")
+                if reads is not None:
+                    reads.append(included)
+                with open(included, encoding="utf-8") as f:
+                    yield from expand_includes(f, included, root, reads, including)
+                continue
+        yield line
@@ -0,0 +1,141 @@
+"""
+Defines the InlineCache class, a persistent cache of parsed inline TextNodes
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import md_helpers
+from md_helpers import text_to_textnodes
+from textnode import TextNode, TextType
+
+
+def _serialize(nodes):
+    return json.dumps([[node.text, node.text_type.value, node.url] for node in nodes],
+                      separators=(",", ":"))
+
+
+def _deserialize(data):
+    return [TextNode(text, TextType(text_type), url) for text, text_type, url in json.loads(data)]
+
+
+class InlineCache:
+    """
+    Caches the TextNode lists produced by the inline parser on disk.
+
+    Entries are keyed by a hash of the paragraph text and the parser version,
+    so a new parser never sees results of an old one. The cache is a SQLite
+    database that several build processes can share. Reads and writes are
+    buffered in memory and written by ``flush``, which also evicts the least
+    recently used entries once the stored data exceeds ``max_bytes``.
+
+    Flushing is cheap enough to do after every page: the size of the stored
+    data is read from the database once and then kept up to date in memory
+    as entries are written and evicted. Entries written by other processes
+    are not counted until the next eviction or ``close``, so while several
+    processes share the database it can grow past ``max_bytes`` until one of
+    them evicts.
+
+    Attributes:
+        hits: Number of lookups answered from the cache
+        misses: Number of lookups that had to run the parser
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+        self._touched = set()
+        # Bytes stored as far as this process knows; None until first needed
+        self._size = None
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries "
+                         "(key BLOB PRIMARY KEY, data TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, used INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+
+    @staticmethod
+    def key(text):
+        """Returns the cache key for ``text`` under the current parser version."""
+        # Looked up on every call, so the key follows md_helpers.PARSER_VERSION
+        return hashlib.sha256(f"{md_helpers.PARSER_VERSION}\0{text}".encode()).digest()
+
+    def parse(self, text):
+        """
+        Returns the inline TextNodes for ``text``, from the cache if possible.
+
+        Raises:
+            ValueError: If the parser rejects the text; failures are not cached
+        """
+        key = self.key(text)
+        data = self._pending.get(key)
+        if data is None:
+            row = self._db.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                data = row[0]
+                self._touched.add(key)
+        if data is not None:
+            self.hits += 1
+            return _deserialize(data)
+
+        self.misses += 1
+        nodes = text_to_textnodes(text)
+        self._pending[key] = _serialize(nodes)
+        return nodes
+
+    def flush(self, evict=False):
+        """
+        Writes buffered entries and access times, then evicts down to
+        ``max_bytes`` if the stored data may have grown past it, or if
+        ``evict`` is set.
+        """
+        now = time.time_ns()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, data, size, used) VALUES (?, ?, ?, ?)",
+                [(key, data, len(data), now) for key, data in self._pending.items()])
+            self._db.executemany("UPDATE entries SET used = ? WHERE key = ?",
+                                 [(now, key) for key in self._touched])
+            if self._pending or evict:
+                if self._size is None:
+                    self._size = self._stored_size()
+                else:
+                    # Replaced entries are counted twice until the next eviction
+                    self._size += sum(len(data) for data in self._pending.values())
+                if evict or self._size > self.max_bytes:
+                    self._evict()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _stored_size(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        total = self._size = self._stored_size()
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self._size = total
+
+    def close(self):
+        """Flushes the cache, evicts down to ``max_bytes`` and closes the database."""
+        self.flush(evict=True)
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
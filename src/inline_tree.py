@@ -0,0 +1,266 @@
+"""
+Parses inline markdown with nested emphasis into a tree of HTML nodes
+"""
+import unicodedata
+
+from htmlnode import LeafNode, ParentNode
+from md_helpers import _IMAGE_PATTERN, _INLINE_SPECIAL, _LINK_PATTERN
+from textnode import TextNode, TextType
+
+# Tag of an emphasis that used one or two delimiter characters
+_EMPHASIS_TAGS = {1: "i", 2: "b"}
+
+
+def _is_punctuation(char):
+    return unicodedata.category(char)[0] in "PS"
+
+
+class _Item:
+    # One entry of the doubly linked list of inline content. Exactly one of
+    # ``text`` (plain text), ``node`` (a finished HTMLNode) or ``delimiter``
+    # (a run of '*') is set.
+    __slots__ = ("text", "node", "delimiter", "prev", "next")
+
+    def __init__(self, text=None, node=None, delimiter=None):
+        self.text = text
+        self.node = node
+        self.delimiter = delimiter
+        self.prev = None
+        self.next = None
+
+
+class _Delimiter:
+    # A run of '*' on the delimiter stack. ``count`` is how many characters
+    # of the run are still unused, ``length`` how many it started with.
+    __slots__ = ("item", "count", "length", "can_open", "can_close", "prev", "next")
+
+    def __init__(self, item, length, can_open, can_close):
+        self.item = item
+        self.count = length
+        self.length = length
+        self.can_open = can_open
+        self.can_close = can_close
+        self.prev = None
+        self.next = None
+
+
+class _InlineList:
+    # Doubly linked list of _Items between two sentinels, so that the items
+    # between an opener and a closer can be cut out in constant time.
+    __slots__ = ("head", "tail")
+
+    def __init__(self):
+        self.head = _Item()
+        self.tail = _Item()
+        self.head.next = self.tail
+        self.tail.prev = self.head
+
+    def append(self, item):
+        last = self.tail.prev
+        item.prev, item.next = last, self.tail
+        last.next = self.tail.prev = item
+        return item
+
+    @staticmethod
+    def insert_after(anchor, item):
+        item.prev, item.next = anchor, anchor.next
+        anchor.next.prev = item
+        anchor.next = item
+        return item
+
+    @staticmethod
+    def unlink(item):
+        item.prev.next = item.next
+        item.next.prev = item.prev
+
+
+def _to_html_nodes(first, stop):
+    # Converts the items from ``first`` up to (not including) ``stop`` into
+    # HTMLNodes, merging neighbouring text and leftover delimiter characters
+    nodes = []
+    pending = []
+    item = first
+    while item is not stop:
+        if item.node is not None:
+            if pending:
+                nodes.append(LeafNode(None, "".join(pending)))
+                pending = []
+            nodes.append(item.node)
+        elif item.delimiter is not None:
+            pending.append("*" * item.delimiter.count)
+        else:
+            pending.append(item.text)
+        item = item.next
+    if pending:
+        nodes.append(LeafNode(None, "".join(pending)))
+    return nodes
+
+
+def _tokenize(text):
+    # Splits the text into an _InlineList of text, finished leaves (code,
+    # links, images) and delimiter runs, and returns it with the bottom of
+    # the delimiter stack
+    items = _InlineList()
+    first_delimiter = last_delimiter = None
+    text_start = 0
+    pos = 0
+    length = len(text)
+    search = _INLINE_SPECIAL.search
+
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        pos = match.start()
+        char = text[pos]
+
+        if char == "`":
+            end = text.find("`", pos + 1)
+            if end == -1:
+                # An unclosed backtick is text; no other backtick follows it
+                pos += 1
+                continue
+            item = _Item(node=LeafNode("code", text[pos + 1:end].strip()))
+            next_pos = end + 1
+        elif char == "*":
+            next_pos = pos + 1
+            while next_pos < length and text[next_pos] == "*":
+                next_pos += 1
+            before = text[pos - 1] if pos else " "
+            after = text[next_pos] if next_pos < length else " "
+            # CommonMark flanking rules: a run can open emphasis if it is not
+            # followed by whitespace (nor by punctuation unless it comes after
+            # whitespace or punctuation), and close it in the mirror case
+            left_flanking = not after.isspace() and (
+                not _is_punctuation(after) or before.isspace() or _is_punctuation(before))
+            right_flanking = not before.isspace() and (
+                not _is_punctuation(before) or after.isspace() or _is_punctuation(after))
+            item = _Item()
+            if left_flanking or right_flanking:
+                delimiter = _Delimiter(item, next_pos - pos, left_flanking, right_flanking)
+                item.delimiter = delimiter
+                if last_delimiter is None:
+                    first_delimiter = delimiter
+                else:
+                    last_delimiter.next = delimiter
+                    delimiter.prev = last_delimiter
+                last_delimiter = delimiter
+            else:
+                item.text = text[pos:next_pos]
+        else:
+            if char == "!":
+                link = _IMAGE_PATTERN.match(text, pos)
+                text_type = TextType.IMAGE
+            else:
+                link = _LINK_PATTERN.match(text, pos)
+                text_type = TextType.LINK
+            if link is None:
+                pos += 1
+                continue
+            item = _Item(node=TextNode(link.group(1), text_type, link.group(2))
+                         .text_node_to_html_node())
+            next_pos = link.end()
+
+        if text_start < pos:
+            items.append(_Item(text=text[text_start:pos]))
+        items.append(item)
+        pos = text_start = next_pos
+
+    if text_start < length:
+        items.append(_Item(text=text[text_start:]))
+    return items, first_delimiter
+
+
+def _remove_delimiter(delimiter):
+    if delimiter.prev is not None:
+        delimiter.prev.next = delimiter.next
+    if delimiter.next is not None:
+        delimiter.next.prev = delimiter.prev
+
+
+def _process_emphasis(first_delimiter):
+    # The "process emphasis" procedure of the CommonMark spec. Closers are
+    # visited left to right and each looks back for the nearest matching
+    # opener. ``openers_bottom`` remembers, per kind of closer, below which
+    # point a search already failed, so no part of the stack is searched
+    # twice for the same kind and the whole pass stays linear.
+    openers_bottom = {}
+    closer = first_delimiter
+
+    while closer is not None:
+        if not closer.can_close:
+            closer = closer.next
+            continue
+
+        kind = (closer.length % 3, closer.can_open)
+        bottom = openers_bottom.get(kind)
+        opener = closer.prev
+        while opener is not None and opener is not bottom:
+            # The "rule of 3": a run that can both open and close only
+            # matches another if their lengths do not add up to a multiple
+            # of three, unless both lengths are multiples of three
+            if opener.can_open and not (
+                    (opener.can_close or closer.can_open)
+                    and (opener.length + closer.length) % 3 == 0
+                    and (opener.length % 3 or closer.length % 3)):
+                break
+            opener = opener.prev
+        else:
+            openers_bottom[kind] = closer.prev
+            next_closer = closer.next
+            if not closer.can_open:
+                _remove_delimiter(closer)
+            closer = next_closer
+            continue
+
+        used = 2 if opener.count >= 2 and closer.count >= 2 else 1
+        opener.count -= used
+        closer.count -= used
+
+        # Everything between the two runs becomes the children of one
+        # emphasis node, and delimiters in between can no longer match
+        children = _to_html_nodes(opener.item.next, closer.item)
+        opener.item.next = closer.item
+        closer.item.prev = opener.item
+        _InlineList.insert_after(opener.item, _Item(node=ParentNode(_EMPHASIS_TAGS[used], children)))
+        opener.next = closer
+        closer.prev = opener
+
+        if opener.count == 0:
+            _InlineList.unlink(opener.item)
+            _remove_delimiter(opener)
+        if closer.count == 0:
+            _InlineList.unlink(closer.item)
+            next_closer = closer.next
+            _remove_delimiter(closer)
+            closer = next_closer
+
+
+def text_to_inline_nodes(text: str) -> list:
+    """
+    Parses the inline markdown of a paragraph into a tree of HTML nodes.
+
+    Unlike ``text_to_textnodes``, emphasis can nest and overlap, as in
+    ``**bold *italic* bold**`` or ``*italic **bold** italic*``, and may contain
+    links, images and code. Unmatched delimiters are kept as literal text
+    instead of raising. Emphasis is resolved with the delimiter stack
+    algorithm of the CommonMark spec, including its flanking rules and the
+    "rule of 3", in time linear in the length of the text; a paragraph of
+    thousands of unmatched ``*`` does not make it rescan.
+
+    Code spans are literal, as are unclosed backticks.
+
+    Args:
+        text: The markdown text of a single paragraph or line
+
+    Returns:
+        list[HTMLNode]: LeafNodes for text, code, links and images, and
+        ``<b>``/``<i>`` ParentNodes for emphasis
+
+    Example:
+        >>> text_to_inline_nodes("**bold *italic***")
+        [ParentNode(b, [LeafNode(None, bold , None), ParentNode(i, [LeafNode(None, italic, None)], None)], None)]
+    """
+    items, first_delimiter = _tokenize(text)
+    _process_emphasis(first_delimiter)
+    return _to_html_nodes(items.head.next, items.tail) or [LeafNode(None, "")]
@@ -0,0 +1,281 @@
+"""
+Defines the LinkGraph class: the internal links and images of every page,
+and the check for broken links and orphan pages built on it.
+
+Links are resolved against the directory of their page into site-absolute
+paths (``img.png`` on ``blog/post.md`` becomes ``/blog/img.png``), and every
+distinct path is interned once. A page's edges are an ``array`` of path
+ids, so the graph of a large site costs a few bytes per link. The graph is
+kept in ``<output_dir>/.links.json`` so that an incremental build only
+recomputes the edges of the pages it renders::
+
+    {
+        "version": 1,
+        "urls": ["/blog/post.html", "/images/logo.png"],
+        "pages": {
+            "index.md": [0, 1]
+        }
+    }
+
+Keys of ``pages`` are source paths relative to the content directory; their
+values index into ``urls``.
+"""
+from array import array
+import json
+import os
+import posixpath
+import time
+
+from blocks import BlockType, iter_blocks
+from md_helpers import extract_markdown_links_and_images
+
+LINK_GRAPH_NAME = ".links.json"
+
+
+def internal_path(url, page_dir=""):
+    """
+    Resolves a link on a page in ``page_dir`` into a site-absolute path.
+
+    The query and fragment are dropped. A trailing ``/`` is kept, since
+    ``/blog/`` means the index page of the directory.
+
+    Returns:
+        str | None: The path, or None for external URLs (with a scheme or
+        a host), same-page fragments and other non-file URLs
+    """
+    # A colon before the first slash is a scheme: http:, mailto:, data:, ...
+    if not url or url.startswith(("#", "//")) or ":" in url.split("/", 1)[0]:
+        return None
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    path = url[:end]
+    if not path:
+        return None
+    resolved = posixpath.normpath(posixpath.join("/", page_dir, path))
+    if path.endswith("/") and resolved != "/":
+        resolved += "/"
+    return resolved
+
+
+def collect_links(node, urls):
+    """
+    Appends the ``href`` and ``src`` props in an HTML node tree to ``urls``.
+
+    Returns:
+        HTMLNode: ``node``, so it can be used as a block transform
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        props = current.props
+        if props:
+            for name in ("href", "src"):
+                url = props.get(name)
+                if url is not None:
+                    urls.append(url)
+        if current.children:
+            stack.extend(reversed(current.children))
+    return node
+
+
+def scan_links(lines):
+    """
+    Returns the URLs of the links and images in markdown ``lines`` without
+    rendering them, skipping code blocks.
+
+    This is for pages a build does not render but the graph has no edges
+    for; unlike ``collect_links`` it also picks up link syntax inside inline
+    code.
+    """
+    urls = []
+    for block in iter_blocks(lines):
+        if block.block_type is not BlockType.CODE:
+            text = " ".join(block.lines)
+            urls.extend(link.url for link in extract_markdown_links_and_images(text))
+    return urls
+
+
+class LinkReport:
+    """
+    The result of checking a LinkGraph.
+
+    Attributes:
+        broken: ``(page, path)`` pairs of internal links whose target is
+            neither a page nor a file of the output, sorted
+        orphans: Pages no other page links to, besides the site index, sorted
+        pages: Number of pages checked
+        links: Number of internal links checked, counting each target once per page
+        seconds: Time the check took
+    """
+    __slots__ = ("broken", "orphans", "pages", "links", "seconds")
+
+    def __init__(self, broken, orphans, pages, links, seconds=0.0):
+        self.broken = broken
+        self.orphans = orphans
+        self.pages = pages
+        self.links = links
+        self.seconds = seconds
+
+    def problems(self, count=20):
+        """Formats up to ``count`` broken links and orphans as text, one per line."""
+        lines = [f"  broken link on {page}: {path}" for page, path in self.broken[:count]]
+        if len(self.broken) > count:
+            lines.append(f"  ... and {len(self.broken) - count} more broken links")
+        lines += [f"  orphan page: {page}" for page in self.orphans[:count]]
+        if len(self.orphans) > count:
+            lines.append(f"  ... and {len(self.orphans) - count} more orphan pages")
+        return "\n".join(lines)
+
+    def details(self, count=20):
+        """Formats the counts and up to ``count`` broken links and orphans as text."""
+        counts = (f"Checked {self.links} links on {self.pages} pages in "
+                  f"{self.seconds * 1000:.1f}ms: {len(self.broken)} broken, "
+                  f"{len(self.orphans)} orphan pages")
+        problems = self.problems(count)
+        return f"{counts}\n{problems}" if problems else counts
+
+    def __str__(self):
+        return self.details()
+
+
+class LinkGraph:
+    """
+    Maps each page to the internal paths it links to.
+
+    Attributes:
+        urls: Interned site-absolute paths; a path's index is its id
+        pages: Dictionary of source path to an ``array("I")`` of path ids
+    """
+    VERSION = 1
+
+    def __init__(self):
+        self.urls = []
+        self.pages = {}
+        self._ids = {}
+
+    def _intern(self, path):
+        path_id = self._ids.get(path)
+        if path_id is None:
+            path_id = self._ids[path] = len(self.urls)
+            self.urls.append(path)
+        return path_id
+
+    def set_page(self, page, urls):
+        """
+        Replaces the edges of ``page`` with its links ``urls``, as written
+        in the page; external URLs are left out and duplicates kept once.
+        """
+        page_dir = posixpath.dirname(page)
+        ids = {}
+        for url in urls:
+            path = internal_path(url, page_dir)
+            if path is not None:
+                ids[self._intern(path)] = None
+        self.pages[page] = array("I", ids)
+
+    def remove_page(self, page):
+        """Drops the edges of a page whose source is gone."""
+        self.pages.pop(page, None)
+
+    def links(self, page):
+        """Returns the paths ``page`` links to."""
+        urls = self.urls
+        return [urls[path_id] for path_id in self.pages.get(page, ())]
+
+    def check(self, outputs, files=()):
+        """
+        Resolves every link against the output of the site.
+
+        A link is fine if it names an output page or one of ``files``; a
+        directory path (``/blog/`` or ``/blog``) is fine if the directory has
+        an ``index.html`` page.
+
+        Args:
+            outputs: Dictionary of source path to output path, both relative
+                with ``/`` separators, for every page of the site
+            files: Other site-absolute paths that exist, such as assets
+
+        Returns:
+            LinkReport: The broken links and orphan pages
+        """
+        start = time.perf_counter()
+        targets = {f"/{output}" for output in outputs.values()}
+        targets.update(files)
+        # Resolve each distinct path once; edges only look up the result
+        resolved = []
+        for path in self.urls:
+            if path in targets:
+                resolved.append(path)
+                continue
+            index = f"{path.rstrip('/')}/index.html"
+            resolved.append(index if index in targets else None)
+
+        broken = []
+        linked = set()
+        links = 0
+        for page, ids in self.pages.items():
+            if page not in outputs:
+                continue
+            own = f"/{outputs[page]}"
+            links += len(ids)
+            for path_id in ids:
+                target = resolved[path_id]
+                if target is None:
+                    broken.append((page, self.urls[path_id]))
+                elif target != own:
+                    linked.add(target)
+        orphans = [page for page, output in outputs.items()
+                   if output != "index.html" and f"/{output}" not in linked]
+        return LinkReport(sorted(broken), sorted(orphans), len(outputs), links,
+                          time.perf_counter() - start)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a graph from ``path``. A missing, unreadable or outdated file
+        gives an empty graph.
+        """
+        graph = cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return graph
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return graph
+        try:
+            urls = data["urls"]
+            ids = {url: path_id for path_id, url in enumerate(urls)}
+            pages = {page: array("I", path_ids) for page, path_ids in data["pages"].items()}
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError):
+            # Damaged: the right version but not the right shape
+            return graph
+        graph.urls, graph._ids, graph.pages = urls, ids, pages
+        return graph
+
+    def save(self, path):
+        """
+        Writes the graph to ``path`` through a temporary file and a rename,
+        leaving out paths no page links to any more.
+        """
+        urls = []
+        ids = {}
+        pages = {}
+        for page, edges in self.pages.items():
+            remapped = []
+            for path_id in edges:
+                new_id = ids.get(path_id)
+                if new_id is None:
+                    new_id = ids[path_id] = len(urls)
+                    urls.append(self.urls[path_id])
+                remapped.append(new_id)
+            pages[page] = remapped
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "urls": urls, "pages": pages}, f,
+                      separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, path)
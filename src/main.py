@@ -1,18 +1,106 @@
 '''
-This is the main file for the project. No logic so far, just a print statement.
+This is the main file for the project: the command line entry point.
 '''
-from textnode import TextType, TextNode
+import argparse
+import sys
 
+from build import BuildOptions, build_site
+from profiling import run_cprofile
+from serve import serve
 
-def main():
+
+def main(argv=None):
     '''
         Main function for the project
     '''
-    dummy_node = TextNode('Here is the text string.', TextType.ITALIC,
-                         'http://www.mallardmariner.com')
-    tod_node = TextNode('Here is the text string.', TextType.ITALIC,
-                       'http://www.mallardmariner.com')
-    print(f'{dummy_node} \n{tod_node}')
-    print(tod_node == dummy_node)
-
-main()
+    parser = argparse.ArgumentParser(description="Static site generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="render the markdown content into HTML pages")
+    build.add_argument("--content", default="content", help="markdown source directory")
+    build.add_argument("--output", default="public", help="HTML output directory")
+    build.add_argument("--static", default="static",
+                       help="static asset directory, published with fingerprinted names")
+    build.add_argument("--template", metavar="PATH", default=None,
+                       help="layout to wrap every page in, with {{ title }}, {{ nav }} "
+                            "and {{ content }} slots")
+    build.add_argument("--workers", type=int, default=None,
+                       help="worker processes (default: one per CPU core)")
+    build.add_argument("--full", action="store_true",
+                       help="render every page, including unchanged ones")
+    build.add_argument("--inline-cache", metavar="PATH", default=None,
+                       help="cache parsed paragraphs in this database across builds")
+    build.add_argument("--inline-cache-mb", type=int, default=64,
+                       help="size cap of the inline cache in megabytes (default: 64)")
+    build.add_argument("--writer-threads", type=int, default=4,
+                       help="threads writing output files (default: 4)")
+    build.add_argument("--no-fsync", dest="fsync", action="store_false",
+                       help="do not sync written pages to disk, e.g. for local iteration "
+                            "or builds into a tmpfs")
+    build.add_argument("--no-check-links", dest="check_links", action="store_false",
+                       help="skip collecting the link graph and checking for broken links "
+                            "and orphan pages")
+    build.add_argument("--profile", metavar="PATH", default=None,
+                       help="time every build and page stage, write a JSON report to PATH "
+                            "and print the slowest pages")
+    build.add_argument("--profile-top", type=int, default=10,
+                       help="number of slowest pages to report (default: 10)")
+    build.add_argument("--cprofile", metavar="PATH", default=None,
+                       help="run the build in this process under cProfile and write the "
+                            "stats to PATH; with --workers 1 it also suits sampling "
+                            "profilers such as py-spy")
+
+    serve_command = commands.add_parser("serve", help="build the site and serve it over HTTP")
+    serve_command.add_argument("--content", default="content", help="markdown source directory")
+    serve_command.add_argument("--output", default="public", help="HTML output directory")
+    serve_command.add_argument("--static", default="static",
+                               help="static asset directory, published with fingerprinted names")
+    serve_command.add_argument("--template", metavar="PATH", default=None,
+                               help="layout to wrap every page in")
+    serve_command.add_argument("--port", type=int, default=8000, help="port to listen on")
+    serve_command.add_argument("--watch", action="store_true",
+                               help="re-render pages as their sources change")
+    serve_command.add_argument("--interval", type=float, default=0.05,
+                               help="seconds between checks for changes (default: 0.05)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        options = BuildOptions(args.workers, args.full, args.inline_cache,
+                               args.inline_cache_mb * 1024 * 1024, args.writer_threads,
+                               args.fsync, args.static, args.profile is not None, args.template,
+                               check_links=args.check_links)
+        try:
+            if args.cprofile:
+                # Worker processes would not be profiled, so render in this one
+                options.workers = 1
+                summary, report = run_cprofile(args.cprofile, build_site, args.content,
+                                               args.output, options)
+                print(report)
+            else:
+                summary = build_site(args.content, args.output, options)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(summary)
+        if summary.links is not None and (summary.links.broken or summary.links.orphans):
+            # The summary already has the counts
+            print(summary.links.problems())
+        if summary.profile is not None:
+            summary.profile.save(args.profile, args.profile_top)
+            print(summary.profile.table(args.profile_top))
+        if summary.errors:
+            print("\n".join(summary.errors), file=sys.stderr)
+            return 1
+    elif args.command == "serve":
+        try:
+            serve(args.content, args.output, args.port, args.watch, args.interval,
+                  static_dir=args.static, template=args.template)
+        except FileNotFoundError as e:
+            print(e, file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Defines the Manifest class that records what each build produced.
+
+The manifest lets a build skip pages whose inputs have not changed and remove
+pages whose source was deleted. It is stored as JSON, by default in
+``<output_dir>/.manifest.json`` so that wiping the output directory also
+forces a full rebuild. The format is::
+
+    {
+        "version": 1,
+        "pages": {
+            "blog/post.md": {
+                "hash": "<sha256 hex digest of the markdown source>",
+                "size": 1234,
+                "mtime_ns": 1700000000000000000,
+                "template_hash": "<sha256 hex digest of the rendering inputs>",
+                "output": "blog/post.html"
+            }
+        }
+    }
+
+Keys of ``pages`` are source paths relative to the content directory and
+``output`` is relative to the output directory, both with ``/`` separators.
+``size`` and ``mtime_ns`` come from ``os.stat`` of the source and are only a
+fast path: when they match, the source is not read again; when they differ,
+the content hash decides. ``template_hash`` covers everything besides the
+source that affects the output; a page is re-rendered when it changes. A
+manifest with a different ``version`` is ignored, which means a full rebuild.
+"""
+import hashlib
+import json
+import os
+
+
+def hash_bytes(data):
+    """Returns the hex SHA-256 digest of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    """Returns the hex SHA-256 digest of the contents of the file at ``path``."""
+    with open(path, "rb") as f:
+        return hash_bytes(f.read())
+
+
+class Manifest:
+    """
+    Maps each source page to the hashes of its inputs and the output it produced.
+
+    Attributes:
+        pages: Dictionary of source path to entry, in the format described in
+            the module docstring
+    """
+    VERSION = 1
+
+    def __init__(self, pages=None):
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a manifest from ``path``. A missing, unreadable or outdated
+        manifest gives an empty one.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return cls()
+        return cls(data.get("pages", {}))
+
+    def save(self, path):
+        """Writes the manifest to ``path`` through a temporary file and a rename."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "pages": self.pages}, f,
+                      indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, page, stat, template_hash):
+        """
+        Checks whether ``page`` is unchanged using only its ``os.stat`` result.
+
+        Returns:
+            bool: True if size, mtime and template hash all match the entry
+        """
+        entry = self.pages.get(page)
+        return entry is not None and \
+            entry["size"] == stat.st_size and \
+            entry["mtime_ns"] == stat.st_mtime_ns and \
+            entry["template_hash"] == template_hash
+
+    def record(self, page, stat, content_hash, template_hash, output):
+        """Stores the entry for ``page`` after it was rendered or verified."""
+        self.pages[page] = {
+            "hash": content_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "template_hash": template_hash,
+            "output": output,
+        }
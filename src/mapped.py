@@ -0,0 +1,121 @@
+"""
+Memory-mapped markdown input for very large sources.
+
+A mapped file is scanned as bytes and decoded one window of whole lines at a
+time, cut at a block boundary (a blank line) where there is one, so the text
+of a source never exists as a single ``str``. Together with the streaming
+``iter_blocks`` and ``write_markdown_html`` only the current window and the
+current block are held in memory.
+
+Pages of the mapping that were read are dropped from the process again with
+``madvise(MADV_DONTNEED)`` where the platform has it. They stay in the page
+cache, but do not pile up in the resident set of the process as the scan
+moves through the file.
+"""
+from contextlib import contextmanager
+import hashlib
+import mmap
+import re
+
+from template import extract_title
+
+# Bytes decoded at a time; a window grows past this only for a longer line
+WINDOW_SIZE = 1024 * 1024
+
+_TITLE_LINE = re.compile(rb"^[ \t]*# [^\n]*", re.MULTILINE)
+_DONTNEED = getattr(mmap, "MADV_DONTNEED", None)
+_SEQUENTIAL = getattr(mmap, "MADV_SEQUENTIAL", None)
+
+
+@contextmanager
+def map_file(path):
+    """
+    Maps the file at ``path`` read-only for the duration of a ``with`` block.
+
+    Yields:
+        mmap.mmap | bytes: The contents of the file; empty files, which cannot
+        be mapped, yield ``b""``
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            yield b""
+            return
+        try:
+            if _SEQUENTIAL is not None:
+                data.madvise(_SEQUENTIAL)
+            yield data
+        finally:
+            data.close()
+
+
+def _release(data, start, end):
+    # Unmaps the pages of data[start:end] from the process; reading them
+    # again faults them back in from the page cache
+    if _DONTNEED is None or not isinstance(data, mmap.mmap):
+        return
+    start -= start % mmap.PAGESIZE
+    if end > start:
+        data.madvise(_DONTNEED, start, end - start)
+
+
+def hash_mapped(data, window_size=WINDOW_SIZE):
+    """Returns the hex SHA-256 digest of mapped ``data``, hashed one window at a time."""
+    hasher = hashlib.sha256()
+    size = len(data)
+    with memoryview(data) as view:
+        for start in range(0, size, window_size):
+            end = min(start + window_size, size)
+            with view[start:end] as window:
+                hasher.update(window)
+            _release(data, start, end)
+    return hasher.hexdigest()
+
+
+def iter_mapped_lines(data, window_size=WINDOW_SIZE):
+    """
+    Yields the lines of UTF-8 ``data`` (bytes, mmap or any buffer with
+    ``find`` and ``rfind``) without their line endings, decoding one window of
+    about ``window_size`` bytes at a time.
+
+    The lines are the same as those of iterating over the file, so the output
+    of ``iter_blocks`` does not change. Windows end at the last blank line
+    inside them, or else at the last line ending.
+
+    Raises:
+        UnicodeDecodeError: If the data is not valid UTF-8
+    """
+    size = len(data)
+    start = 0
+    while start < size:
+        end = start + window_size
+        if end >= size:
+            end = size
+        else:
+            cut = data.rfind(b"\n\n", start, end)
+            if cut != -1:
+                end = cut + 2
+            else:
+                cut = data.rfind(b"\n", start, end)
+                if cut == -1:
+                    cut = data.find(b"\n", end)
+                end = size if cut == -1 else cut + 1
+        text = data[start:end].decode("utf-8")
+        _release(data, start, end)
+        start = end
+        if text.endswith("\n"):
+            text = text[:-1]
+        yield from text.split("\n")
+
+
+def mapped_title(data):
+    """
+    Returns what ``template.extract_title`` returns for the lines of
+    ``data``, found by a scan over the bytes.
+    """
+    match = _TITLE_LINE.search(data)
+    _release(data, 0, len(data) if match is None else match.end())
+    if match is None:
+        return None
+    return extract_title([match.group().decode("utf-8")])
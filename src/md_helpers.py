@@ -1,10 +1,35 @@
 """
 Helper functions to convert markdown to html
 """
-from textnode import TextType, TextNode
+from typing import NamedTuple
+from textnode import TextType, TextNode, TextSpan
 import re
 
 
+# Bump whenever a change to the inline parser changes its output, so that
+# cached parse results (see inline_cache) from older versions are not reused.
+PARSER_VERSION = "1"
+
+# Characters that can start an inline construct. Everything between two of
+# them is plain text and is skipped over in a single regex search.
+_INLINE_SPECIAL = re.compile(r"[*`!\[]")
+_IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# Images and links in one pattern; group 1 is '!' for an image and '[' for a link.
+# Starting on a character class rather than an optional '!' lets the regex
+# engine skip quickly to candidate positions.
+_LINK_OR_IMAGE_PATTERN = re.compile(r"([!\[])(?:(?<=!)\[|(?<=\[))([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
+class MarkdownLink(NamedTuple):
+    """A link or image found in markdown text, with its position in that text."""
+    text_type: TextType
+    text: str
+    url: str
+    start: int
+    end: int
+
+
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type: TextType) -> list[TextNode]:
     """
     Takes a list of nodes, a delimiter, and a text type. Returns a new list of TextNodes where the text within the
@@ -79,33 +104,34 @@ def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type:
     return new_nodes
 
 
-def extract_markdown_images(text):
+def extract_markdown_images(text, strict=True):
     """
     Extract alt texts and URLs from Markdown image syntax in the given text.
 
     Args:
         text (str): The input text containing Markdown image syntax.
+        strict (bool): Raise when nothing is found. Pass False to get an empty list instead.
 
     Returns:
         list[tuple[str, str]]: A list of tuples, each containing the alt text and the URL.
 
     Raises:
-        ValueError: If no Markdown image patterns are found in the text.
+        ValueError: If strict and no Markdown image patterns are found in the text.
     """
-    regex_pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(regex_pattern, text)
+    matches = _IMAGE_PATTERN.findall(text)
 
-    if not matches:
+    if not matches and strict:
         raise ValueError(f'Text does not contain a valid Markdown image pattern: {text}')
 
     return matches
 
-def extract_markdown_links(text):
+def extract_markdown_links(text, strict=True):
     """
     Extracts all Markdown links from the given text.
 
     Args:
         text (str): The input string containing Markdown content.
+        strict (bool): Raise when nothing is found. Pass False to get an empty list instead.
 
     Returns:
         list[tuple[str, str]]: A list of tuples, where each tuple contains:
@@ -113,12 +139,228 @@ def extract_markdown_links(text):
                                - The URL (from ( ... ))
 
     Raises:
-        ValueError: If no Markdown link patterns are found in the text.
+        ValueError: If strict and no Markdown link patterns are found in the text.
     """
-    regex_pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(regex_pattern, text)
+    matches = _LINK_PATTERN.findall(text)
 
-    if not matches:
+    if not matches and strict:
         raise ValueError(f'Text does not contain a valid Markdown link pattern: {text}')
 
-    return matches
\ No newline at end of file
+    return matches
+
+
+def extract_markdown_links_and_images(text):
+    """
+    Finds every Markdown image and link in the given text in a single pass.
+
+    Unlike ``extract_markdown_images`` and ``extract_markdown_links`` this never
+    raises; text without any links simply gives an empty list.
+
+    Args:
+        text (str): The input string containing Markdown content.
+
+    Returns:
+        list[MarkdownLink]: The images (TextType.IMAGE) and links (TextType.LINK)
+                            in order, with their start and end offsets in the text.
+
+    Example:
+        >>> extract_markdown_links_and_images("![cat](cat.png) and [dog](dog.html)")
+        [
+            MarkdownLink(TextType.IMAGE, "cat", "cat.png", 0, 15),
+            MarkdownLink(TextType.LINK, "dog", "dog.html", 20, 35)
+        ]
+    """
+    links = []
+    for match in _LINK_OR_IMAGE_PATTERN.finditer(text):
+        opener, link_text, url = match.groups()
+        start, end = match.span()
+        # tuple.__new__ skips the slower generated NamedTuple constructor
+        links.append(tuple.__new__(MarkdownLink, (TextType.IMAGE if opener == "!" else TextType.LINK,
+                                                  link_text, url, start, end)))
+    return links
+
+
+def split_nodes_links_and_images(old_nodes: list[TextNode],
+                                 text_types=(TextType.IMAGE, TextType.LINK)) -> list[TextNode]:
+    """
+    Splits the images and/or links out of every TEXT node in a list of nodes.
+
+    Each TEXT node is scanned once with ``extract_markdown_links_and_images``;
+    nodes without a match are passed through without being copied.
+
+    Args:
+        old_nodes: List of TextNode objects to process
+        text_types: Which of TextType.IMAGE and TextType.LINK to split out
+
+    Returns:
+        list[TextNode]: New list of TextNode objects with the links and images split out
+    """
+    new_nodes = []
+
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+
+        text = node.text
+        current_pos = 0
+        for link in extract_markdown_links_and_images(text):
+            if link.text_type not in text_types:
+                continue
+            if current_pos < link.start:
+                new_nodes.append(TextNode(text[current_pos:link.start], TextType.TEXT))
+            new_nodes.append(TextNode(link.text, link.text_type, link.url))
+            current_pos = link.end
+
+        if current_pos == 0:
+            new_nodes.append(node)
+        elif current_pos < len(text):
+            new_nodes.append(TextNode(text[current_pos:], TextType.TEXT))
+
+    return new_nodes
+
+
+def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+    """Splits the Markdown images out of every TEXT node in a list of nodes."""
+    return split_nodes_links_and_images(old_nodes, (TextType.IMAGE,))
+
+
+def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    """Splits the Markdown links out of every TEXT node in a list of nodes."""
+    return split_nodes_links_and_images(old_nodes, (TextType.LINK,))
+
+
+def _stripped_node(text, start, end, text_type, spans):
+    # The node for text[start:end].strip(), as a TextSpan over text with
+    # the offsets moved past the whitespace, or as a TextNode with a copy
+    if not spans:
+        return TextNode(text[start:end].strip(), text_type)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return TextSpan(text, start, end, text_type)
+
+
+def text_to_textnodes(text: str, spans: bool = False) -> list[TextNode]:
+    """
+    Tokenizes a markdown string into its inline TextNodes in a single scan.
+
+    This is the one-pass equivalent of chaining ``split_nodes_delimiter`` for
+    ``**``, ``*`` and ``` ` ``` and then pulling out images and links. The scanner
+    jumps from one special character to the next and decides what to emit
+    at each stop, so the text is walked once no matter how many inline types
+    there are, and only the final nodes are allocated.
+
+    Code spans are literal: delimiters inside backticks are not interpreted.
+    Bold wins over italic, so ``**`` is never read as two italic delimiters.
+
+    With ``spans`` the nodes are TextSpans over ``text`` instead of TextNodes
+    holding copies of their text; they compare equal to the copying result.
+
+    Args:
+        text: The markdown text of a single paragraph or line
+        spans: Return TextSpans that reference ``text`` rather than slice it
+
+    Returns:
+        list[TextNode]: The TEXT, BOLD, ITALIC, CODE, LINK and IMAGE nodes in order
+
+    Raises:
+        ValueError: If a ``**``, ``*`` or ``` ` ``` delimiter is not closed
+
+    Example:
+        >>> text_to_textnodes("A **bold** [link](https://boot.dev)")
+        [
+            TextNode("A ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode(" ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "https://boot.dev")
+        ]
+    """
+    nodes = []
+    text_start = 0
+    pos = 0
+    search = _INLINE_SPECIAL.search
+
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        pos = match.start()
+        char = text[pos]
+
+        if char == "`":
+            end = text.find("`", pos + 1)
+            if end == -1:
+                raise ValueError(f"Node contains an odd number of '`' delimiters: {text}")
+            node = _stripped_node(text, pos + 1, end, TextType.CODE, spans)
+            next_pos = end + 1
+        elif char == "*" and text.startswith("**", pos):
+            end = text.find("**", pos + 2)
+            if end == -1:
+                raise ValueError(f"Node contains an odd number of '**' delimiters: {text}")
+            node = _stripped_node(text, pos + 2, end, TextType.BOLD, spans)
+            next_pos = end + 2
+        elif char == "*":
+            end = text.find("*", pos + 1)
+            if end == -1 or text.startswith("**", end):
+                raise ValueError(f"Node contains an odd number of '*' delimiters: {text}")
+            node = _stripped_node(text, pos + 1, end, TextType.ITALIC, spans)
+            next_pos = end + 1
+        else:
+            if char == "!":
+                link = _IMAGE_PATTERN.match(text, pos)
+                text_type = TextType.IMAGE
+            else:
+                link = _LINK_PATTERN.match(text, pos)
+                text_type = TextType.LINK
+            if link is None:
+                # A lone '!' or '[' is just text
+                pos += 1
+                continue
+            if spans:
+                node = TextSpan(text, link.start(1), link.end(1), text_type, link.group(2))
+            else:
+                node = TextNode(link.group(1), text_type, link.group(2))
+            next_pos = link.end()
+
+        if text_start < pos:
+            nodes.append(TextSpan(text, text_start, pos, TextType.TEXT) if spans
+                         else TextNode(text[text_start:pos], TextType.TEXT))
+        nodes.append(node)
+        pos = text_start = next_pos
+
+    if text_start < len(text) or not nodes:
+        nodes.append(TextSpan(text, text_start, len(text), TextType.TEXT) if spans
+                     else TextNode(text[text_start:], TextType.TEXT))
+
+    return nodes
+
+
+def split_nodes_inline(old_nodes: list[TextNode]) -> list[TextNode]:
+    """
+    Runs ``text_to_textnodes`` over every TEXT node in a list of nodes.
+
+    Non-TEXT nodes are passed through unchanged, and TEXT nodes without any
+    inline markup are reused instead of being copied, matching the behaviour
+    of ``split_nodes_delimiter``.
+
+    Args:
+        old_nodes: List of TextNode objects to process
+
+    Returns:
+        list[TextNode]: New list of TextNode objects with all inline markup split out
+
+    Raises:
+        ValueError: If a node contains an unclosed delimiter
+    """
+    new_nodes = []
+    search = _INLINE_SPECIAL.search
+
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT or search(node.text) is None:
+            new_nodes.append(node)
+            continue
+        new_nodes.extend(text_to_textnodes(node.text))
+
+    return new_nodes
@@ -0,0 +1,178 @@
+"""
+Build profiling: per-stage timings, node and byte counts per page, and an
+opt-in cProfile mode.
+
+A profiled build renders each page through the same ``PageRenderer`` as any
+other build, with a PageProfile as its timing hook: the renderer tells the
+profile each time a stage of the page ends, and a build without profiling
+skips those calls.
+
+The page stages are:
+
+- ``read``: reading, hashing and decoding the source, and reading the files
+  it includes
+- ``blocks``: splitting the lines into blocks
+- ``inline``: the inline parser (``text_to_textnodes``), which does the work
+  of the ``split_nodes_delimiter`` passes and the link and image extraction
+  in one scan
+- ``convert``: turning TextNodes into HTML nodes and building block nodes,
+  including the nested-emphasis parser where it is needed
+- ``transform``: collecting links and rewriting asset URLs
+- ``render``: writing the HTML of the node trees, and of the page layout
+- ``encode``: encoding the page to UTF-8
+"""
+import cProfile
+import io
+import json
+import pstats
+import time
+
+PAGE_STAGES = ("read", "blocks", "inline", "convert", "transform", "render", "encode")
+
+
+class PageProfile:
+    """
+    Timings and counts of rendering one page.
+
+    The renderer calls ``start`` before the page, ``lap`` at the end of
+    every stage and ``finish`` after it; each lap adds the time since the
+    previous one to its stage, so the stages add up to the whole page.
+
+    Attributes:
+        page: Source path of the page relative to the content directory
+        seconds: Total time spent on the page
+        stages: Dictionary of stage name (see ``PAGE_STAGES``) to seconds
+        blocks: Number of markdown blocks
+        nodes: Number of HTML nodes built
+        bytes: Size of the encoded HTML
+    """
+    __slots__ = ("page", "seconds", "stages", "blocks", "nodes", "bytes", "_start", "_last")
+
+    def __init__(self, page=None):
+        self.page = page
+        self.seconds = 0.0
+        self.stages = dict.fromkeys(PAGE_STAGES, 0.0)
+        self.blocks = 0
+        self.nodes = 0
+        self.bytes = 0
+        self._start = self._last = 0.0
+
+    def start(self):
+        """Starts the clock of the page."""
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """Adds the time since the previous lap to ``stage``."""
+        now = time.perf_counter()
+        self.stages[stage] += now - self._last
+        self._last = now
+
+    def timed_parser(self, text_to_nodes):
+        """
+        Wraps an inline parser so that its calls count as ``inline`` and the
+        time before each call as ``convert``.
+        """
+        def parse(text):
+            self.lap("convert")
+            try:
+                return text_to_nodes(text)
+            finally:
+                self.lap("inline")
+        return parse
+
+    def count(self, node):
+        """Counts the HTML nodes of one block."""
+        self.blocks += 1
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self.nodes += 1
+            if current.children:
+                stack.extend(current.children)
+
+    def finish(self, size):
+        """Stops the clock of the page, which produced ``size`` bytes."""
+        self.bytes = size
+        self.seconds = time.perf_counter() - self._start
+
+    def to_dict(self):
+        return {"page": self.page, "seconds": self.seconds, "stages": self.stages,
+                "blocks": self.blocks, "nodes": self.nodes, "bytes": self.bytes}
+
+
+class BuildProfile:
+    """
+    Collects the PageProfiles of a build and the time of its own stages.
+
+    Attributes:
+        stages: Dictionary of build stage name to seconds: ``assets``,
+            ``discover`` (finding pages and checking the manifest),
+            ``render`` (rendering and queueing every page, wall clock),
+            ``write`` (time the writer threads spent, summed), ``finish``
+            (waiting for the writer and saving the manifest) and ``links``
+            (checking and saving the link graph)
+        pages: The PageProfile of every rendered page
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.pages = []
+
+    def page_stages(self):
+        """Returns the time of every page stage summed over all pages."""
+        totals = dict.fromkeys(PAGE_STAGES, 0.0)
+        for profile in self.pages:
+            for stage, seconds in profile.stages.items():
+                totals[stage] += seconds
+        return totals
+
+    def slowest(self, count=10):
+        """Returns the ``count`` slowest PageProfiles, slowest first."""
+        return sorted(self.pages, key=lambda profile: profile.seconds, reverse=True)[:count]
+
+    def to_dict(self, count=10):
+        return {
+            "build_stages": self.stages,
+            "page_stages": self.page_stages(),
+            "totals": {
+                "pages": len(self.pages),
+                "blocks": sum(profile.blocks for profile in self.pages),
+                "nodes": sum(profile.nodes for profile in self.pages),
+                "bytes": sum(profile.bytes for profile in self.pages),
+            },
+            "slowest": [profile.page for profile in self.slowest(count)],
+            "pages": [profile.to_dict() for profile in self.pages],
+        }
+
+    def save(self, path, count=10):
+        """Writes the report as JSON to ``path``."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(count), f, indent=1)
+
+    def table(self, count=10):
+        """Formats the stage totals and the ``count`` slowest pages as text."""
+        lines = ["Build stages:"]
+        lines += [f"  {stage:<10} {seconds * 1000:10.1f}ms" for stage, seconds in self.stages.items()]
+        lines.append("Page stages (summed over pages):")
+        lines += [f"  {stage:<10} {seconds * 1000:10.1f}ms"
+                  for stage, seconds in self.page_stages().items()]
+        lines.append(f"Slowest {count} pages:")
+        lines.append(f"  {'ms':>8} {'blocks':>7} {'nodes':>7} {'bytes':>8}  page")
+        for profile in self.slowest(count):
+            lines.append(f"  {profile.seconds * 1000:8.2f} {profile.blocks:7} {profile.nodes:7} "
+                         f"{profile.bytes:8}  {profile.page}")
+        return "\n".join(lines)
+
+
+def run_cprofile(path, func, *args, **kwargs):
+    """
+    Calls ``func`` under cProfile, writes the stats to ``path`` (readable
+    with ``pstats`` or snakeviz) and returns the result of the call along
+    with the 25 most expensive functions by cumulative time, as text.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    profiler.dump_stats(path)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(25)
+    return result, report.getvalue()
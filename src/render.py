@@ -0,0 +1,295 @@
+"""
+Renders single markdown pages into HTML: the page pipeline shared by the
+build, the development server and build profiling
+"""
+from functools import partial
+import hashlib
+import io
+import os
+import posixpath
+
+from assets import asset_path, asset_url, rewrite_asset_urls
+from blocks import block_to_html_node, iter_blocks
+from includes import expand_includes
+from linkgraph import collect_links
+from mapped import hash_mapped, iter_mapped_lines, map_file, mapped_title
+from manifest import hash_bytes
+from md_helpers import text_to_textnodes
+from template import extract_title, page_values
+
+
+class PageResult:
+    """
+    What rendering one page reports back to the build.
+
+    Attributes:
+        size: Size of the HTML in bytes
+        content_hash: Hex SHA-256 digest of the markdown source
+        cache_hits, cache_misses: Inline cache lookups made for the page
+        html: The encoded HTML, until it is handed to the writer
+        profile: The PageProfile of the page in a profiled build
+        path: Temporary file holding the HTML of a page rendered straight
+            to disk instead of into ``html``
+        links: The ``href`` and ``src`` URLs of the page as written, when
+            links are collected
+        inputs: Paths of the files the page read besides its source: the
+            layout and its partials, and the files it included; and the
+            static files its URLs point at, which may not exist
+        error: Why the page could not be rendered, in which case the other
+            attributes are not set
+    """
+    __slots__ = ("size", "content_hash", "cache_hits", "cache_misses", "html", "profile",
+                 "path", "links", "inputs", "error")
+
+    def __init__(self, size, content_hash, cache_hits=0, cache_misses=0, html=None,
+                 profile=None, path=None, error=None):
+        self.size = size
+        self.content_hash = content_hash
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.html = html
+        self.profile = profile
+        self.path = path
+        self.links = None
+        self.inputs = ()
+        self.error = error
+
+
+def _hashed_lines(f, hasher):
+    # Decode a binary file line by line, feeding the raw bytes to the hasher
+    for line in f:
+        hasher.update(line)
+        yield line.decode("utf-8")
+
+
+class PageRenderer:
+    """
+    Renders the pages of one site.
+
+    Every page goes through the same steps, however it is read and written:
+    its include lines are expanded (see the ``includes`` module), each block
+    becomes an HTML node whose links are collected and whose asset URLs are
+    rewritten, and the blocks are written inside a ``<div>``, wrapped in the
+    layout if there is one. The asset URLs in the static text of the layout
+    are rewritten as well, once per page directory.
+
+    With a ``static_dir``, the static files that the URLs of a page point at
+    are among the inputs of its result (see ``assets.asset_path``), so the
+    page depends on exactly the assets it uses rather than on all of them.
+
+    Two hooks change or watch the block step without a copy of the pipeline:
+
+    - ``block_html(block, page_dir, links)`` returns the HTML of a block in
+      place of rendering it, e.g. from a cache of ``block_node`` results,
+      and appends the block's links to ``links`` if it is not None
+    - ``profile``, a PageProfile, is told each time a stage of the page ends
+      (see the ``profiling`` module)
+
+    Attributes:
+        content_dir: The content directory pages are relative to
+        template: Template pages are wrapped in, or None for bare bodies
+        asset_urls: Fingerprinted asset URLs (see ``AssetResult.urls``) that
+            ``href`` and ``src`` URLs are rewritten to, or None
+        text_to_nodes: The inline parser turning text into a list of TextNodes
+        collect_links: Whether results carry the links of their page
+        static_dir: Directory holding the static assets, or None to not
+            track which of them pages use
+    """
+    __slots__ = ("content_dir", "template", "asset_urls", "text_to_nodes", "collect_links",
+                 "static_dir", "_layouts")
+
+    def __init__(self, content_dir, template=None, asset_urls=None,
+                 text_to_nodes=text_to_textnodes, collect_links=False, static_dir=None):
+        self.content_dir = content_dir
+        self.template = template
+        self.asset_urls = asset_urls
+        self.text_to_nodes = text_to_nodes
+        self.collect_links = collect_links
+        self.static_dir = static_dir
+        # Page directory to (template, asset URLs, the layout pages there are
+        # wrapped in, the URLs of the layout)
+        self._layouts = {}
+
+    def _layout(self, page_dir):
+        # Relative URLs in the layout resolve differently per directory
+        entry = self._layouts.get(page_dir)
+        if entry is None or entry[0] is not self.template or entry[1] is not self.asset_urls:
+            urls = []
+
+            def rewrite(url):
+                urls.append(url)
+                return asset_url(url, self.asset_urls, page_dir) if self.asset_urls else None
+
+            entry = self._layouts[page_dir] = (self.template, self.asset_urls,
+                                               self.template.map_urls(rewrite), urls)
+        return entry
+
+    def _links(self):
+        # Links are also needed to find the assets a page uses
+        return [] if self.collect_links or self.static_dir is not None else None
+
+    def _finish_node(self, node, page_dir, links):
+        # Links are collected as written, before asset URLs are rewritten
+        if links is not None:
+            collect_links(node, links)
+        if self.asset_urls:
+            rewrite_asset_urls(node, self.asset_urls, page_dir)
+        return node
+
+    def block_node(self, block, page_dir, links=None):
+        """
+        Returns the HTML node of a block on a page in ``page_dir``, appending
+        its links to ``links`` if it is not None.
+        """
+        return self._finish_node(block_to_html_node(block, self.text_to_nodes), page_dir, links)
+
+    def write_content(self, out, lines, page_dir, links=None, block_html=None, profile=None):
+        """Writes the ``<div>`` holding the blocks of the markdown ``lines`` to ``out``."""
+        write = out.write
+        text_to_nodes = self.text_to_nodes
+        if profile is not None:
+            # The layout written before the content
+            profile.lap("render")
+            text_to_nodes = profile.timed_parser(text_to_nodes)
+        write("<div>")
+        for block in iter_blocks(lines):
+            if profile is not None:
+                profile.lap("blocks")
+            if block_html is not None:
+                write(block_html(block, page_dir, links))
+                continue
+            node = block_to_html_node(block, text_to_nodes)
+            if profile is not None:
+                profile.lap("convert")
+            node = self._finish_node(node, page_dir, links)
+            if profile is not None:
+                profile.lap("transform")
+                profile.count(node)
+            node.write_html(out)
+            if profile is not None:
+                profile.lap("render")
+        write("</div>")
+        if profile is not None:
+            profile.lap("blocks")
+
+    def write_page(self, out, page, lines, title=None, links=None, block_html=None,
+                   profile=None):
+        """
+        Writes the HTML of a page to ``out``.
+
+        Args:
+            out: Any object with a ``write(str)`` method
+            page: Path of the page relative to the content directory
+            lines: The markdown lines of the page, includes expanded
+            title: The title for the layout, usually ``extract_title`` of the lines
+            links: Optional list the links of the page are appended to
+            block_html: Optional hook rendering blocks in place of ``block_node``
+            profile: Optional PageProfile timing the stages
+        """
+        page_dir = posixpath.dirname(page)
+        if self.template is None:
+            self.write_content(out, lines, page_dir, links, block_html, profile)
+            return
+        content = partial(self.write_content, lines=lines, page_dir=page_dir, links=links,
+                          block_html=block_html, profile=profile)
+        self._layout(page_dir)[2].render_to(out, page_values(page, title, content))
+        if profile is not None:
+            profile.lap("render")
+
+    def _assets(self, page, links):
+        # The paths of the static files the links of a page and its layout
+        # point at
+        page_dir = posixpath.dirname(page)
+        asset_urls = self.asset_urls or {}
+        if self.template is not None:
+            links = (*self._layout(page_dir)[3], *links)
+        paths = {asset_path(url, asset_urls, page_dir) for url in links}
+        paths.discard(None)
+        return [os.path.join(self.static_dir, *path[1:].split("/")) for path in sorted(paths)]
+
+    def _result(self, page, size, content_hash, reads, links, **kwargs):
+        result = PageResult(size, content_hash, **kwargs)
+        result.links = links if self.collect_links else None
+        layout_files = self.template.files if self.template is not None else ()
+        assets = self._assets(page, links) if self.static_dir is not None else ()
+        result.inputs = (*layout_files, *reads, *assets)
+        return result
+
+    def render_html(self, page, block_html=None, profile=None):
+        """
+        Renders one page into encoded HTML in memory.
+
+        Without a layout the source is hashed while it is streamed through
+        the renderer, so it is read only once. With one, or when profiling,
+        the source is read whole, since the title has to be known before the
+        layout around the content is written; the content is still streamed
+        into the layout block by block.
+
+        Args:
+            page: Path of the page relative to the content directory
+            block_html: Optional hook rendering blocks in place of ``block_node``
+            profile: Optional PageProfile timing the stages, filled in and
+                returned in the result
+
+        Returns:
+            PageResult: The UTF-8 HTML, its size, the hash of the source, and
+            the links and inputs of the page
+        """
+        source = os.path.join(self.content_dir, page)
+        reads = []
+        links = self._links()
+        out = io.StringIO()
+        if profile is not None:
+            profile.start()
+        if self.template is None and profile is None:
+            hasher = hashlib.sha256()
+            with open(source, "rb") as src:
+                lines = expand_includes(_hashed_lines(src, hasher), source, self.content_dir,
+                                        reads)
+                self.write_page(out, page, lines, None, links, block_html)
+            content_hash = hasher.hexdigest()
+        else:
+            with open(source, "rb") as src:
+                data = src.read()
+            content_hash = hash_bytes(data)
+            lines = list(expand_includes(data.decode("utf-8").split("\n"), source,
+                                         self.content_dir, reads))
+            if profile is not None:
+                profile.lap("read")
+            self.write_page(out, page, lines, extract_title(lines), links, block_html, profile)
+        html = out.getvalue().encode("utf-8")
+        if profile is not None:
+            profile.lap("encode")
+            profile.finish(len(html))
+        return self._result(page, len(html), content_hash, reads, links, html=html,
+                            profile=profile)
+
+    def render_mapped(self, page, target):
+        """
+        Renders a large page straight into an HTML file through a memory map.
+
+        The output is the same as ``render_html``'s, but the source is decoded
+        one window at a time (see the ``mapped`` module) and the HTML is
+        written to ``target`` as it is produced, so memory use follows the
+        largest block instead of the size of the file. The hash is computed
+        over the mapped bytes without copying them. The title for the layout
+        comes from the source itself, not from files it includes.
+
+        Args:
+            page: Path of the page relative to the content directory
+            target: Path of the HTML file to write; its directory must exist
+
+        Returns:
+            PageResult: The size of the output, the hash of the source, and
+            the links and inputs of the page
+        """
+        source = os.path.join(self.content_dir, page)
+        reads = []
+        links = self._links()
+        with map_file(source) as data, \
+                open(target, "w", encoding="utf-8", newline="", buffering=1024 * 1024) as out:
+            content_hash = hash_mapped(data)
+            lines = expand_includes(iter_mapped_lines(data), source, self.content_dir, reads)
+            title = mapped_title(data) if self.template is not None else None
+            self.write_page(out, page, lines, title, links)
+        return self._result(page, os.path.getsize(target), content_hash, reads, links)
@@ -0,0 +1,303 @@
+"""
+Development server: serves the output directory and re-renders pages as their
+markdown sources change
+"""
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+import time
+
+from assets import copy_assets
+from build import MANIFEST_NAME, BuildOptions, build_site, output_path_for, template_hash
+from depgraph import DEPENDENCY_GRAPH_NAME, DependencyGraph
+from linkgraph import LINK_GRAPH_NAME, LinkGraph
+from manifest import Manifest
+from render import PageRenderer
+from template import template_cache
+
+
+class Watcher:
+    """
+    Detects added, changed and removed markdown files under a directory by
+    polling.
+
+    Each ``poll`` walks the directory once and compares the size and mtime of
+    every file with the previous walk; no file is read. (The standard library
+    has no inotify binding, so polling is the portable choice.) Files and
+    directories whose names start with ``_`` are not walked, as they are not
+    pages (see ``build.find_pages``). Files and directories deleted while they
+    are walked count as removed.
+    """
+
+    def __init__(self, root, suffix=".md"):
+        self.root = root
+        self.suffix = suffix
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        suffix = self.suffix
+        pending = [("", self.root)]
+        while pending:
+            prefix, directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("_"):
+                            continue
+                        if entry.is_dir():
+                            pending.append((f"{prefix}{entry.name}/", entry.path))
+                        elif entry.name.endswith(suffix):
+                            try:
+                                stat = entry.stat()
+                            except FileNotFoundError:
+                                continue
+                            snapshot[prefix + entry.name] = (stat.st_size, stat.st_mtime_ns)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return snapshot
+
+    def poll(self):
+        """
+        Walks the directory again.
+
+        Returns:
+            tuple[list[str], list[str]]: The relative paths, with ``/``
+            separators, of the files that were added or changed and of those
+            that were removed since the last poll
+        """
+        snapshot = self._scan()
+        old = self.snapshot
+        changed = [page for page, state in snapshot.items() if old.get(page) != state]
+        removed = [page for page in old if page not in snapshot]
+        self.snapshot = snapshot
+        return changed, removed
+
+
+class Rebuild:
+    """
+    What re-rendering (or removing) one page took.
+
+    Attributes:
+        page: The source path relative to the content directory
+        removed: True if the source was deleted and its output removed
+        seconds: Time spent rendering and writing the page
+        latency: Seconds from the last modification of the source until its
+            output was written, or None for removed pages
+        error: The error that stopped the page from rendering, if any
+    """
+    __slots__ = ("page", "removed", "seconds", "latency", "error")
+
+    def __init__(self, page, removed, seconds, latency=None, error=None):
+        self.page = page
+        self.removed = removed
+        self.seconds = seconds
+        self.latency = latency
+        self.error = error
+
+    def __str__(self):
+        if self.error is not None:
+            return f"Failed to render {self.page}: {self.error}"
+        if self.removed:
+            return f"Removed {self.page}"
+        return (f"Rebuilt {self.page} in {self.seconds * 1000:.1f}ms "
+                f"({self.latency * 1000:.0f}ms after the edit)")
+
+
+class DevSite:
+    """
+    Keeps a site up to date in memory while its sources are edited.
+
+    The site is built once (incrementally) on creation. After that, ``refresh``
+    re-renders only the pages whose sources changed, through the same
+    PageRenderer as the build. The HTML of every block rendered so far is
+    kept, keyed by the block itself, and handed to the renderer through its
+    ``block_html`` hook, so an edit re-parses only the blocks it touched; the
+    rest of the page comes from memory.
+
+    With a ``template``, pages are wrapped in the layout like in a build, and
+    an edit to the layout re-renders every page. An edit to an included
+    snippet re-renders the pages the dependency graph lists for it, and so
+    does an edit to a static asset, after the assets are published again.
+
+    Pages are written through a temporary file and a rename, so the server
+    never sends a half-written page. The manifest, the link graph and the
+    dependency graph are updated as pages are rebuilt and saved by
+    ``close``, so the next ``build`` skips them.
+    """
+    MAX_BLOCKS = 65536
+
+    def __init__(self, content_dir="content", output_dir="public", static_dir="static",
+                 template=None):
+        self.content_dir = content_dir
+        self.output_dir = output_dir
+        self.static_dir = static_dir
+        self.template_path = template
+        self.summary = build_site(content_dir, output_dir,
+                                  BuildOptions(static_dir=static_dir, template=template))
+        self.asset_urls = self.summary.assets.urls
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.manifest = Manifest.load(self.manifest_path)
+        self.links_path = os.path.join(output_dir, LINK_GRAPH_NAME)
+        self.links = LinkGraph.load(self.links_path)
+        self.deps_path = os.path.join(output_dir, DEPENDENCY_GRAPH_NAME)
+        self.deps = DependencyGraph.load(self.deps_path)
+        self.template = template_cache.load(template) if template else None
+        self.template_hash = template_hash(self.template.hash if self.template else None)
+        self.renderer = PageRenderer(content_dir, self.template, self.asset_urls,
+                                     collect_links=True, static_dir=static_dir)
+        self.watcher = Watcher(content_dir)
+        self._blocks = {}
+
+    def _block_html(self, block, page_dir, links):
+        # The block_html hook of the renderer. Relative asset URLs resolve
+        # differently per directory
+        key = (block.block_type, tuple(block.lines), block.level,
+               page_dir if self.asset_urls else None)
+        entry = self._blocks.get(key)
+        if entry is None:
+            if len(self._blocks) >= self.MAX_BLOCKS:
+                self._blocks.clear()
+            block_links = []
+            node = self.renderer.block_node(block, page_dir, block_links)
+            entry = self._blocks[key] = (node.to_html(), block_links)
+        links += entry[1]
+        return entry[0]
+
+    def render_page(self, page):
+        """
+        Renders one page from its source using the warm block cache.
+
+        Returns:
+            Rebuild: The render time and edit-to-refresh latency of the page
+        """
+        start = time.perf_counter()
+        source = os.path.join(self.content_dir, page)
+        output = output_path_for(page)
+        target = os.path.join(self.output_dir, output)
+
+        stat = os.stat(source)
+        result = self.renderer.render_html(page, block_html=self._block_html)
+
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(result.html)
+        os.replace(tmp_path, target)
+
+        self.manifest.record(page, stat, result.content_hash, self.template_hash, output)
+        self.links.set_page(page, result.links)
+        self.deps.record(page, source, result.inputs)
+        return Rebuild(page, False, time.perf_counter() - start,
+                       (time.time_ns() - stat.st_mtime_ns) / 1e9)
+
+    def remove_page(self, page):
+        """Deletes the output of a page whose source was removed."""
+        start = time.perf_counter()
+        entry = self.manifest.pages.pop(page, None)
+        self.links.remove_page(page)
+        self.deps.remove(page)
+        output = entry["output"] if entry else output_path_for(page)
+        try:
+            os.remove(os.path.join(self.output_dir, output))
+        except FileNotFoundError:
+            pass
+        return Rebuild(page, True, time.perf_counter() - start)
+
+    def refresh(self):
+        """
+        Polls the content directory and brings the changed pages up to date.
+
+        Pages whose included snippets or assets changed are rendered as well.
+        A page that fails to render, for example because it is saved halfway
+        through an edit, is reported and keeps its previous output; it is
+        rendered again on its next change or the next change of a file it
+        includes.
+
+        Returns:
+            list[Rebuild]: One entry per page rendered or removed
+        """
+        changed, removed = self.watcher.poll()
+        if self._template_changed():
+            changed = list(self.watcher.snapshot)
+        inputs = self.deps.changed_inputs()
+        self._publish_assets(inputs)
+        affected = self.deps.affected(inputs)
+        changed += sorted(affected.difference(changed, removed))
+        rebuilds = [self.remove_page(page) for page in removed]
+        for page in changed:
+            try:
+                rebuilds.append(self.render_page(page))
+            except (OSError, ValueError) as e:
+                rebuilds.append(Rebuild(page, False, 0.0, error=e))
+        return rebuilds
+
+    def _publish_assets(self, inputs):
+        # An asset that pages use changed; it gets a new name, which the
+        # cached blocks pointing at it do not have
+        static_dir = os.path.join(self.static_dir, "")
+        if any(path.startswith(static_dir) for path in inputs):
+            self.asset_urls = copy_assets(self.static_dir, self.output_dir).urls
+            self.renderer.asset_urls = self.asset_urls
+            self._blocks.clear()
+
+    def _template_changed(self):
+        # A stat per poll; the layout is only read again when it was touched
+        if self.template_path is None:
+            return False
+        try:
+            template = template_cache.load(self.template_path)
+        except (OSError, ValueError):
+            return False
+        if template is self.template:
+            return False
+        self.template = self.renderer.template = template
+        self.template_hash = template_hash(template.hash)
+        return True
+
+    def close(self):
+        """Saves the manifest, the link graph and the dependency graph."""
+        self.manifest.save(self.manifest_path)
+        self.links.save(self.links_path)
+        self.deps.save(self.deps_path)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(content_dir="content", output_dir="public", port=8000, watch=False,
+          interval=0.05, log=print, static_dir="static", template=None):
+    """
+    Builds the site and serves the output directory on ``127.0.0.1:port``.
+
+    With ``watch``, the content directory is polled every ``interval``
+    seconds and changed pages are re-rendered by a DevSite, with one line
+    logged per rebuild. Runs until interrupted.
+
+    Raises:
+        FileNotFoundError: If ``content_dir`` or ``template`` does not exist
+    """
+    site = DevSite(content_dir, output_dir, static_dir, template)
+    log(site.summary)
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 partial(_QuietHandler, directory=output_dir))
+    log(f"Serving {output_dir} at http://127.0.0.1:{server.server_port}/")
+    try:
+        if not watch:
+            server.serve_forever()
+            return
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        log(f"Watching {content_dir} for changes")
+        while True:
+            time.sleep(interval)
+            for rebuild in site.refresh():
+                log(rebuild)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        site.close()
@@ -0,0 +1,230 @@
+"""
+Page layouts: templates compiled once into static chunks and named slots
+"""
+import html
+import os
+import posixpath
+import re
+
+from escaping import Markup, escape_attribute, escape_text
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from manifest import hash_bytes
+
+# A slot is a name between double braces: {{ title }}
+_SLOT = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# A partial is a file path after a '>': {{> partials/footer.html }}
+_PARTIAL = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+# A quoted href or src attribute in the static text: href="/styles.css"
+_URL_ATTRIBUTE = re.compile(r"""\b(href|src)=(?:"([^"]*)"|'([^']*)')""")
+
+
+class Template:
+    """
+    A layout compiled into the static text around its slots.
+
+    ``{{ name }}`` marks a slot. Compiling splits the layout once into
+    ``chunks`` and ``slots``, with one more chunk than slots; rendering
+    writes chunk, slot value, chunk, ... so no layout text is searched or
+    copied per page.
+
+    Slot values can be:
+
+    - ``str``: text, HTML-escaped when written
+    - ``Markup``: HTML, written as it is
+    - an HTMLNode: streamed with its ``write_html``
+    - a callable: called with the output stream to write the value itself,
+      e.g. ``lambda fp: write_markdown_html(lines, fp)``
+
+    Attributes:
+        chunks: The static text between the slots, as Markup
+        slots: The slot names in order of appearance
+        hash: Hex SHA-256 digest of the layout source
+        files: Paths of the files the layout was read from, the layout
+            first and then its partials, when loaded by a TemplateCache
+    """
+    __slots__ = ("chunks", "slots", "hash", "files")
+
+    def __init__(self, source, files=()):
+        parts = _SLOT.split(source)
+        self.chunks = tuple(Markup(chunk) for chunk in parts[::2])
+        self.slots = tuple(parts[1::2])
+        self.hash = hash_bytes(source.encode("utf-8"))
+        self.files = tuple(files)
+
+    def render_to(self, fp, values):
+        """
+        Writes the layout with its slots filled from ``values`` to ``fp``.
+
+        Raises:
+            ValueError: If ``values`` has no value for one of the slots
+        """
+        write = fp.write
+        chunks = self.chunks
+        write(chunks[0])
+        for index, name in enumerate(self.slots, 1):
+            try:
+                value = values[name]
+            except KeyError:
+                raise ValueError(f"No value for template slot: {name}") from None
+            if isinstance(value, str):
+                write(escape_text(value))
+            elif isinstance(value, HTMLNode):
+                value.write_html(fp)
+            else:
+                value(fp)
+            write(chunks[index])
+
+    def map_urls(self, func):
+        """
+        Returns the layout with the ``href`` and ``src`` URLs of its static
+        text replaced, e.g. by fingerprinted asset URLs.
+
+        ``func`` is called with every quoted URL, unescaped, and returns the
+        URL to write in its place or None to keep it. The result keeps the
+        ``hash`` and ``files`` of this template; it is this template itself
+        if no URL was replaced.
+        """
+        def replace(match):
+            url = match.group(2) if match.group(2) is not None else match.group(3)
+            new_url = func(html.unescape(url))
+            if new_url is None:
+                return match.group(0)
+            return f'{match.group(1)}="{escape_attribute(new_url)}"'
+
+        chunks = tuple(Markup(_URL_ATTRIBUTE.sub(replace, chunk)) for chunk in self.chunks)
+        if chunks == self.chunks:
+            return self
+        template = Template.__new__(Template)
+        template.chunks = chunks
+        template.slots = self.slots
+        template.hash = self.hash
+        template.files = self.files
+        return template
+
+    def render(self, values):
+        """Returns the layout with its slots filled from ``values`` as a string."""
+        parts = []
+        self.render_to(_ListWriter(parts), values)
+        return "".join(parts)
+
+
+class _ListWriter:
+    # A minimal stream collecting written strings in a list
+    __slots__ = ("write",)
+
+    def __init__(self, parts):
+        self.write = parts.append
+
+
+def _file_state(path):
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def _read_layout(path, states, including=()):
+    # Returns the source of a layout with its partials pasted in, adding the
+    # state of every file read to states
+    states.append(_file_state(path))
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+
+    def paste(match):
+        partial = os.path.normpath(os.path.join(os.path.dirname(path), match.group(1)))
+        if partial == path or partial in including:
+            raise ValueError(f"Template partial includes itself: {partial}")
+        return _read_layout(partial, states, including + (path,))
+
+    return _PARTIAL.sub(paste, source)
+
+
+class TemplateCache:
+    """
+    Loads templates from files, compiling each layout only when it changed.
+
+    ``{{> path }}`` in a layout pastes in the partial at ``path``, relative to
+    the file holding it, before the layout is compiled; partials can hold
+    slots and partials of their own.
+
+    A cached template is reused while the size and mtime of its file and of
+    all its partials stay the same. When any of them change, the files are
+    read again; if the result is the same as before the compiled template is
+    still reused.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def load(self, path):
+        """
+        Returns the compiled Template of the file at ``path``.
+
+        Raises:
+            OSError: If the file or one of its partials cannot be read
+            ValueError: If a partial includes itself
+        """
+        entry = self._entries.get(path)
+        if entry is not None:
+            try:
+                if all(_file_state(state[0]) == state for state in entry[0]):
+                    return entry[1]
+            except FileNotFoundError:
+                pass
+
+        states = []
+        source = _read_layout(path, states)
+        files = tuple(state[0] for state in states)
+        if entry is None or entry[1].hash != hash_bytes(source.encode("utf-8")) or \
+                entry[1].files != files:
+            template = Template(source, files)
+        else:
+            template = entry[1]
+        self._entries[path] = (tuple(states), template)
+        return template
+
+
+# Shared by everything in this process that loads templates
+template_cache = TemplateCache()
+
+
+def extract_title(lines):
+    """
+    Returns the text of the first level 1 heading (``# Title``) in the
+    markdown ``lines``, or None if there is none.
+    """
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("# "):
+            return stripped[2:].strip()
+    return None
+
+
+def breadcrumb_nav(page):
+    """
+    Returns a ``<nav>`` of links from the site root down to the directory of
+    ``page``, a source path relative to the content directory.
+    """
+    children = [LeafNode("a", "Home", {"href": "/"})]
+    href = "/"
+    for part in page.split("/")[:-1]:
+        href = f"{href}{part}/"
+        children.append(LeafNode(None, " / "))
+        children.append(LeafNode("a", part, {"href": href}))
+    return ParentNode("nav", children)
+
+
+def page_values(page, title, content):
+    """
+    Returns the values of the standard page slots:
+
+    - ``title``: ``title``, or the file name of the page if it is None
+    - ``nav``: the ``breadcrumb_nav`` of the page
+    - ``content``: ``content``, usually a callable streaming the page body
+
+    Args:
+        page: Source path of the page relative to the content directory
+        title: The title of the page, usually ``extract_title`` of its lines
+        content: The value of the ``content`` slot
+    """
+    if title is None:
+        title = posixpath.splitext(posixpath.basename(page))[0]
+    return {"title": title, "nav": breadcrumb_nav(page), "content": content}
@@ -0,0 +1,103 @@
+"""
+    Unit tests for assets.py
+"""
+import os
+import tempfile
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+import assets
+from assets import asset_path, copy_assets, fingerprinted_name, rewrite_asset_urls
+from htmlnode import LeafNode, ParentNode
+from manifest import hash_bytes
+from test_build import read_file, write_file
+
+
+class TestCopyAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.output = os.path.join(self.tmp.name, "public")
+        write_file(os.path.join(self.static, "styles.css"), "body { color: red; }")
+        write_file(os.path.join(self.static, "img", "logo.svg"), "<svg></svg>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("css/a.css", "0123456789abcdef"), "css/a.0123456789.css")
+        self.assertEqual(fingerprinted_name("LICENSE", "0123456789abcdef"), "LICENSE.0123456789")
+
+    def test_copies_with_fingerprints(self):
+        result = copy_assets(self.static, self.output)
+        css = fingerprinted_name("styles.css", hash_bytes(b"body { color: red; }"))
+        self.assertEqual(result.urls["/styles.css"], f"/{css}")
+        self.assertEqual(set(result.urls), {"/styles.css", "/img/logo.svg"})
+        self.assertEqual(read_file(os.path.join(self.output, css)), "body { color: red; }")
+        self.assertEqual((result.copied, result.unchanged, result.removed), (2, 0, 0))
+
+    def test_unchanged_assets_are_not_read(self):
+        first = copy_assets(self.static, self.output)
+        with mock.patch.object(assets, "hash_file") as hash_file, \
+                mock.patch.object(assets, "_clone_file") as clone_file:
+            result = copy_assets(self.static, self.output)
+        hash_file.assert_not_called()
+        clone_file.assert_not_called()
+        self.assertEqual(result.urls, first.urls)
+        self.assertEqual((result.copied, result.unchanged), (0, 2))
+
+    def test_changed_and_removed_assets(self):
+        first = copy_assets(self.static, self.output)
+        write_file(os.path.join(self.static, "styles.css"), "body { color: blue; }")
+        os.remove(os.path.join(self.static, "img", "logo.svg"))
+        result = copy_assets(self.static, self.output)
+        self.assertEqual((result.copied, result.removed), (1, 2))
+        self.assertNotEqual(result.urls["/styles.css"], first.urls["/styles.css"])
+        for url in first.urls.values():
+            self.assertFalse(os.path.exists(self.output + url))
+
+    def test_missing_static_dir(self):
+        result = copy_assets(os.path.join(self.tmp.name, "missing"), self.output)
+        self.assertEqual(result.urls, {})
+
+
+class TestRewriteAssetUrls(unittest.TestCase):
+    urls = {"/styles.css": "/styles.0123456789.css", "/img/logo.svg": "/img/logo.abcdef0123.svg"}
+
+    def test_rewrites_href_and_src(self):
+        shared = MappingProxyType({"href": "/styles.css"})
+        link = LeafNode("a", "css", shared)
+        tree = ParentNode("div", [
+            link,
+            ParentNode("p", [LeafNode("img", "", {"src": "../img/logo.svg?v=1", "alt": "logo"})]),
+            LeafNode("a", "other", {"href": "https://example.com/styles.css"}),
+            LeafNode("a", "page", {"href": "/blog/post.html"}),
+        ])
+        rewrite_asset_urls(tree, self.urls, page_dir="blog")
+        self.assertEqual(tree.to_html(),
+                         '<div><a href="/styles.0123456789.css">css</a>'
+                         '<p><img src="../img/logo.abcdef0123.svg?v=1" alt="logo"></img></p>'
+                         '<a href="https://example.com/styles.css">other</a>'
+                         '<a href="/blog/post.html">page</a></div>')
+        # Shared props are replaced, never changed in place
+        self.assertEqual(shared["href"], "/styles.css")
+
+    def test_relative_to_page_dir(self):
+        node = LeafNode("a", "x", {"href": "styles.css"})
+        self.assertEqual(rewrite_asset_urls(node, self.urls).props["href"], "styles.0123456789.css")
+        node = LeafNode("a", "x", {"href": "styles.css"})
+        self.assertEqual(rewrite_asset_urls(node, self.urls, "blog").props["href"], "styles.css")
+
+
+    def test_asset_path(self):
+        self.assertEqual(asset_path("../styles.css?v=1", self.urls, "blog"), "/styles.css")
+        self.assertEqual(asset_path("logo.png", self.urls, "blog"), "/blog/logo.png")
+        self.assertEqual(asset_path("/site.html", {"/site.html": "/site.0123456789.html"}),
+                         "/site.html")
+        for url in ["post.html", "/blog/", "#top", "?page=2", "https://example.com/a.css"]:
+            self.assertIsNone(asset_path(url, self.urls, "blog"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+    Unit tests for the result comparison of bench.py
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from bench import compare_results, main
+
+
+def results(**cases):
+    return {"corpus": {}, "results": {"inline": cases}}
+
+
+class TestCompareResults(unittest.TestCase):
+    def test_flags_regressions_beyond_threshold(self):
+        base = results(fast={"seconds": 1.0, "peak_bytes": 1000, "pages": 10},
+                       slow={"seconds": 2.0, "pages_per_second": 50.0})
+        new = results(fast={"seconds": 1.05, "peak_bytes": 1500, "pages": 99},
+                      slow={"seconds": 1.0, "pages_per_second": 1.0})
+        lines, regressions = compare_results(base, new, threshold=0.1)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("inline.fast.peak_bytes", regressions[0])
+        self.assertIn("inline.slow.pages_per_second", regressions[1])
+
+    def test_higher_throughput_is_not_a_regression(self):
+        base = results(case={"mb_per_second": 10.0})
+        lines, regressions = compare_results(base, results(case={"mb_per_second": 20.0}))
+        self.assertEqual((len(lines), regressions), (1, []))
+        lines, regressions = compare_results(base, results(case={"mb_per_second": 0.0}))
+        self.assertEqual(len(regressions), 1)
+
+    def test_missing_cases(self):
+        base = {"corpus": {}, "results": {"inline": {"kept": {"seconds": 1.0},
+                                                     "gone": {"seconds": 1.0}},
+                                          "build": {"case": {"seconds": 1.0}}}}
+        lines, regressions = compare_results(base, results(kept={"seconds": 1.0}))
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("inline.gone", regressions[0])
+        self.assertIn("build", lines[-1])
+        self.assertIn("not run", lines[-1])
+
+    def test_new_cases_are_skipped(self):
+        lines, regressions = compare_results(results(), results(new={"seconds": 1.0}))
+        self.assertEqual((lines, regressions), ([], []))
+
+    def test_compare_command_exit_status(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, name) for name in ("base.json", "new.json")]
+            for path, seconds in zip(paths, (1.0, 2.0)):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(results(case={"seconds": seconds}), f)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(main(["--compare", *paths]), 1)
+                self.assertEqual(main(["--compare", paths[0], paths[0]]), 0)
+            self.assertIn("1 regressions beyond 10%", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
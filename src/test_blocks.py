@@ -0,0 +1,107 @@
+"""
+    Unit tests for blocks.py
+"""
+import io
+import unittest
+
+from blocks import Block, BlockType, iter_blocks, block_to_html_node, \
+    markdown_to_html_node, write_markdown_html
+from md_helpers import text_to_textnodes
+
+MARKDOWN = """# The Title
+
+This is a **paragraph**
+over two lines.
+
+> A *quoted*
+> reply
+
+- first item
+- second [item](/second)
+
+1. one
+2. `two`
+
+```
+def main():
+
+    return "**not bold**"
+```
+"""
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_block_types(self):
+        blocks = list(iter_blocks(io.StringIO(MARKDOWN)))
+        self.assertEqual(blocks, [
+            Block(BlockType.HEADING, ["The Title"], 1),
+            Block(BlockType.PARAGRAPH, ["This is a **paragraph**", "over two lines."]),
+            Block(BlockType.QUOTE, ["A *quoted*", "reply"]),
+            Block(BlockType.UNORDERED_LIST, ["first item", "second [item](/second)"]),
+            Block(BlockType.ORDERED_LIST, ["one", "`two`"]),
+            Block(BlockType.CODE, ["def main():", "", '    return "**not bold**"']),
+        ])
+
+    def test_lines_without_endings(self):
+        blocks = list(iter_blocks(["## Sub", "text", "", "more text"]))
+        self.assertEqual(blocks, [
+            Block(BlockType.HEADING, ["Sub"], 2),
+            Block(BlockType.PARAGRAPH, ["text"]),
+            Block(BlockType.PARAGRAPH, ["more text"]),
+        ])
+
+    def test_adjacent_blocks_of_different_types(self):
+        blocks = list(iter_blocks(["para", "- item", "> quote"]))
+        self.assertEqual([block.block_type for block in blocks],
+                         [BlockType.PARAGRAPH, BlockType.UNORDERED_LIST, BlockType.QUOTE])
+
+    def test_unclosed_code_fence(self):
+        blocks = list(iter_blocks(["```", "code"]))
+        self.assertEqual(blocks, [Block(BlockType.CODE, ["code"])])
+
+    def test_is_lazy(self):
+        def lines():
+            yield "first"
+            yield ""
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_blocks(lines())), Block(BlockType.PARAGRAPH, ["first"]))
+
+
+class TestBlockToHtml(unittest.TestCase):
+    def test_markdown_to_html_node(self):
+        node = markdown_to_html_node(io.StringIO(MARKDOWN))
+        self.assertEqual(node.to_html(),
+                         "<div>"
+                         "<h1>The Title</h1>"
+                         "<p>This is a <b>paragraph</b> over two lines.</p>"
+                         "<blockquote>A <i>quoted</i> reply</blockquote>"
+                         '<ul><li>first item</li><li>second <a href="/second">item</a></li></ul>'
+                         "<ol><li>one</li><li><code>two</code></li></ol>"
+                         '<pre><code>def main():\n\n    return "**not bold**"\n</code></pre>'
+                         "</div>")
+
+    def test_write_markdown_html_matches_tree(self):
+        out = io.StringIO()
+        write_markdown_html(io.StringIO(MARKDOWN), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(io.StringIO(MARKDOWN)).to_html())
+
+    def test_empty_document(self):
+        self.assertEqual(markdown_to_html_node([]).to_html(), "<div></div>")
+
+    def test_custom_inline_parser(self):
+        calls = []
+        def parser(text):
+            calls.append(text)
+            return text_to_textnodes(text)
+        block_to_html_node(Block(BlockType.PARAGRAPH, ["a", "b"]), parser)
+        self.assertEqual(calls, ["a b"])
+
+    def test_nested_and_unmatched_emphasis(self):
+        node = block_to_html_node(Block(BlockType.PARAGRAPH, ["**bold *italic* bold**"]))
+        self.assertEqual(node.to_html(), "<p><b>bold <i>italic</i> bold</b></p>")
+        node = block_to_html_node(Block(BlockType.PARAGRAPH, ["2 * 3 is *six*"]))
+        self.assertEqual(node.to_html(), "<p>2 * 3 is <i>six</i></p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,369 @@
+"""
+    Unit tests for build.py
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from build import BuildOptions, build_site, find_pages, output_path_for, MANIFEST_NAME
+from depgraph import DEPENDENCY_GRAPH_NAME, DependencyGraph
+from linkgraph import LINK_GRAPH_NAME, LinkGraph
+from main import main
+from manifest import Manifest
+
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def read_file(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestBuildSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.output = os.path.join(self.tmp.name, "public")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nSee the [blog](/blog/post.html).\n")
+        write_file(os.path.join(self.content, "blog", "post.md"), "A *post*.\n")
+        write_file(os.path.join(self.content, "notes.txt"), "not markdown")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_pages(self):
+        write_file(os.path.join(self.content, "_snippets", "note.md"), "A note.\n")
+        write_file(os.path.join(self.content, "blog", "_aside.md"), "An aside.\n")
+        self.assertEqual(find_pages(self.content), ["index.md", "blog/post.md"])
+
+    def test_output_path_for(self):
+        self.assertEqual(output_path_for("blog/post.md"), "blog/post.html")
+
+    def test_build_serial(self):
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.pages, 2)
+        self.assertEqual(read_file(os.path.join(self.output, "index.html")),
+                         '<div><h1>Home</h1><p>See the <a href="/blog/post.html">blog</a>.</p></div>')
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         "<div><p>A <i>post</i>.</p></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.output, "notes.html")))
+        self.assertEqual(summary.bytes_written,
+                         os.path.getsize(os.path.join(self.output, "index.html")) +
+                         os.path.getsize(os.path.join(self.output, "blog", "post.html")))
+
+    def test_identical_output_is_not_rewritten(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, full=True))
+        self.assertEqual((summary.pages, summary.unchanged, summary.write_bytes), (2, 2, 0))
+        self.assertIn("2 rendered pages were already up to date", str(summary))
+
+    def test_static_assets(self):
+        static = os.path.join(self.tmp.name, "static")
+        write_file(os.path.join(static, "styles.css"), "p {}")
+        write_file(os.path.join(self.content, "about.md"), "[Styles](/styles.css)\n")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, static_dir=static))
+        css = summary.assets.urls["/styles.css"]
+        self.assertTrue(os.path.exists(self.output + css))
+        self.assertEqual(read_file(os.path.join(self.output, "about.html")),
+                         f'<div><p><a href="{css}">Styles</a></p></div>')
+        self.assertIn("Assets: 1 copied", str(summary))
+
+        # A changed asset re-renders only the pages that point at it
+        options = BuildOptions(workers=1, static_dir=static)
+        write_file(os.path.join(static, "styles.css"), "p { margin: 0; }")
+        summary = build_site(self.content, self.output, options)
+        self.assertEqual((summary.pages, summary.dependents), (1, 1))
+        self.assertIn(summary.assets.urls["/styles.css"],
+                      read_file(os.path.join(self.output, "about.html")))
+
+        # An asset no page points at re-renders nothing
+        write_file(os.path.join(static, "unused.png"), "png")
+        self.assertEqual(build_site(self.content, self.output, options).pages, 0)
+
+        # A page pointing at an asset before it exists is re-rendered when it is added
+        write_file(os.path.join(self.content, "logo.md"), "![Logo](logo.png)\n")
+        self.assertEqual(build_site(self.content, self.output, options).pages, 1)
+        write_file(os.path.join(static, "logo.png"), "png")
+        summary = build_site(self.content, self.output, options)
+        self.assertEqual(summary.pages, 1)
+        self.assertIn(os.path.basename(summary.assets.urls["/logo.png"]),
+                      read_file(os.path.join(self.output, "logo.html")))
+
+    def test_template_assets(self):
+        static = os.path.join(self.tmp.name, "static")
+        write_file(os.path.join(static, "styles.css"), "p {}")
+        write_file(os.path.join(static, "blog", "icon.png"), "png")
+        layout = os.path.join(self.tmp.name, "layout.html")
+        write_file(layout, '<link rel="stylesheet" href="/styles.css">'
+                           '<img src="icon.png">{{ content }}')
+        for number, kwargs in enumerate([{"workers": 1}, {"workers": 2},
+                                         {"workers": 1, "mmap_threshold": 0}]):
+            output = os.path.join(self.tmp.name, f"output{number}")
+            summary = build_site(self.content, output,
+                                 BuildOptions(static_dir=static, template=layout, **kwargs))
+            css = summary.assets.urls["/styles.css"]
+            icon = os.path.basename(summary.assets.urls["/blog/icon.png"])
+            self.assertTrue(read_file(os.path.join(output, "index.html"))
+                            .startswith(f'<link rel="stylesheet" href="{css}"><img src="icon.png">'))
+            # Relative URLs in the layout resolve against the directory of each page
+            self.assertTrue(read_file(os.path.join(output, "blog", "post.html"))
+                            .startswith(f'<link rel="stylesheet" href="{css}"><img src="{icon}">'))
+
+        # The assets of the layout are inputs of the pages that use them
+        write_file(os.path.join(static, "blog", "icon.png"), "new png")
+        summary = build_site(self.content, output, BuildOptions(
+            workers=1, static_dir=static, template=layout))
+        self.assertEqual((summary.pages, summary.dependents), (1, 1))
+        self.assertIn(os.path.basename(summary.assets.urls["/blog/icon.png"]),
+                      read_file(os.path.join(output, "blog", "post.html")))
+
+    def test_template(self):
+        layout = os.path.join(self.tmp.name, "layout.html")
+        write_file(layout, "<title>{{ title }}</title>{{ nav }}{{ content }}")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, template=layout))
+        self.assertEqual(summary.pages, 2)
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         '<title>post</title><nav><a href="/">Home</a> / '
+                         '<a href="/blog/">blog</a></nav><div><p>A <i>post</i>.</p></div>')
+        self.assertTrue(read_file(os.path.join(self.output, "index.html"))
+                        .startswith("<title>Home</title>"))
+
+        # Profiled and parallel builds wrap pages the same way
+        for number, kwargs in enumerate([{"workers": 1, "profile": True}, {"workers": 2}]):
+            other = os.path.join(self.tmp.name, f"other{number}")
+            build_site(self.content, other, BuildOptions(template=layout, **kwargs))
+            for page in ["index.html", os.path.join("blog", "post.html")]:
+                self.assertEqual(read_file(os.path.join(other, page)),
+                                 read_file(os.path.join(self.output, page)))
+
+        options = BuildOptions(workers=1, template=layout)
+        self.assertEqual(build_site(self.content, self.output, options).pages, 0)
+        # A changed layout re-renders every page
+        write_file(layout, "<main>{{ content }}</main>")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, template=layout))
+        self.assertEqual(summary.pages, 2)
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         "<main><div><p>A <i>post</i>.</p></div></main>")
+
+    def test_memory_mapped_pages(self):
+        layout = os.path.join(self.tmp.name, "layout.html")
+        write_file(layout, "<title>{{ title }}</title>{{ nav }}{{ content }}")
+        write_file(os.path.join(self.content, "empty.md"), "")
+        for template in (None, layout):
+            expected = os.path.join(self.tmp.name, "expected")
+            build_site(self.content, expected,
+                       BuildOptions(workers=1, full=True, template=template))
+            summary = build_site(self.content, self.output, BuildOptions(
+                workers=1, full=True, template=template, mmap_threshold=0))
+            self.assertEqual(summary.pages, 3)
+            for page in ["index.html", "empty.html", os.path.join("blog", "post.html")]:
+                self.assertEqual(read_file(os.path.join(self.output, page)),
+                                 read_file(os.path.join(expected, page)))
+            self.assertEqual(summary.bytes_written,
+                             build_site(self.content, expected, BuildOptions(
+                                 workers=2, full=True, template=template)).bytes_written)
+        self.assertEqual([name for name in os.listdir(self.output) if name.endswith(".tmp")], [])
+        options = BuildOptions(workers=1, template=layout, mmap_threshold=0)
+        self.assertEqual(build_site(self.content, self.output, options).pages, 0)
+
+    def test_includes(self):
+        snippet = os.path.join(self.content, "_snippets", "note.md")
+        write_file(snippet, "> A *note*.\n")
+        write_file(os.path.join(self.content, "blog", "post.md"),
+                   "A post.\n\n{{ include /_snippets/note.md }}\n")
+        write_file(os.path.join(self.content, "about.md"), "About.\n")
+        layout = os.path.join(self.tmp.name, "layout.html")
+        write_file(layout, "<main>{{ content }}</main>")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, template=layout))
+        self.assertEqual(summary.pages, 3)
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         "<main><div><p>A post.</p><blockquote>A <i>note</i>.</blockquote></div></main>")
+        self.assertFalse(os.path.exists(os.path.join(self.output, "_snippets")))
+        deps = DependencyGraph.load(os.path.join(self.output, DEPENDENCY_GRAPH_NAME))
+        self.assertEqual(deps.dependents(snippet), {"blog/post.md"})
+        self.assertEqual(deps.dependents(layout), {"index.md", "blog/post.md", "about.md"})
+
+        # Editing the snippet renders exactly the page that includes it
+        write_file(snippet, "> An edited note.\n")
+        os.utime(snippet, ns=(0, 0))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, template=layout))
+        self.assertEqual((summary.pages, summary.dependents, summary.skipped), (1, 1, 2))
+        self.assertIn("Rendered 1 pages whose includes or layout changed", str(summary))
+        self.assertIn("An edited note.", read_file(os.path.join(self.output, "blog", "post.html")))
+        options = BuildOptions(workers=1, template=layout)
+        self.assertEqual(build_site(self.content, self.output, options).pages, 0)
+
+        # Profiled, parallel and memory-mapped builds expand includes the same way
+        for number, kwargs in enumerate([{"workers": 1, "profile": True}, {"workers": 2},
+                                         {"workers": 1, "mmap_threshold": 0}]):
+            other = os.path.join(self.tmp.name, f"other{number}")
+            build_site(self.content, other, BuildOptions(template=layout, **kwargs))
+            self.assertEqual(read_file(os.path.join(other, "blog", "post.html")),
+                             read_file(os.path.join(self.output, "blog", "post.html")))
+            deps = DependencyGraph.load(os.path.join(other, DEPENDENCY_GRAPH_NAME))
+            self.assertEqual(deps.dependents(snippet), {"blog/post.md"})
+
+    def test_lost_dependency_graph_renders_everything(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        os.remove(os.path.join(self.output, DEPENDENCY_GRAPH_NAME))
+        self.assertEqual(build_site(self.content, self.output, BuildOptions(workers=1)).pages, 2)
+        self.assertEqual(build_site(self.content, self.output, BuildOptions(workers=1)).pages, 0)
+
+    def test_link_check(self):
+        write_file(os.path.join(self.content, "about.md"), "[Gone](/gone.html) ![Logo](logo.png)\n")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.links.broken, [("about.md", "/gone.html"), ("about.md", "/logo.png")])
+        self.assertEqual(summary.links.orphans, ["about.md"])
+        self.assertIn("Links: 3 checked, 2 broken, 1 orphan pages", str(summary))
+
+        # Only the edited page's links are collected again
+        write_file(os.path.join(self.content, "blog", "post.md"), "Read [about](../about.html).\n")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.pages, 1)
+        self.assertEqual(summary.links.orphans, [])
+        self.assertEqual(len(summary.links.broken), 2)
+
+        # Pages skipped by a build are scanned if the graph lost them
+        os.remove(os.path.join(self.output, LINK_GRAPH_NAME))
+        summary = build_site(self.content, self.output, BuildOptions(workers=2))
+        self.assertEqual(summary.pages, 0)
+        self.assertEqual((len(summary.links.broken), summary.links.orphans), (2, []))
+
+        os.remove(os.path.join(self.content, "about.md"))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.links.broken, [("blog/post.md", "/about.html")])
+        self.assertNotIn("about.md", LinkGraph.load(os.path.join(self.output, LINK_GRAPH_NAME)).pages)
+
+    def test_link_check_disabled(self):
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, check_links=False))
+        self.assertIsNone(summary.links)
+        self.assertFalse(os.path.exists(os.path.join(self.output, LINK_GRAPH_NAME)))
+
+        # Links of pages rendered without checking are found again by the next check
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        write_file(os.path.join(self.content, "blog", "post.md"), "[Gone](/gone.html)\n")
+        build_site(self.content, self.output, BuildOptions(workers=1, check_links=False))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.pages, 0)
+        self.assertEqual(summary.links.broken, [("blog/post.md", "/gone.html")])
+
+    def test_missing_template(self):
+        with self.assertRaises(FileNotFoundError):
+            build_site(self.content, self.output,
+                       BuildOptions(template=os.path.join(self.tmp.name, "missing")))
+
+    def test_build_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        build_site(self.content, serial, BuildOptions(workers=1))
+        summary = build_site(self.content, self.output, BuildOptions(workers=2))
+        self.assertEqual(summary.workers, 2)
+        for page in ["index.html", os.path.join("blog", "post.html")]:
+            self.assertEqual(read_file(os.path.join(self.output, page)),
+                             read_file(os.path.join(serial, page)))
+
+    def test_incremental_rebuild_skips_unchanged(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual((summary.pages, summary.skipped, summary.removed), (0, 2, 0))
+
+    def test_incremental_rebuild_renders_changed(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        write_file(os.path.join(self.content, "blog", "post.md"), "An **edited** post.\n")
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual((summary.pages, summary.skipped), (1, 1))
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         "<div><p>An <b>edited</b> post.</p></div>")
+
+    def test_incremental_rebuild_touched_but_same_content(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        source = os.path.join(self.content, "index.md")
+        os.utime(source, ns=(0, 0))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual((summary.pages, summary.skipped), (0, 2))
+        self.assertEqual(Manifest.load(os.path.join(self.output, MANIFEST_NAME))
+                         .pages["index.md"]["mtime_ns"], 0)
+
+    def test_incremental_rebuild_removes_deleted(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "post.html")))
+        manifest = Manifest.load(os.path.join(self.output, MANIFEST_NAME))
+        self.assertEqual(list(manifest.pages), ["index.md"])
+
+    def test_incremental_rebuild_restores_missing_output(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        os.remove(os.path.join(self.output, "index.html"))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.pages, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.output, "index.html")))
+
+    def test_full_rebuild(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, full=True))
+        self.assertEqual((summary.pages, summary.skipped), (2, 0))
+
+    def test_full_rebuild_removes_deleted(self):
+        build_site(self.content, self.output, BuildOptions(workers=1))
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, full=True))
+        self.assertEqual((summary.pages, summary.removed), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "post.html")))
+        manifest = Manifest.load(os.path.join(self.output, MANIFEST_NAME))
+        self.assertEqual(list(manifest.pages), ["index.md"])
+
+    def test_inline_cache(self):
+        cache = os.path.join(self.tmp.name, "inline.sqlite")
+        first = build_site(self.content, self.output, BuildOptions(workers=1, inline_cache=cache))
+        self.assertEqual((first.cache_hits, first.cache_misses), (0, 3))
+        second = build_site(self.content, self.output, BuildOptions(workers=2, full=True,
+                                                                    inline_cache=cache))
+        self.assertEqual((second.cache_hits, second.cache_misses), (3, 0))
+        self.assertIn("Inline cache: 3 hits, 0 misses", str(second))
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         "<div><p>A <i>post</i>.</p></div>")
+
+    def test_page_errors(self):
+        broken = os.path.join(self.content, "broken.md")
+        write_file(broken, "{{ include _missing.md }}\n")
+        with open(os.path.join(self.content, "binary.md"), "wb") as f:
+            f.write(b"\xff\n")
+        # Parallel and memory-mapped builds report them the same way
+        for kwargs in [{"workers": 1}, {"workers": 2}, {"workers": 1, "mmap_threshold": 0}]:
+            summary = build_site(self.content, self.output, BuildOptions(full=True, **kwargs))
+            self.assertEqual(summary.pages, 2)
+            self.assertEqual([error.split(":")[0] for error in summary.errors],
+                             ["Failed to render binary.md", "Failed to render broken.md"])
+            self.assertIn("_missing.md", summary.errors[1])
+            self.assertIn("Failed to render 2 pages", str(summary))
+        self.assertEqual([name for name in os.listdir(self.output) if name.endswith(".tmp")], [])
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            status = main(["build", "--content", self.content, "--output", self.output,
+                           "--workers", "1"])
+        self.assertEqual(status, 1)
+        self.assertIn("Failed to render broken.md", stderr.getvalue())
+
+        # Failed pages are not in the manifest, so the next build tries them again
+        write_file(broken, "Fixed.\n")
+        os.remove(os.path.join(self.content, "binary.md"))
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual((summary.pages, summary.errors), (1, []))
+        self.assertEqual(read_file(os.path.join(self.output, "broken.html")),
+                         "<div><p>Fixed.</p></div>")
+
+    def test_missing_content_dir(self):
+        with self.assertRaises(FileNotFoundError):
+            build_site(os.path.join(self.tmp.name, "missing"), self.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
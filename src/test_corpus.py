@@ -0,0 +1,49 @@
+"""
+    Unit tests for corpus.py
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from blocks import markdown_to_html_node
+from corpus import CorpusSpec, generate_pages, generate_paragraph, generate_paragraphs, write_corpus
+from md_helpers import extract_markdown_images, extract_markdown_links
+
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        spec = CorpusSpec(pages=20, seed=7)
+        self.assertEqual(list(generate_pages(spec)), list(generate_pages(spec)))
+        self.assertNotEqual(list(generate_pages(spec)), list(generate_pages(CorpusSpec(pages=20))))
+
+    def test_paragraph_knobs(self):
+        rng = random.Random(0)
+        plain = generate_paragraph(rng, CorpusSpec(paragraph_words=50, markup_density=0))
+        self.assertEqual(len(plain.split()), 50)
+        self.assertNotIn("*", plain)
+
+        paragraphs = generate_paragraphs(CorpusSpec(pages=20, markup_density=0.5, link_ratio=1,
+                                                    image_ratio=0))
+        text = " ".join(paragraphs)
+        self.assertTrue(extract_markdown_links(text, strict=False))
+        self.assertFalse(extract_markdown_images(text, strict=False))
+        self.assertNotIn("**", text)
+
+    def test_nesting_depth(self):
+        paragraphs = generate_paragraphs(CorpusSpec(pages=5, markup_density=0.5, link_ratio=0,
+                                                    nesting_depth=3))
+        html = markdown_to_html_node(paragraphs).to_html()
+        self.assertRegex(html, r"<b>[^<]*<i>[^<]*<b>")
+
+    def test_write_corpus(self):
+        spec = CorpusSpec(pages=3, paragraphs=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_corpus(tmp, spec)
+            for path, markdown in generate_pages(spec):
+                with open(os.path.join(tmp, path), encoding="utf-8") as f:
+                    self.assertEqual(f.read(), markdown)
+
+
+if __name__ == "__main__":
+    unittest.main()
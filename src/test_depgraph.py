@@ -0,0 +1,145 @@
+"""
+    Unit tests for depgraph.py
+"""
+import os
+import tempfile
+import unittest
+
+from depgraph import DependencyGraph
+from test_build import write_file
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.layout = self.path("layout.html")
+        self.shared = [self.path(f"_snippets/s{index}.md") for index in range(10)]
+        for path in [self.layout, *self.shared]:
+            write_file(path, f"{path}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def fan_out(self, pages=200):
+        # Page n includes snippet n % 10, and every third page snippet 0 as
+        # well; every page reads the layout
+        graph = DependencyGraph()
+        for number in range(pages):
+            page = f"p{number}.md"
+            inputs = [self.layout, self.shared[number % 10]]
+            if number % 3 == 0:
+                inputs.append(self.shared[0])
+            graph.record(page, self.path(page), inputs)
+        return graph
+
+    def edit(self, path, text):
+        stat = os.stat(path)
+        write_file(path, text)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_affected_is_exactly_the_dependents(self):
+        graph = self.fan_out()
+        expected = {f"p{number}.md" for number in range(200) if number % 10 == 3}
+        self.assertEqual(graph.affected([self.shared[3]]), expected)
+        expected = {f"p{number}.md" for number in range(200) if number % 10 == 0 or number % 3 == 0}
+        self.assertEqual(graph.affected([self.shared[0]]), expected)
+        self.assertEqual(len(graph.affected([self.layout])), 200)
+        self.assertEqual(graph.affected([self.path("p7.md")]), {"p7.md"})
+        self.assertEqual(graph.affected([self.path("unrelated.md")]), set())
+        self.assertEqual(graph.affected([]), set())
+
+    def test_duplicate_inputs_are_kept_once(self):
+        graph = self.fan_out()
+        self.assertEqual(graph.pages["p0.md"], (self.path("p0.md"), self.layout, self.shared[0]))
+
+    def test_changed_inputs(self):
+        graph = self.fan_out()
+        self.assertEqual(graph.changed_inputs(), set())
+        self.edit(self.shared[4], "Edited.\n")
+        # Touched but unchanged files are not reported
+        os.utime(self.shared[5], ns=(0, 0))
+        self.assertEqual(graph.changed_inputs(), {self.shared[4]})
+        # A change is reported once
+        self.assertEqual(graph.changed_inputs(), set())
+        self.assertEqual(graph.states[self.shared[5]]["mtime_ns"], 0)
+
+    def test_deleted_and_recreated_input(self):
+        graph = self.fan_out()
+        os.remove(self.shared[6])
+        self.assertEqual(graph.changed_inputs(), {self.shared[6]})
+        self.assertEqual(graph.changed_inputs(), set())
+        write_file(self.shared[6], "Back.\n")
+        self.assertEqual(graph.changed_inputs(), {self.shared[6]})
+
+    def test_input_missing_when_recorded(self):
+        graph = DependencyGraph()
+        logo = self.path("static/logo.png")
+        graph.record("a.md", self.path("a.md"), [logo, self.path("static")])
+        self.assertEqual(graph.changed_inputs(), set())
+        write_file(logo, "png")
+        self.assertEqual(graph.changed_inputs(), {logo})
+        self.assertEqual(graph.affected([logo]), {"a.md"})
+
+    def test_record_replaces_inputs(self):
+        graph = self.fan_out(10)
+        graph.record("p1.md", self.path("p1.md"), [self.layout, self.shared[2]])
+        self.assertEqual(graph.dependents(self.shared[1]), set())
+        self.assertNotIn(self.shared[1], graph.states)
+        self.assertEqual(graph.dependents(self.shared[2]), {"p1.md", "p2.md"})
+
+    def test_remove_drops_unused_states(self):
+        graph = self.fan_out(10)
+        graph.remove("p3.md")
+        self.assertNotIn(self.shared[3], graph.states)
+        self.assertIn(self.layout, graph.states)
+        self.assertNotIn("p3.md", graph.affected([self.layout]))
+        for number in range(10):
+            graph.remove(f"p{number}.md")
+        self.assertEqual((graph.pages, graph.states, graph._dependents), ({}, {}, {}))
+
+    def test_sources_have_no_state(self):
+        graph = self.fan_out(10)
+        self.assertNotIn(self.path("p1.md"), graph.states)
+
+    def test_chain(self):
+        # a.md includes b, which includes c: a change to c reaches a
+        graph = DependencyGraph()
+        graph.record("a.md", self.path("a.md"), [self.shared[1], self.shared[2]])
+        graph.record("b.md", self.path("b.md"), [self.shared[2]])
+        self.edit(self.shared[2], "Edited.\n")
+        self.assertEqual(graph.affected(graph.changed_inputs()), {"a.md", "b.md"})
+
+    def test_save_and_load(self):
+        graph = self.fan_out()
+        path = self.path("public/.deps.json")
+        graph.save(path)
+        loaded = DependencyGraph.load(path)
+        self.assertEqual(loaded.pages, graph.pages)
+        self.assertEqual(loaded.states, graph.states)
+        for path in [self.layout, *self.shared]:
+            self.assertEqual(loaded.dependents(path), graph.dependents(path))
+
+    def test_load_missing_or_outdated(self):
+        path = self.path("deps.json")
+        self.assertEqual(DependencyGraph.load(path).pages, {})
+        write_file(path, '{"version": 0}')
+        self.assertEqual(DependencyGraph.load(path).pages, {})
+        write_file(path, "not json")
+        self.assertEqual(DependencyGraph.load(path).pages, {})
+
+    def test_load_damaged(self):
+        path = self.path("deps.json")
+        version = DependencyGraph.VERSION
+        for rest in ['', ', "inputs": [], "states": {}, "pages": {"a.md": [3]}',
+                     ', "inputs": ["a"], "states": {"0": {}}, "pages": {}']:
+            write_file(path, f'{{"version": {version}{rest}}}')
+            self.assertEqual((DependencyGraph.load(path).pages, DependencyGraph.load(path).states),
+                             ({}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+    Unit tests for escaping.py
+"""
+import unittest
+
+from escaping import Markup, escape_text, escape_attribute, escape_texts
+
+
+class TestEscaping(unittest.TestCase):
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a < b && c > d"), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(escape_text('"quoted" it\'s'), '"quoted" it\'s')
+
+    def test_escape_text_fast_path(self):
+        text = "nothing to escape here"
+        self.assertIs(escape_text(text), text)
+
+    def test_markup_is_not_escaped(self):
+        markup = Markup("<b>already &amp; escaped</b>")
+        self.assertIs(escape_text(markup), markup)
+        self.assertIs(escape_attribute(markup), markup)
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute('/q?a=1&b="2"'), "/q?a=1&amp;b=&quot;2&quot;")
+        self.assertEqual(escape_attribute("it's"), "it&#x27;s")
+        self.assertEqual(escape_attribute(42), "42")
+
+    def test_escape_texts(self):
+        values = ["plain", "a < b", Markup("<i>kept</i>"), "", "x & y"]
+        self.assertEqual(escape_texts(values),
+                         ["plain", "a &lt; b", "<i>kept</i>", "", "x &amp; y"])
+
+    def test_escape_texts_keeps_markup_subclasses(self):
+        class Trusted(Markup):
+            pass
+        value = Trusted("<i>kept</i>")
+        self.assertEqual(escape_texts(["a < b", value]), ["a &lt; b", escape_text(value)])
+
+    def test_escape_texts_nothing_to_escape(self):
+        self.assertEqual(escape_texts(["a", "b"]), ["a", "b"])
+        self.assertEqual(escape_texts([]), [])
+
+    def test_escape_texts_with_separator_in_value(self):
+        self.assertEqual(escape_texts(["a\0<", ">"]), ["a\0&lt;", "&gt;"])
+
+
+if __name__ == "__main__":
+    unittest.main()
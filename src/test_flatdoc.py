@@ -0,0 +1,84 @@
+"""
+    Unit tests for flatdoc.py
+"""
+import io
+import unittest
+
+from escaping import Markup
+from flatdoc import FlatDocument
+from htmlnode import HTMLNode, LeafNode, ParentNode
+
+
+class TestFlatDocument(unittest.TestCase):
+    def setUp(self):
+        self.tree = ParentNode("div", [
+            ParentNode("p", [LeafNode(value="Hello "),
+                             LeafNode("b", "world", {"class": "big"}),
+                             LeafNode("a", "Google", {"href": "https://www.google.com"})]),
+            ParentNode("ul", [ParentNode("li", [LeafNode(value="one")]),
+                              ParentNode("li", [LeafNode("b", "two", {"class": "big"})])]),
+            LeafNode("img", "", {"src": "/a.png", "alt": "A"}),
+        ], {"class": "page"})
+
+    def test_to_html_matches_tree(self):
+        doc = FlatDocument.from_node(self.tree)
+        self.assertEqual(doc.to_html(), self.tree.to_html())
+
+    def test_write_html(self):
+        out = io.StringIO()
+        FlatDocument.from_node(self.tree).write_html(out)
+        self.assertEqual(out.getvalue(), self.tree.to_html())
+
+    def test_round_trip(self):
+        doc = FlatDocument.from_node(self.tree)
+        self.assertEqual(doc.to_node(), self.tree)
+
+    def test_single_leaf(self):
+        leaf = LeafNode("p", "Hello")
+        doc = FlatDocument.from_node(leaf)
+        self.assertEqual(len(doc), 1)
+        self.assertEqual(doc.to_html(), "<p>Hello</p>")
+        self.assertEqual(doc.to_node(), leaf)
+
+    def test_structure_arrays(self):
+        doc = FlatDocument.from_node(self.tree)
+        self.assertEqual(len(doc), 11)
+        self.assertEqual(doc.children(0), [1, 5, 10])
+        self.assertEqual(doc.children(5), [6, 8])
+        self.assertEqual(list(doc.parents[:5]), [-1, 0, 1, 1, 1])
+        self.assertEqual(doc.value(3), "world")
+        self.assertEqual(doc.tags[doc.tag_ids[0]], "div")
+
+    def test_text_is_escaped_once(self):
+        tree = ParentNode("p", [LeafNode(value="a < b & c"), LeafNode("code", "<br>")])
+        doc = FlatDocument.from_node(tree)
+        self.assertEqual(doc.to_html(), "<p>a &lt; b &amp; c<code>&lt;br&gt;</code></p>")
+        self.assertEqual(doc.to_node().to_html(), tree.to_html())
+
+    def test_round_trip_of_escaped_text(self):
+        tree = ParentNode("p", [LeafNode(value="a < b & c"), LeafNode("code", "&lt;br&gt;"),
+                                LeafNode("span", Markup("<i>kept</i>"))])
+        node = FlatDocument.from_node(tree).to_node()
+        self.assertEqual(node, tree)
+        self.assertEqual([type(child.value) for child in node.children], [str, str, Markup])
+        self.assertEqual(node.to_html(), tree.to_html())
+
+    def test_props_are_interned(self):
+        doc = FlatDocument.from_node(self.tree)
+        self.assertEqual(doc.props_ids[3], doc.props_ids[9])
+        self.assertEqual(len(doc.props), 5)
+
+    def test_deep_tree(self):
+        node = LeafNode(value="deep")
+        for _ in range(5_000):
+            node = ParentNode("div", [node])
+        doc = FlatDocument.from_node(node)
+        self.assertEqual(doc.to_html(), node.to_html())
+
+    def test_rejects_other_nodes(self):
+        with self.assertRaises(TypeError):
+            FlatDocument.from_node(ParentNode("div", [HTMLNode("p", "Text")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
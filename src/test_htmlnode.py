@@ -2,8 +2,11 @@
     Unit test for htmlnode.py
 """
 
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from escaping import Markup
+from htmlnode import HTMLNode, LeafNode, ParentNode, FrozenNode, RenderCache, open_tag, \
+    escape_tree
 
 class TestHtmlNode(unittest.TestCase):
     """
@@ -77,6 +80,32 @@ class TestHtmlNode(unittest.TestCase):
         self.assertEqual(node.props_to_html(), 'class="one" id="two"')
         self.assertEqual(node2.props_to_html(), 'href="https://www.google.com" target="_blank"')
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode(tag='a', props={'href': '/q?a=1&b="2"', 'title': "<it's>"})
+        self.assertEqual(node.props_to_html(),
+                         'href="/q?a=1&amp;b=&quot;2&quot;" title="&lt;it&#x27;s&gt;"')
+
+    def test_open_tag(self):
+        self.assertEqual(open_tag('p'), '<p>')
+        self.assertEqual(open_tag('p', {}), '<p>')
+        self.assertEqual(open_tag('a', {'href': '/', 'class': 'x'}), '<a href="/" class="x">')
+        self.assertIs(open_tag('a', {'href': '/', 'class': 'x'}),
+                      open_tag('a', {'href': '/', 'class': 'x'}))
+        self.assertEqual(open_tag('img', {'src': 'a.png', 'alt': 'a & b'}),
+                         '<img src="a.png" alt="a &amp; b">')
+
+    def test_open_tag_markup_and_str_values(self):
+        # Equal text, but only the plain str is escaped; in either order
+        plain, markup = '<a href="a&amp;amp;b">', '<a href="a&amp;b">'
+        self.assertEqual([open_tag('a', {'href': 'a&amp;b'}),
+                          open_tag('a', {'href': Markup('a&amp;b')})], [plain, markup])
+        plain, markup = plain.replace('a', 'c', 1), markup.replace('a', 'c', 1)
+        self.assertEqual([open_tag('c', {'href': Markup('a&amp;b')}),
+                          open_tag('c', {'href': 'a&amp;b'})], [markup, plain])
+
+    def test_open_tag_unhashable_value(self):
+        self.assertEqual(open_tag('div', {'data-x': ['a']}), '<div data-x="[&#x27;a&#x27;]">')
+
 
 class TestLeafNode(unittest.TestCase):
     def test_default_constructor(self):
@@ -128,6 +157,14 @@ class TestLeafNode(unittest.TestCase):
                          '<a href="https://www.google.com">Google</a>')
 
 
+    def test_to_html_escapes_value(self):
+        self.assertEqual(LeafNode(tag="p", value="1 < 2 & 3").to_html(), "<p>1 &lt; 2 &amp; 3</p>")
+        self.assertEqual(LeafNode(value="<script>").to_html(), "&lt;script&gt;")
+
+    def test_to_html_markup_value(self):
+        self.assertEqual(LeafNode(tag="p", value=Markup("<br>")).to_html(), "<p><br></p>")
+
+
 class TestParentNode(unittest.TestCase):
     def test_default_constructor(self):
         Node = ParentNode(tag="div", children=[LeafNode(tag="p", value="Hello")])
@@ -208,5 +245,141 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(str(context.exception),
                          "Value is required for leaf nodes")
 
+
+class TestStreamingHtml(unittest.TestCase):
+    def setUp(self):
+        self.node = ParentNode(tag="div", props={"class": "page"}, children=[
+            ParentNode(tag="p", children=[LeafNode(value="Hello "),
+                                          LeafNode(tag="b", value="world")]),
+            LeafNode(tag="a", value="Google", props={'href': 'https://www.google.com'}),
+        ])
+
+    def test_iter_html_fragments(self):
+        self.assertEqual(list(self.node.iter_html()), [
+            '<div class="page">', '<p>', 'Hello ', '<b>world</b>', '</p>',
+            '<a href="https://www.google.com">Google</a>', '</div>'])
+
+    def test_write_html_matches_to_html(self):
+        out = io.StringIO()
+        self.node.write_html(out)
+        self.assertEqual(out.getvalue(), self.node.to_html())
+        self.assertEqual(out.getvalue(),
+                         '<div class="page"><p>Hello <b>world</b></p>'
+                         '<a href="https://www.google.com">Google</a></div>')
+
+    def test_write_html_leaf(self):
+        out = io.StringIO()
+        LeafNode(tag="p", value="Hello").write_html(out)
+        self.assertEqual(out.getvalue(), "<p>Hello</p>")
+
+    def test_deep_tree(self):
+        depth = 20_000
+        node = LeafNode(tag="span", value="deep")
+        for _ in range(depth):
+            node = ParentNode(tag="div", children=[node])
+        self.assertEqual(node.to_html(),
+                         "<div>" * depth + "<span>deep</span>" + "</div>" * depth)
+
+    def test_nested_siblings(self):
+        node = ParentNode(tag="ul", children=[
+            ParentNode(tag="li", children=[ParentNode(tag="ul", children=[
+                ParentNode(tag="li", children=[LeafNode(value="a")])])]),
+            ParentNode(tag="li", children=[LeafNode(value="b")]),
+            LeafNode(tag="li", value="c"),
+        ])
+        self.assertEqual(node.to_html(),
+                         "<ul><li><ul><li>a</li></ul></li><li>b</li><li>c</li></ul>")
+
+    def test_base_node_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode(tag="p", value="Text").write_html(io.StringIO())
+
+
+class TestEscapeTree(unittest.TestCase):
+    def test_escape_tree(self):
+        node = ParentNode("div", [LeafNode("p", "a < b"), ParentNode("p", [LeafNode(value="&")])])
+        expected = node.to_html()
+        self.assertIs(escape_tree(node), node)
+        self.assertIsInstance(node.children[0].value, Markup)
+        self.assertEqual(node.children[0].value, "a &lt; b")
+        self.assertEqual(node.to_html(), expected)
+        escape_tree(node)
+        self.assertEqual(node.to_html(), expected)
+
+
+def make_nav():
+    return ParentNode("nav", [
+        LeafNode("a", "Home", {"href": "/"}),
+        LeafNode("a", "Blog", {"href": "/blog/"}),
+    ], {"class": "site-nav"})
+
+
+class TestFrozenNode(unittest.TestCase):
+    def setUp(self):
+        self.cache = RenderCache()
+
+    def test_renders_like_original(self):
+        nav = make_nav()
+        self.assertEqual(nav.freeze(self.cache).to_html(), nav.to_html())
+
+    def test_identical_subtrees_render_once(self):
+        first = make_nav().freeze(self.cache)
+        second = make_nav().freeze(self.cache)
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        page = ParentNode("body", [first, LeafNode("p", "Text"), second])
+        self.assertEqual(page.to_html(),
+                         "<body>" + make_nav().to_html() + "<p>Text</p>" + make_nav().to_html() + "</body>")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.bytes_saved, len(make_nav().to_html()))
+
+    def test_different_subtrees(self):
+        other = make_nav()
+        other.props = {"class": "footer-nav"}
+        self.assertNotEqual(make_nav().freeze(self.cache), other.freeze(self.cache))
+
+    def test_snapshot_is_independent_of_original(self):
+        nav = make_nav()
+        frozen = nav.freeze(self.cache)
+        nav.children[0].value = "Changed"
+        nav.props["class"] = "changed"
+        self.assertEqual(frozen.to_html(), make_nav().to_html())
+
+    def test_immutable(self):
+        frozen = make_nav().freeze(self.cache)
+        with self.assertRaises(AttributeError):
+            frozen.tag = "div"
+        self.assertIs(frozen.freeze(), frozen)
+
+    def test_nested_frozen_nodes(self):
+        inner = make_nav().freeze(self.cache)
+        outer = ParentNode("header", [inner]).freeze(self.cache)
+        self.assertEqual(outer.to_html(), "<header>" + make_nav().to_html() + "</header>")
+        self.assertEqual(outer, ParentNode("header", [make_nav()]).freeze(self.cache))
+
+    def test_markup_and_str_values_are_different_subtrees(self):
+        # Equal text, but only the plain str is escaped; in either order
+        for values in (["<i>x</i>", Markup("<i>x</i>")], [Markup("<i>y</i>"), "<i>y</i>"]):
+            nodes = [LeafNode("b", value, {"title": value}).freeze(self.cache) for value in values]
+            self.assertNotEqual(nodes[0], nodes[1])
+            self.assertEqual([node.to_html() for node in nodes],
+                             [LeafNode("b", value, {"title": value}).to_html() for value in values])
+
+    def test_cache_is_bounded(self):
+        cache = RenderCache(max_bytes=30)
+        for i in range(5):
+            LeafNode("p", f"paragraph {i}").freeze(cache).to_html()
+        self.assertEqual(len(cache), 1)
+        LeafNode("p", "x" * 100).freeze(cache).to_html()
+        self.assertEqual(len(cache), 1)
+
+    def test_rejects_other_nodes(self):
+        with self.assertRaises(TypeError):
+            ParentNode("div", [HTMLNode("p", "Text")]).freeze()
+
+    def test_default_cache(self):
+        self.assertIsInstance(LeafNode("p", "Hello").freeze(), FrozenNode)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+"""
+    Unit tests for includes.py
+"""
+import os
+import tempfile
+import unittest
+
+from includes import expand_includes, resolve_include
+from test_build import write_file
+
+
+class TestIncludes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, "blog", "post.md")
+        write_file(os.path.join(self.root, "_snippets", "note.md"), "> A note.\n")
+        write_file(os.path.join(self.root, "blog", "_aside.md"),
+                   "Aside.\n{{ include /_snippets/note.md }}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expand(self, lines, reads=None):
+        return list(expand_includes(lines, self.page, self.root, reads))
+
+    def test_resolve_include(self):
+        self.assertEqual(resolve_include("_aside.md", self.page, self.root),
+                         os.path.join(self.root, "blog", "_aside.md"))
+        self.assertEqual(resolve_include("/_snippets/note.md", self.page, self.root),
+                         os.path.join(self.root, "_snippets", "note.md"))
+        self.assertEqual(resolve_include("../_snippets/note.md", self.page, self.root),
+                         os.path.join(self.root, "_snippets", "note.md"))
+
+    def test_outside_root(self):
+        with self.assertRaises(ValueError):
+            resolve_include("../../secret.md", self.page, self.root)
+        with self.assertRaises(ValueError):
+            self.expand(["{{ include /../secret.md }}"])
+
+    def test_nested_includes(self):
+        reads = []
+        lines = self.expand(["# Post", "", "{{include _aside.md}}", "", "End."], reads)
+        self.assertEqual(lines, ["# Post", "", "Aside.\n", "> A note.\n", "", "End."])
+        self.assertEqual(reads, [os.path.join(self.root, "blog", "_aside.md"),
+                                 os.path.join(self.root, "_snippets", "note.md")])
+
+    def test_only_whole_lines(self):
+        lines = ["Write {{ include _aside.md }} on its own line.", "{{ title }}"]
+        self.assertEqual(self.expand(lines), lines)
+
+    def test_code_blocks_are_left_alone(self):
+        lines = ["```", "{{ include _aside.md }}", "```", "{{ include /_snippets/note.md }}"]
+        self.assertEqual(self.expand(lines), lines[:3] + ["> A note.\n"])
+
+    def test_cycle(self):
+        write_file(os.path.join(self.root, "_snippets", "note.md"), "{{ include /blog/_aside.md }}\n")
+        with self.assertRaises(ValueError):
+            self.expand(["{{ include _aside.md }}"])
+
+    def test_missing_file(self):
+        with self.assertRaises(OSError):
+            self.expand(["{{ include _missing.md }}"])
+
+
+if __name__ == "__main__":
+    unittest.main()
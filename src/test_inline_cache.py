@@ -0,0 +1,79 @@
+"""
+    Unit tests for inline_cache.py
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from inline_cache import InlineCache
+from md_helpers import text_to_textnodes
+
+
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "inline.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        text = "Some **bold** and a [link](/a.html)"
+        with InlineCache(self.path) as cache:
+            self.assertEqual(cache.parse(text), text_to_textnodes(text))
+            self.assertEqual(cache.parse(text), text_to_textnodes(text))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_persists_across_instances(self):
+        text = "An ![image](/a.png) with `code`"
+        with InlineCache(self.path) as cache:
+            cache.parse(text)
+        with InlineCache(self.path) as cache:
+            self.assertEqual(cache.parse(text), text_to_textnodes(text))
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_parser_version_in_key(self):
+        self.assertNotEqual(InlineCache.key("text"), InlineCache.key("other"))
+        self.assertEqual(InlineCache.key("text"), InlineCache.key("text"))
+        key = InlineCache.key("text")
+        with mock.patch("md_helpers.PARSER_VERSION", "new"):
+            self.assertNotEqual(InlineCache.key("text"), key)
+        self.assertEqual(InlineCache.key("text"), key)
+
+    def test_flush_does_not_sum_the_table(self):
+        statements = []
+        with InlineCache(self.path) as cache:
+            cache._db.set_trace_callback(statements.append)
+            for index in range(50):
+                cache.parse(f"paragraph {index}")
+                cache.flush()
+        # Once on the first flush and once more on close
+        self.assertEqual(sum("SUM(size)" in statement for statement in statements), 2)
+
+    def test_errors_are_not_cached(self):
+        with InlineCache(self.path) as cache:
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    cache.parse("an *unclosed delimiter")
+            self.assertEqual(cache.misses, 2)
+
+    def test_lru_eviction(self):
+        with InlineCache(self.path, max_bytes=120) as cache:
+            cache.parse("first paragraph with plenty of text in it")
+            cache.flush()
+            cache.parse("second paragraph with plenty of text in it")
+            cache.flush()
+            # Using the first entry makes the second the least recently used
+            cache.parse("first paragraph with plenty of text in it")
+            cache.flush()
+            cache.parse("third paragraph with plenty of text in it")
+        with InlineCache(self.path, max_bytes=120) as cache:
+            cache.parse("first paragraph with plenty of text in it")
+            cache.parse("third paragraph with plenty of text in it")
+            cache.parse("second paragraph with plenty of text in it")
+            self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+    Unit tests for inline_tree.py
+"""
+import sys
+import unittest
+
+from inline_tree import text_to_inline_nodes
+from md_helpers import text_to_textnodes
+from textnode import text_nodes_to_html
+
+
+def render(text):
+    return "".join(node.to_html() for node in text_to_inline_nodes(text))
+
+
+def parser_steps(text):
+    # Counts the lines the parser runs for text: a measure of its work that,
+    # unlike the time it takes, does not depend on the load of the machine
+    steps = 0
+    parser_file = text_to_inline_nodes.__code__.co_filename
+
+    def trace(frame, event, arg):
+        nonlocal steps
+        if frame.f_code.co_filename != parser_file:
+            return None
+        steps += event == "line"
+        return trace
+
+    sys.settrace(trace)
+    try:
+        text_to_inline_nodes(text)
+    finally:
+        sys.settrace(None)
+    return steps
+
+
+class TestInlineTree(unittest.TestCase):
+    def test_nested_emphasis(self):
+        self.assertEqual(render("**bold *italic* bold**"), "<b>bold <i>italic</i> bold</b>")
+        self.assertEqual(render("*italic **bold** italic*"), "<i>italic <b>bold</b> italic</i>")
+        self.assertEqual(render("**bold *italic***"), "<b>bold <i>italic</i></b>")
+        self.assertEqual(render("***both***"), "<i><b>both</b></i>")
+
+    def test_overlapping_runs(self):
+        self.assertEqual(render("**a*"), "*<i>a</i>")
+        self.assertEqual(render("*a**"), "<i>a</i>*")
+        self.assertEqual(render("*a **b* c**"), "<i>a <i><i>b</i> c</i></i>")
+
+    def test_unmatched_delimiters_are_text(self):
+        self.assertEqual(render("*open"), "*open")
+        self.assertEqual(render("a * b ** c"), "a * b ** c")
+        self.assertEqual(render("2 * 3 = 6"), "2 * 3 = 6")
+        self.assertEqual(render("tick ` and *em*"), "tick ` and <i>em</i>")
+
+    def test_rule_of_three(self):
+        self.assertEqual(render("*foo**bar**baz*"), "<i>foo<b>bar</b>baz</i>")
+        self.assertEqual(render("*foo**bar*"), "<i>foo**bar</i>")
+
+    def test_code_links_and_images(self):
+        self.assertEqual(render("**`a*b` [link](https://boot.dev)** ![img](x.png)"),
+                         '<b><code>a*b</code> <a href="https://boot.dev">link</a></b> '
+                         '<img src="x.png" alt="img"></img>')
+
+    def test_matches_flat_parser(self):
+        for text in ["plain text", "a **bold** and *italic* and `code`",
+                     "[link](https://boot.dev) and ![image](a.png)", "x < y & z", ""]:
+            with self.subTest(text=text):
+                self.assertEqual(render(text), text_nodes_to_html(text_to_textnodes(text)))
+
+    def test_adversarial_input_is_linear(self):
+        for unit in ["*a ", "a* ", "**a *b ", "*"]:
+            with self.subTest(unit=unit):
+                small = parser_steps(unit * 1_000)
+                large = parser_steps(unit * 10_000)
+                # Ten times the input, about ten times the work
+                self.assertLess(large, small * 11)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+    Unit tests for linkgraph.py
+"""
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from linkgraph import LinkGraph, collect_links, internal_path, scan_links
+
+
+class TestInternalPath(unittest.TestCase):
+    def test_resolves_against_page_dir(self):
+        self.assertEqual(internal_path("img.png", "blog"), "/blog/img.png")
+        self.assertEqual(internal_path("../x.html?a=1#top", "blog/2024"), "/blog/x.html")
+        self.assertEqual(internal_path("/about.html", "blog"), "/about.html")
+        self.assertEqual(internal_path("/blog/", ""), "/blog/")
+        self.assertEqual(internal_path("/", "blog"), "/")
+
+    def test_external(self):
+        for url in ("https://boot.dev", "mailto:a@b.c", "data:image/png;base64,AA", "#top",
+                    "?page=2", "//cdn.example.com/x.js", ""):
+            with self.subTest(url=url):
+                self.assertIsNone(internal_path(url))
+
+
+class TestCollectLinks(unittest.TestCase):
+    def test_collect_links(self):
+        node = ParentNode("p", [
+            LeafNode("a", "one", {"href": "/one.html"}),
+            ParentNode("b", [LeafNode("img", "", {"src": "i.png", "alt": "i"})]),
+            LeafNode(None, "text"),
+        ])
+        urls = []
+        self.assertIs(collect_links(node, urls), node)
+        self.assertEqual(urls, ["/one.html", "i.png"])
+
+    def test_scan_links_skips_code(self):
+        lines = ["See [a](a.html) and ![b](b.png).", "", "```", "[c](c.html)", "```"]
+        self.assertEqual(scan_links(lines), ["a.html", "b.png"])
+
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = LinkGraph()
+        self.graph.set_page("index.md", ["/blog/post.html", "about.html", "https://x.y",
+                                         "/blog/post.html#top"])
+        self.graph.set_page("blog/post.md", ["../index.html", "img.png", "missing.html"])
+        self.graph.set_page("about.md", [])
+        self.outputs = {"index.md": "index.html", "blog/post.md": "blog/post.html",
+                        "about.md": "about.html", "lonely.md": "lonely.html"}
+
+    def test_interned_edges(self):
+        self.assertEqual(self.graph.links("index.md"), ["/blog/post.html", "/about.html"])
+        self.assertEqual(self.graph.links("blog/post.md"),
+                         ["/index.html", "/blog/img.png", "/blog/missing.html"])
+        self.assertEqual(self.graph.pages["index.md"].typecode, "I")
+        self.assertEqual(len(self.graph.urls), 5)
+
+    def test_check(self):
+        report = self.graph.check(self.outputs, {"/blog/img.png"})
+        self.assertEqual(report.broken, [("blog/post.md", "/blog/missing.html")])
+        self.assertEqual(report.orphans, ["lonely.md"])
+        self.assertEqual((report.pages, report.links), (4, 5))
+        self.assertIn("1 broken, 1 orphan pages", str(report))
+        self.assertIn("broken link on blog/post.md: /blog/missing.html", str(report))
+
+    def test_directory_links(self):
+        self.graph.set_page("about.md", ["/blog/", "/blog", "/", "/docs/"])
+        self.outputs["blog/index.md"] = "blog/index.html"
+        report = self.graph.check(self.outputs, {"/blog/img.png"})
+        self.assertEqual(report.broken, [("about.md", "/docs/"),
+                                         ("blog/post.md", "/blog/missing.html")])
+        self.assertNotIn("blog/index.md", report.orphans)
+
+    def test_self_links_do_not_count(self):
+        self.graph.set_page("lonely.md", ["lonely.html#section"])
+        self.assertEqual(self.graph.check(self.outputs, {"/blog/img.png"}).orphans, ["lonely.md"])
+
+    def test_incremental_update(self):
+        self.graph.set_page("about.md", ["lonely.html"])
+        self.graph.remove_page("blog/post.md")
+        del self.outputs["blog/post.md"]
+        report = self.graph.check(self.outputs)
+        self.assertEqual(report.broken, [("index.md", "/blog/post.html")])
+        self.assertEqual(report.orphans, [])
+
+    def test_details_limit(self):
+        self.graph.set_page("about.md", [f"/gone{i}.html" for i in range(5)])
+        details = self.graph.check(self.outputs, {"/blog/img.png"}).details(2)
+        self.assertIn("... and 4 more broken links", details)
+        problems = self.graph.check(self.outputs, {"/blog/img.png"}).problems(2)
+        self.assertNotIn("Checked", problems)
+        self.assertEqual(problems.splitlines()[0], details.splitlines()[1])
+
+    def test_save_and_load(self):
+        self.graph.set_page("blog/post.md", ["../index.html"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "links.json")
+            self.graph.save(path)
+            loaded = LinkGraph.load(path)
+        # Paths no page links to any more are not saved
+        self.assertEqual(len(loaded.urls), 3)
+        for page in self.graph.pages:
+            self.assertEqual(loaded.links(page), self.graph.links(page))
+        loaded.set_page("new.md", ["/index.html"])
+        self.assertEqual(len(loaded.urls), 3)
+
+    def test_load_missing(self):
+        self.assertEqual(LinkGraph.load("/nonexistent/links.json").pages, {})
+
+    def test_load_damaged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "links.json")
+            version = LinkGraph.VERSION
+            for text in [f'{{"version": {version}}}',
+                         f'{{"version": {version}, "urls": [], "pages": {{"a.md": [-1]}}}}']:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                self.assertEqual(LinkGraph.load(path).pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
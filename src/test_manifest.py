@@ -0,0 +1,51 @@
+"""
+    Unit tests for manifest.py
+"""
+import os
+import tempfile
+import unittest
+
+from manifest import Manifest, hash_bytes, hash_file
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "public", ".manifest.json")
+        self.source = os.path.join(self.tmp.name, "page.md")
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write("# Page\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file(self):
+        self.assertEqual(hash_file(self.source), hash_bytes(b"# Page\n"))
+
+    def test_round_trip(self):
+        manifest = Manifest()
+        stat = os.stat(self.source)
+        manifest.record("page.md", stat, hash_file(self.source), "t1", "page.html")
+        manifest.save(self.path)
+        loaded = Manifest.load(self.path)
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertTrue(loaded.is_fresh("page.md", stat, "t1"))
+        self.assertFalse(loaded.is_fresh("page.md", stat, "t2"))
+        self.assertFalse(loaded.is_fresh("other.md", stat, "t1"))
+
+    def test_load_missing_or_invalid(self):
+        self.assertEqual(Manifest.load(self.path).pages, {})
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("not json")
+        self.assertEqual(Manifest.load(self.path).pages, {})
+
+    def test_load_other_version(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"version": 0, "pages": {"page.md": {}}}')
+        self.assertEqual(Manifest.load(self.path).pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+    Unit tests for mapped.py
+"""
+import os
+import tempfile
+import unittest
+
+from blocks import iter_blocks
+from manifest import hash_bytes
+from mapped import hash_mapped, iter_mapped_lines, map_file, mapped_title
+from template import extract_title
+from test_build import write_file
+
+SAMPLE = ("# Title\r\n\nA paragraph\nwith two lines.\n\n\n```\ncode\n\n  indented\n```\n"
+          "- one\n- two\n\n> quote ünïcode\n")
+
+
+def file_lines(data):
+    # The lines of iterating over a binary file, decoded
+    return [line.decode("utf-8").rstrip("\r\n") for line in data.splitlines(keepends=True)]
+
+
+class TestMappedLines(unittest.TestCase):
+    def test_lines_match_file_iteration(self):
+        data = SAMPLE.encode("utf-8")
+        for window_size in (1, 2, 3, 7, 16, 1024):
+            with self.subTest(window_size=window_size):
+                lines = [line.rstrip("\r") for line in iter_mapped_lines(data, window_size)]
+                self.assertEqual(lines, file_lines(data))
+
+    def test_blocks_match(self):
+        data = SAMPLE.encode("utf-8")
+        self.assertEqual(list(iter_blocks(iter_mapped_lines(data, 8))),
+                         list(iter_blocks(data.decode("utf-8").splitlines())))
+
+    def test_no_trailing_newline(self):
+        self.assertEqual(list(iter_mapped_lines(b"a\n\nb", 2)), ["a", "", "b"])
+        self.assertEqual(list(iter_mapped_lines(b"")), [])
+
+    def test_multibyte_characters_are_not_split(self):
+        data = ("é" * 10 + "\n") * 5
+        self.assertEqual(list(iter_mapped_lines(data.encode("utf-8"), 3)), ["é" * 10] * 5)
+
+    def test_invalid_utf8(self):
+        with self.assertRaises(UnicodeDecodeError):
+            list(iter_mapped_lines(b"ok\n\xff\n"))
+
+    def test_mapped_title(self):
+        for text in (SAMPLE, "intro\n  # Spaced  \n# Second\n", "## Sub\n#tag\n", ""):
+            with self.subTest(text=text):
+                self.assertEqual(mapped_title(text.encode("utf-8")),
+                                 extract_title(text.split("\n")))
+
+
+class TestMapFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_map_file(self):
+        path = os.path.join(self.tmp.name, "page.md")
+        write_file(path, SAMPLE)
+        with map_file(path) as data:
+            self.assertEqual(data[:7], b"# Title")
+            self.assertEqual(len(data), len(SAMPLE.encode("utf-8")))
+
+    def test_hash_mapped(self):
+        path = os.path.join(self.tmp.name, "page.md")
+        write_file(path, SAMPLE * 1000)
+        with map_file(path) as data:
+            self.assertEqual(hash_mapped(data, 4096), hash_bytes((SAMPLE * 1000).encode("utf-8")))
+            # The pages released while hashing can still be read
+            self.assertEqual(list(iter_mapped_lines(data, 4096))[:2], ["# Title\r", ""])
+        self.assertEqual(hash_mapped(b""), hash_bytes(b""))
+
+    def test_empty_file(self):
+        path = os.path.join(self.tmp.name, "empty.md")
+        write_file(path, "")
+        with map_file(path) as data:
+            self.assertEqual(data, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
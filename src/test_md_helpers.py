@@ -1,6 +1,8 @@
 import unittest
 from textnode import TextNode, TextType
-from md_helpers import split_nodes_delimiter, extract_markdown_links, extract_markdown_images
+from md_helpers import split_nodes_delimiter, extract_markdown_links, extract_markdown_images, \
+    text_to_textnodes, split_nodes_inline, extract_markdown_links_and_images, \
+    split_nodes_links_and_images, split_nodes_image, split_nodes_link, MarkdownLink
 
 class TestMarkdownParser(unittest.TestCase):
     def test_bold_at_start(self):
@@ -311,5 +313,156 @@ class TestMarkdownParser(unittest.TestCase):
         except ValueError as e:
             assert str(e) == "Text does not contain a valid Markdown link pattern: https://example.com is a plain URL."
 
+    def test_extract_no_raise(self):
+        """Test that strict=False returns an empty list instead of raising"""
+        self.assertEqual(extract_markdown_images("No images", strict=False), [])
+        self.assertEqual(extract_markdown_links("No links", strict=False), [])
+
+
+class TestLinksAndImages(unittest.TestCase):
+    def test_extract_links_and_images(self):
+        text = "An ![cat](cat.png) and a [dog](dog.html)."
+        self.assertEqual(extract_markdown_links_and_images(text), [
+            MarkdownLink(TextType.IMAGE, "cat", "cat.png", 3, 18),
+            MarkdownLink(TextType.LINK, "dog", "dog.html", 25, 40),
+        ])
+        link = extract_markdown_links_and_images(text)[1]
+        self.assertEqual(text[link.start:link.end], "[dog](dog.html)")
+
+    def test_extract_matches_separate_extractors(self):
+        text = """
+        Here is an image: ![alt text](https://example.com/image.jpg)
+        and here is a link: [link](https://example.com) and [](), ![]().
+        """
+        found = extract_markdown_links_and_images(text)
+        self.assertEqual([(m.text, m.url) for m in found if m.text_type == TextType.IMAGE],
+                         extract_markdown_images(text))
+        self.assertEqual([(m.text, m.url) for m in found if m.text_type == TextType.LINK],
+                         extract_markdown_links(text))
+
+    def test_extract_nothing(self):
+        self.assertEqual(extract_markdown_links_and_images("plain [text] only"), [])
+
+    def test_split_nodes_image(self):
+        node = TextNode("Image ![one](a.png) then ![two](b.png)", TextType.TEXT)
+        self.assertEqual(split_nodes_image([node]), [
+            TextNode("Image ", TextType.TEXT),
+            TextNode("one", TextType.IMAGE, "a.png"),
+            TextNode(" then ", TextType.TEXT),
+            TextNode("two", TextType.IMAGE, "b.png"),
+        ])
+
+    def test_split_nodes_link(self):
+        node = TextNode("[home](/) keeps ![pic](p.png) and [about](/about) text", TextType.TEXT)
+        self.assertEqual(split_nodes_link([node]), [
+            TextNode("home", TextType.LINK, "/"),
+            TextNode(" keeps ![pic](p.png) and ", TextType.TEXT),
+            TextNode("about", TextType.LINK, "/about"),
+            TextNode(" text", TextType.TEXT),
+        ])
+
+    def test_split_links_and_images_passthrough(self):
+        nodes = [TextNode("no links", TextType.TEXT),
+                 TextNode("[bold](/x)", TextType.BOLD),
+                 TextNode("only ![pic](p.png)", TextType.TEXT)]
+        result = split_nodes_link(nodes)
+        self.assertIs(result[0], nodes[0])
+        self.assertIs(result[1], nodes[1])
+        self.assertIs(result[2], nodes[2])
+
+    def test_split_links_and_images_together(self):
+        node = TextNode("![pic](p.png)[home](/)", TextType.TEXT)
+        self.assertEqual(split_nodes_links_and_images([node]), [
+            TextNode("pic", TextType.IMAGE, "p.png"),
+            TextNode("home", TextType.LINK, "/"),
+        ])
+
+
+def chained_split(nodes):
+    """Reference pipeline: one split_nodes_delimiter pass per delimiter."""
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    return split_nodes_delimiter(nodes, "`", TextType.CODE)
+
+
+class TestInlineTokenizer(unittest.TestCase):
+    def test_matches_chained_split(self):
+        """Test the tokenizer against chained split_nodes_delimiter calls"""
+        texts = [
+            "**Bold text** after",
+            "Text with **bold words** here",
+            "Text with **bold text**",
+            "**First bold** middle **second bold** end",
+            "Start **first bold** middle **second bold** end",
+            "*Italic text* after",
+            "Text with `code block` here",
+            "Text with no delimiters",
+            "Before ** ** after",
+            "Start ** **",
+            "Middle **  ** here",
+            "End ****",
+            "",
+            "  ",
+            "**bold**",
+            "Mixed **bold**, *italic* and `code` in one line",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(text_to_textnodes(text),
+                                 chained_split([TextNode(text, TextType.TEXT)]))
+
+    def test_split_nodes_inline_matches_chained_split(self):
+        """Test split_nodes_inline on a mixed list of nodes"""
+        nodes = [
+            TextNode("Start **bold**", TextType.TEXT),
+            TextNode("Already bold", TextType.BOLD),
+            TextNode("More *italic* and `code` here", TextType.TEXT),
+            TextNode("", TextType.TEXT),
+            TextNode("Code block", TextType.CODE)
+        ]
+        self.assertEqual(split_nodes_inline(nodes), chained_split(nodes))
+
+    def test_links_and_images(self):
+        """Test links and images are tokenized in the same pass"""
+        result = text_to_textnodes(
+            "An ![image](https://example.com/a.png) and a [link](https://example.com) *here*")
+        self.assertEqual(result, [
+            TextNode("An ", TextType.TEXT),
+            TextNode("image", TextType.IMAGE, "https://example.com/a.png"),
+            TextNode(" and a ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "https://example.com"),
+            TextNode(" ", TextType.TEXT),
+            TextNode("here", TextType.ITALIC),
+        ])
+
+    def test_unmatched_brackets_are_text(self):
+        """Test that '!' and '[' without a full link are left as text"""
+        result = text_to_textnodes("Wow! [not a link] [x](")
+        self.assertEqual(result, [TextNode("Wow! [not a link] [x](", TextType.TEXT)])
+
+    def test_code_is_literal(self):
+        """Test that delimiters inside a code span are not interpreted"""
+        result = text_to_textnodes("Use `a * b ** c` here")
+        self.assertEqual(result, [
+            TextNode("Use ", TextType.TEXT),
+            TextNode("a * b ** c", TextType.CODE),
+            TextNode(" here", TextType.TEXT),
+        ])
+
+    def test_spans_match_copies(self):
+        text = "A **  bold ** and *it* with `code` [link](u) ![img](v) tail"
+        spans = text_to_textnodes(text, spans=True)
+        self.assertEqual(spans, text_to_textnodes(text))
+        self.assertTrue(all(node.source is text for node in spans))
+
+    def test_unclosed_delimiters(self):
+        """Test unclosed delimiters raise like split_nodes_delimiter"""
+        for text in ["Text with **bold but no closing", "an *italic", "some `code",
+                     "*italic **bold** italic*"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    text_to_textnodes(text)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
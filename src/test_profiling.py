@@ -0,0 +1,70 @@
+"""
+    Unit tests for profiling.py
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from build import BuildOptions, build_site
+from profiling import PAGE_STAGES, PageProfile, run_cprofile
+from render import PageRenderer
+from test_build import write_file
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.output = os.path.join(self.tmp.name, "public")
+        write_file(os.path.join(self.content, "index.md"),
+                   "# Home\n\nSome **bold** and a [link](/a.html).\n\n- one\n- two\n")
+        write_file(os.path.join(self.content, "blog", "post.md"), "A *post*.\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_profiled_render_matches_render(self):
+        renderer = PageRenderer(self.content)
+        profiled = renderer.render_html("index.md", profile=PageProfile("index.md"))
+        result = renderer.render_html("index.md")
+        self.assertEqual(profiled.html, result.html)
+        self.assertEqual(profiled.content_hash, result.content_hash)
+        profile = profiled.profile
+        self.assertEqual(set(profile.stages), set(PAGE_STAGES))
+        self.assertEqual((profile.blocks, profile.bytes), (3, len(result.html)))
+        # h1 + text, p + 5 inline leaves, ul + 2 * (li + text)
+        self.assertEqual(profile.nodes, 13)
+        self.assertGreaterEqual(profile.seconds, sum(profile.stages.values()) * 0.99)
+
+    def test_build_profile(self):
+        summary = build_site(self.content, self.output, BuildOptions(workers=1, profile=True))
+        profile = summary.profile
+        self.assertEqual(sorted(page.page for page in profile.pages), ["blog/post.md", "index.md"])
+        self.assertEqual(set(profile.stages),
+                         {"assets", "discover", "render", "write", "finish", "links"})
+        self.assertEqual(profile.slowest(1), profile.slowest()[:1])
+
+        path = os.path.join(self.tmp.name, "profile.json")
+        profile.save(path, count=1)
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report["totals"]["pages"], 2)
+        self.assertEqual(report["totals"]["bytes"], summary.bytes_written)
+        self.assertEqual(len(report["slowest"]), 1)
+        self.assertIn(report["slowest"][0], profile.table(1))
+
+    def test_profile_is_off_by_default(self):
+        self.assertIsNone(build_site(self.content, self.output, BuildOptions(workers=1)).profile)
+
+    def test_run_cprofile(self):
+        path = os.path.join(self.tmp.name, "build.prof")
+        summary, report = run_cprofile(path, build_site, self.content, self.output,
+                                       BuildOptions(workers=1))
+        self.assertEqual(summary.pages, 2)
+        self.assertTrue(os.path.getsize(path) > 0)
+        self.assertIn("build_site", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+    Unit tests for serve.py
+"""
+import contextlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from build import BuildOptions, build_site, MANIFEST_NAME
+from linkgraph import LINK_GRAPH_NAME, LinkGraph
+from manifest import Manifest
+from serve import DevSite, Watcher
+from test_build import read_file, write_file
+
+
+def touch(path, text):
+    # Write and move the mtime forward, in case the clock did not advance
+    stat = os.stat(path) if os.path.exists(path) else None
+    write_file(path, text)
+    if stat is not None:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write_file(os.path.join(self.root, "index.md"), "# Home\n")
+        write_file(os.path.join(self.root, "blog", "post.md"), "A post.\n")
+        write_file(os.path.join(self.root, "notes.txt"), "not markdown")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot(self):
+        self.assertEqual(sorted(Watcher(self.root).snapshot), ["blog/post.md", "index.md"])
+
+    def test_underscore_paths_are_not_walked(self):
+        write_file(os.path.join(self.root, "_snippets", "note.md"), "A note.\n")
+        write_file(os.path.join(self.root, "blog", "_aside.md"), "An aside.\n")
+        self.assertEqual(sorted(Watcher(self.root).snapshot), ["blog/post.md", "index.md"])
+
+    def test_entries_removed_during_a_poll(self):
+        watcher = Watcher(self.root)
+        scandir = os.scandir
+
+        def scandir_then_delete(path):
+            # List the root, then delete a file and a directory it listed
+            entries = list(scandir(path))
+            if path == self.root:
+                os.remove(os.path.join(self.root, "index.md"))
+                shutil.rmtree(os.path.join(self.root, "blog"))
+            return contextlib.nullcontext(entries)
+
+        with mock.patch("serve.os.scandir", scandir_then_delete):
+            changed, removed = watcher.poll()
+        self.assertEqual((changed, sorted(removed)), ([], ["blog/post.md", "index.md"]))
+
+    def test_poll(self):
+        watcher = Watcher(self.root)
+        self.assertEqual(watcher.poll(), ([], []))
+        touch(os.path.join(self.root, "blog", "post.md"), "A changed post.\n")
+        write_file(os.path.join(self.root, "new.md"), "New.\n")
+        os.remove(os.path.join(self.root, "index.md"))
+        changed, removed = watcher.poll()
+        self.assertEqual(sorted(changed), ["blog/post.md", "new.md"])
+        self.assertEqual(removed, ["index.md"])
+        self.assertEqual(watcher.poll(), ([], []))
+
+
+class TestDevSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.output = os.path.join(self.tmp.name, "public")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.\n")
+        write_file(os.path.join(self.content, "blog", "post.md"), "A *post*.\n")
+        self.site = DevSite(self.content, self.output)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_initial_build(self):
+        self.assertEqual(self.site.summary.pages, 2)
+        self.assertEqual(self.site.refresh(), [])
+
+    def test_refresh_renders_changed_page(self):
+        touch(os.path.join(self.content, "index.md"), "# Home\n\nWelcome **back**.\n\n- a\n- b\n")
+        rebuilds = self.site.refresh()
+        self.assertEqual([rebuild.page for rebuild in rebuilds], ["index.md"])
+        self.assertFalse(rebuilds[0].removed)
+        self.assertIn("Rebuilt index.md", str(rebuilds[0]))
+
+        expected = os.path.join(self.tmp.name, "expected")
+        build_site(self.content, expected, BuildOptions(workers=1))
+        self.assertEqual(read_file(os.path.join(self.output, "index.html")),
+                         read_file(os.path.join(expected, "index.html")))
+
+    def test_unchanged_blocks_are_reused(self):
+        touch(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.\n\nMore.\n")
+        self.site.refresh()
+        blocks = dict(self.site._blocks)
+        touch(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.\n\nMore text.\n")
+        self.site.refresh()
+        for key, html in blocks.items():
+            self.assertIs(self.site._blocks[key], html)
+
+    def test_removed_page(self):
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        rebuilds = self.site.refresh()
+        self.assertTrue(rebuilds[0].removed)
+        self.assertFalse(os.path.exists(os.path.join(self.output, "blog", "post.html")))
+
+    def test_render_error_is_reported(self):
+        touch(os.path.join(self.content, "index.md"), "[broken]()\n")
+        rebuilds = self.site.refresh()
+        self.assertIsInstance(rebuilds[0].error, ValueError)
+        self.assertIn("Failed to render index.md", str(rebuilds[0]))
+
+    def test_template(self):
+        layout = os.path.join(self.tmp.name, "layout.html")
+        write_file(layout, "<title>{{ title }}</title>{{ content }}")
+        site = DevSite(self.content, os.path.join(self.tmp.name, "wrapped"), template=layout)
+        touch(os.path.join(self.content, "index.md"), "# Welcome\n\nEdited.\n")
+        site.refresh()
+        expected = os.path.join(self.tmp.name, "expected")
+        build_site(self.content, expected, BuildOptions(workers=1, template=layout))
+        self.assertEqual(read_file(os.path.join(site.output_dir, "index.html")),
+                         read_file(os.path.join(expected, "index.html")))
+
+        # Editing the layout re-renders every page
+        touch(layout, "<main>{{ content }}</main>")
+        rebuilds = site.refresh()
+        self.assertEqual(sorted(rebuild.page for rebuild in rebuilds), ["blog/post.md", "index.md"])
+        self.assertEqual(read_file(os.path.join(site.output_dir, "blog", "post.html")),
+                         "<main><div><p>A <i>post</i>.</p></div></main>")
+
+    def test_include_edits_render_dependents(self):
+        snippet = os.path.join(self.content, "_snippets", "note.md")
+        write_file(snippet, "A note.\n")
+        touch(os.path.join(self.content, "blog", "post.md"), "A post.\n\n{{ include ../_snippets/note.md }}\n")
+        rebuilds = self.site.refresh()
+        self.assertEqual([rebuild.page for rebuild in rebuilds], ["blog/post.md"])
+        self.assertEqual(self.site.deps.dependents(snippet), {"blog/post.md"})
+
+        touch(snippet, "An edited note.\n")
+        rebuilds = self.site.refresh()
+        self.assertEqual([rebuild.page for rebuild in rebuilds], ["blog/post.md"])
+        self.assertEqual(read_file(os.path.join(self.output, "blog", "post.html")),
+                         "<div><p>A post.</p><p>An edited note.</p></div>")
+        self.assertEqual(self.site.refresh(), [])
+
+        # The next build picks up the graph the server saved
+        self.site.close()
+        self.assertEqual(build_site(self.content, self.output, BuildOptions(workers=1)).pages, 0)
+
+    def test_asset_edits_render_dependents(self):
+        static = os.path.join(self.tmp.name, "static")
+        write_file(os.path.join(static, "styles.css"), "p {}")
+        write_file(os.path.join(self.content, "about.md"), "[Styles](/styles.css)\n")
+        site = DevSite(self.content, os.path.join(self.tmp.name, "assets"), static)
+        touch(os.path.join(static, "styles.css"), "p { margin: 0; }")
+        rebuilds = site.refresh()
+        self.assertEqual([rebuild.page for rebuild in rebuilds], ["about.md"])
+        self.assertIn(site.asset_urls["/styles.css"],
+                      read_file(os.path.join(site.output_dir, "about.html")))
+        self.assertTrue(os.path.exists(site.output_dir + site.asset_urls["/styles.css"]))
+        self.assertEqual(site.refresh(), [])
+
+    def test_link_graph_follows_edits(self):
+        touch(os.path.join(self.content, "index.md"), "# Home\n\nRead the [post](blog/post.html).\n")
+        self.site.refresh()
+        self.assertEqual(self.site.links.links("index.md"), ["/blog/post.html"])
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.site.refresh()
+        self.site.close()
+        graph = LinkGraph.load(os.path.join(self.output, LINK_GRAPH_NAME))
+        self.assertEqual(list(graph.pages), ["index.md"])
+        summary = build_site(self.content, self.output, BuildOptions(workers=1))
+        self.assertEqual(summary.links.broken, [("index.md", "/blog/post.html")])
+
+    def test_close_saves_manifest(self):
+        touch(os.path.join(self.content, "index.md"), "# Changed\n")
+        self.site.refresh()
+        self.site.close()
+        manifest = Manifest.load(os.path.join(self.output, MANIFEST_NAME))
+        self.assertEqual(set(manifest.pages), {"index.md", "blog/post.md"})
+        self.assertEqual(build_site(self.content, self.output, BuildOptions(workers=1)).pages, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+    Unit tests for template.py
+"""
+import io
+import os
+import tempfile
+import unittest
+
+from escaping import Markup
+from htmlnode import LeafNode
+from template import Template, TemplateCache, breadcrumb_nav, extract_title, page_values
+from test_build import write_file
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template("<title>{{ title }}</title><body>{{content}}</body>")
+        self.assertEqual(template.chunks, ("<title>", "</title><body>", "</body>"))
+        self.assertEqual(template.slots, ("title", "content"))
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.slots, ())
+        self.assertEqual(template.render({}), "<p>static</p>")
+
+    def test_slot_values(self):
+        template = Template("{{ a }}|{{ b }}|{{ c }}|{{ d }}|{{ a }}")
+        html = template.render({
+            "a": "<x> & y",
+            "b": Markup("<em>raw</em>"),
+            "c": LeafNode("b", "node"),
+            "d": lambda fp: fp.write("<i>streamed</i>"),
+        })
+        self.assertEqual(html, "&lt;x&gt; &amp; y|<em>raw</em>|<b>node</b>|<i>streamed</i>|"
+                               "&lt;x&gt; &amp; y")
+
+    def test_render_to_stream(self):
+        out = io.StringIO()
+        Template("<div>{{ content }}</div>").render_to(out, {"content": "text"})
+        self.assertEqual(out.getvalue(), "<div>text</div>")
+
+    def test_missing_slot(self):
+        with self.assertRaises(ValueError):
+            Template("{{ title }}").render({})
+
+    def test_hash_follows_source(self):
+        self.assertEqual(Template("{{ a }}").hash, Template("{{ a }}").hash)
+        self.assertNotEqual(Template("{{ a }}").hash, Template("{{ b }}").hash)
+
+    def test_map_urls(self):
+        template = Template("<link href='/a.css?x=1&amp;y=2'><p>href=/b.css</p>{{ content }}"
+                            '<img src="/c.png" alt="/a.css"><a href="{{ link }}">')
+        urls = {"/a.css?x=1&y=2": '/a.0123456789.css?x=1&y=2"', "/c.png": "/c.abcdef0123.png"}
+        mapped = template.map_urls(urls.get)
+        self.assertEqual(mapped.render({"content": "text", "link": "/c.png"}),
+                         '<link href="/a.0123456789.css?x=1&amp;y=2&quot;"><p>href=/b.css</p>text'
+                         '<img src="/c.abcdef0123.png" alt="/a.css"><a href="/c.png">')
+        self.assertEqual((mapped.slots, mapped.hash), (template.slots, template.hash))
+        self.assertIs(template.map_urls(lambda url: None), template)
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "layout.html")
+        write_file(self.path, "<main>{{ content }}</main>")
+        self.cache = TemplateCache()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compiled_once(self):
+        self.assertIs(self.cache.load(self.path), self.cache.load(self.path))
+
+    def test_touched_with_same_contents(self):
+        template = self.cache.load(self.path)
+        os.utime(self.path, ns=(0, 0))
+        self.assertIs(self.cache.load(self.path), template)
+
+    def test_changed(self):
+        template = self.cache.load(self.path)
+        write_file(self.path, "<article>{{ content }}</article>")
+        os.utime(self.path, ns=(0, 0))
+        changed = self.cache.load(self.path)
+        self.assertIsNot(changed, template)
+        self.assertEqual(changed.chunks[0], "<article>")
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            self.cache.load(os.path.join(self.tmp.name, "missing.html"))
+
+    def test_partials(self):
+        footer = os.path.join(self.tmp.name, "partials", "footer.html")
+        write_file(footer, "<footer>{{ title }}{{> note.html }}</footer>")
+        write_file(os.path.join(self.tmp.name, "partials", "note.html"), "!")
+        write_file(self.path, "<main>{{ content }}</main>{{> partials/footer.html }}")
+        template = self.cache.load(self.path)
+        self.assertEqual(template.slots, ("content", "title"))
+        self.assertEqual(template.render({"content": "c", "title": "t"}),
+                         "<main>c</main><footer>t!</footer>")
+        self.assertEqual(template.files, (self.path, footer,
+                                          os.path.join(self.tmp.name, "partials", "note.html")))
+
+        # Editing a partial compiles the layout again
+        write_file(footer, "<footer>{{ title }}</footer>")
+        os.utime(footer, ns=(0, 0))
+        changed = self.cache.load(self.path)
+        self.assertIsNot(changed, template)
+        self.assertEqual(changed.files, (self.path, footer))
+
+    def test_partial_cycle(self):
+        write_file(self.path, "{{> layout.html }}")
+        with self.assertRaises(ValueError):
+            self.cache.load(self.path)
+
+
+class TestPageValues(unittest.TestCase):
+    def test_extract_title(self):
+        self.assertEqual(extract_title(["Intro", "", "# The Title ", "# Second"]), "The Title")
+        self.assertIsNone(extract_title(["## Not a title", "#hashtag"]))
+
+    def test_breadcrumb_nav(self):
+        self.assertEqual(breadcrumb_nav("index.md").to_html(),
+                         '<nav><a href="/">Home</a></nav>')
+        self.assertEqual(breadcrumb_nav("blog/2024/post.md").to_html(),
+                         '<nav><a href="/">Home</a> / <a href="/blog/">blog</a> / '
+                         '<a href="/blog/2024/">2024</a></nav>')
+
+    def test_title_falls_back_to_file_name(self):
+        self.assertEqual(page_values("index.md", "Home", "body")["title"], "Home")
+        values = page_values("blog/post.md", None, "body")
+        self.assertEqual(values["title"], "post")
+        self.assertEqual(values["content"], "body")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 '''
     Unit tests for the TextNode class
 '''
+import io
 import unittest
 
-from textnode import TextNode, TextType
+from textnode import TextNode, TextSpan, TextType, text_nodes_to_html_nodes, text_nodes_to_html, \
+    write_text_nodes_html
 from htmlnode import HTMLNode, LeafNode
 
 
@@ -118,5 +120,80 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(out_leaf_node.tag, "img")
         self.assertEqual(out_leaf_node.value, "")
 
+
+class TestBatchConversion(unittest.TestCase):
+    def setUp(self):
+        self.nodes = [
+            TextNode("Plain & simple ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("x < y", TextType.CODE),
+            TextNode("a link", TextType.LINK, "https://example.com/?a=1&b=2"),
+            TextNode("alt text", TextType.IMAGE, "https://example.com/image.png"),
+            TextNode("a link", TextType.LINK, "https://example.com/?a=1&b=2"),
+        ]
+
+    def test_matches_per_node_conversion(self):
+        expected = [node.text_node_to_html_node() for node in self.nodes]
+        self.assertEqual(text_nodes_to_html_nodes(self.nodes), expected)
+
+    def test_html_matches_leaves(self):
+        expected = "".join(node.text_node_to_html_node().to_html() for node in self.nodes)
+        self.assertEqual(text_nodes_to_html(self.nodes), expected)
+
+    def test_shared_props(self):
+        leaves = text_nodes_to_html_nodes(self.nodes)
+        self.assertIs(leaves[4].props, leaves[6].props)
+        with self.assertRaises(TypeError):
+            leaves[4].props["href"] = "changed"
+
+    def test_missing_url(self):
+        nodes = [TextNode("ok", TextType.TEXT), TextNode("pic", TextType.IMAGE)]
+        for convert in (text_nodes_to_html_nodes, text_nodes_to_html):
+            with self.assertRaises(ValueError) as context:
+                convert(nodes)
+            self.assertEqual(str(context.exception), "URL is required for IMAGE text type.")
+
+    def test_empty_list(self):
+        self.assertEqual(text_nodes_to_html_nodes([]), [])
+        self.assertEqual(text_nodes_to_html([]), "")
+
+
+class TestTextSpan(unittest.TestCase):
+    def test_text_is_lazy(self):
+        source = "some **bold** text"
+        span = TextSpan(source, 7, 11, TextType.BOLD)
+        self.assertEqual(span.source, source)
+        self.assertEqual(span.text, "bold")
+        self.assertIs(span.text, span.text)
+        self.assertEqual(span, TextNode("bold", TextType.BOLD))
+
+    def test_bytes_source(self):
+        source = "caf\u00e9 & co".encode()
+        span = TextSpan(source, 0, len(source), TextType.TEXT)
+        self.assertEqual(span.text, "caf\u00e9 & co")
+        out = io.BytesIO()
+        span.write_escaped(out)
+        self.assertEqual(out.getvalue(), "caf\u00e9 &amp; co".encode())
+
+    def test_write_escaped(self):
+        for source, expected in [("xx plain yy", "plain"), ("xx a<b yy", "a&lt;b")]:
+            out = io.StringIO()
+            span = TextSpan(source, 3, len(source) - 3, TextType.TEXT)
+            span.write_escaped(out)
+            self.assertEqual(out.getvalue(), expected)
+            self.assertEqual(span.url, None)
+
+    def test_write_text_nodes_html(self):
+        source = "a & [link](https://boot.dev) **b**"
+        nodes = [TextSpan(source, 0, 4, TextType.TEXT),
+                 TextNode("link", TextType.LINK, "https://boot.dev"),
+                 TextSpan(source, 31, 32, TextType.BOLD),
+                 TextNode("<img>", TextType.CODE)]
+        out = io.StringIO()
+        write_text_nodes_html(nodes, out)
+        self.assertEqual(out.getvalue(), text_nodes_to_html(nodes))
+
+
 if __name__ == "__main__":
     unittest.main()
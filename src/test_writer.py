@@ -0,0 +1,77 @@
+"""
+    Unit tests for writer.py
+"""
+import os
+import tempfile
+import unittest
+
+from writer import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, *parts):
+        with open(os.path.join(self.root, *parts), "rb") as f:
+            return f.read()
+
+    def test_writes_files(self):
+        for fsync in (True, False):
+            with self.subTest(fsync=fsync):
+                with OutputWriter(threads=3, queue_size=2, fsync=fsync, fsync_batch=4) as writer:
+                    for i in range(20):
+                        writer.submit(os.path.join(self.root, f"d{i % 3}", f"{i}-{fsync}.html"),
+                                      f"page {i}".encode())
+                self.assertEqual(writer.written, 20)
+                self.assertEqual(writer.bytes_written, sum(len(f"page {i}") for i in range(20)))
+                self.assertEqual(self.read("d1", f"4-{fsync}.html"), b"page 4")
+
+        leftovers = [name for _, _, files in os.walk(self.root) for name in files
+                     if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_skips_identical_bytes(self):
+        path = os.path.join(self.root, "page.html")
+        with OutputWriter() as writer:
+            writer.submit(path, b"<p>same</p>")
+        mtime = os.stat(path).st_mtime_ns
+        with OutputWriter() as writer:
+            writer.submit(path, b"<p>same</p>")
+            writer.submit(os.path.join(self.root, "other.html"), b"new")
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+        with OutputWriter() as writer:
+            writer.submit(path, b"<p>diff</p>")
+        self.assertEqual((writer.written, writer.unchanged), (1, 0))
+        self.assertEqual(self.read("page.html"), b"<p>diff</p>")
+
+    def test_error_is_raised_on_close(self):
+        blocker = os.path.join(self.root, "file")
+        with open(blocker, "w", encoding="utf-8") as f:
+            f.write("not a directory")
+        writer = OutputWriter(threads=2)
+        writer.submit(os.path.join(blocker, "page.html"), b"x")
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def test_other_errors_are_raised_on_close(self):
+        writer = OutputWriter(threads=2, queue_size=2)
+        writer.submit(os.path.join(self.root, "page.html"), "not bytes")
+        # The queue is still drained, so later files do not block
+        for number in range(10):
+            try:
+                writer.submit(os.path.join(self.root, f"p{number}.html"), b"x")
+            except TypeError:
+                break
+        with self.assertRaises(TypeError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,9 @@
 Defines the TextNode class and TextType enum.
 """
 from enum import Enum
-from htmlnode import LeafNode
+from types import MappingProxyType
+from escaping import escape_text
+from htmlnode import HTMLNode, LeafNode, open_tag
 
 class TextType(Enum):
     """
@@ -25,8 +27,13 @@ class TextType(Enum):
 
 class TextNode:
     """
+    Represents a span of inline markdown text and how it is formatted.
 
+    TextNodes are created in large numbers by the inline parser, so their
+    attributes live in ``__slots__`` instead of a per-instance ``__dict__``.
     """
+    __slots__ = ("text", "text_type", "url")
+
     _DELIMITERS = {
         "text": {'open': '',
                  'close': ''},
@@ -91,3 +98,192 @@ class TextNode:
                 return LeafNode(tag="img", value="", props={"src": self.url, "alt": self.text})
             case _:
                 raise ValueError(f"Invalid text type: {self.text_type}")
+
+
+# The slot that holds TextNode.text, which TextSpan shadows with a property
+_TEXT_SLOT = TextNode.text
+
+
+class TextSpan(TextNode):
+    """
+    A TextNode whose text is a range of a larger source instead of a copy.
+
+    The span keeps a reference to ``source`` and the ``start``/``end`` offsets
+    of its text in it. ``text`` is sliced out only when it is first read, for
+    example to compare or convert the node, and then kept. ``write_escaped``
+    writes the text without keeping it, so a document can be tokenized into
+    spans and rendered while the source holds the only copy of its text.
+
+    ``source`` is a ``str``, or a bytes-like object holding UTF-8 with byte
+    offsets, such as ``bytes`` or an ``mmap``.
+    """
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source, start, end, text_type, url=None):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.text_type = text_type
+        self.url = url
+
+    @property
+    def text(self):
+        try:
+            return _TEXT_SLOT.__get__(self)
+        except AttributeError:
+            value = self.source[self.start:self.end]
+            if not isinstance(value, str):
+                value = str(value, "utf-8")
+            _TEXT_SLOT.__set__(self, value)
+            return value
+
+    @text.setter
+    def text(self, value):
+        _TEXT_SLOT.__set__(self, value)
+
+    def write_escaped(self, fp):
+        """
+        Writes the HTML-escaped text to ``fp`` straight from the source.
+
+        For a ``str`` source the range is sliced, escaped and written without
+        keeping the slice. For a bytes-like source the range is searched in
+        place for characters that need escaping; when there are none, which
+        is most text, a ``memoryview`` of the source is written, so the text
+        is never copied or decoded. ``fp`` is a text stream for ``str``
+        sources and a binary stream otherwise.
+        """
+        source, start, end = self.source, self.start, self.end
+        if isinstance(source, str):
+            fp.write(escape_text(source[start:end]))
+        elif source.find(b"&", start, end) == -1 and source.find(b"<", start, end) == -1 and \
+                source.find(b">", start, end) == -1:
+            fp.write(memoryview(source)[start:end])
+        else:
+            fp.write(escape_text(str(source[start:end], "utf-8")).encode("utf-8"))
+
+
+# Dispatch table for the batch converters: the leaf tag of every text type
+# that renders as a plain tagged value. LINK and IMAGE need a URL and are
+# handled separately.
+_LEAF_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+_URL_TYPES = (TextType.LINK, TextType.IMAGE)
+
+
+def _validate_urls(nodes):
+    for node in nodes:
+        if node.text_type in _URL_TYPES and not node.url:
+            raise ValueError(f"URL is required for {node.text_type.name} text type.")
+
+
+def _new_leaf(tag, value, props):
+    # LeafNode without the validating constructor; values are checked by the caller
+    leaf = object.__new__(LeafNode)
+    HTMLNode.__init__(leaf, tag, value, None, props)
+    return leaf
+
+
+def text_nodes_to_html_nodes(nodes) -> list[LeafNode]:
+    """
+    Converts a list of TextNodes into LeafNodes in one batch.
+
+    Produces the same leaves as calling ``text_node_to_html_node`` on every
+    node, but looks the tag up in a precomputed table, checks every LINK and
+    IMAGE URL up front, and shares one read-only props mapping between all
+    links (or images) with the same URL and text.
+
+    Raises:
+        ValueError: If a LINK or IMAGE node has no URL, or a node has an unknown text type
+    """
+    _validate_urls(nodes)
+    leaf_tags = _LEAF_TAGS
+    shared_props = {}
+    leaves = []
+
+    for node in nodes:
+        text_type = node.text_type
+        tag = leaf_tags.get(text_type, text_type)
+        if tag is not text_type:
+            if node.text is None:
+                raise ValueError("Value is required for leaf nodes")
+            leaves.append(_new_leaf(tag, node.text, None))
+            continue
+
+        key = (text_type, node.url, node.text)
+        props = shared_props.get(key)
+        if text_type == TextType.LINK:
+            if props is None:
+                props = shared_props[key] = MappingProxyType({"href": node.url})
+            leaves.append(_new_leaf("a", node.text, props))
+        elif text_type == TextType.IMAGE:
+            if props is None:
+                props = shared_props[key] = MappingProxyType({"src": node.url, "alt": node.text})
+            leaves.append(_new_leaf("img", "", props))
+        else:
+            raise ValueError(f"Invalid text type: {text_type}")
+
+    return leaves
+
+
+def text_nodes_to_html(nodes) -> str:
+    """
+    Renders a list of TextNodes straight to an HTML string, without building
+    LeafNodes. The output matches rendering ``text_nodes_to_html_nodes(nodes)``.
+
+    Raises:
+        ValueError: If a LINK or IMAGE node has no URL, or a node has an unknown text type
+    """
+    _validate_urls(nodes)
+    leaf_tags = _LEAF_TAGS
+    fragments = []
+
+    for node in nodes:
+        text_type = node.text_type
+        tag = leaf_tags.get(text_type, text_type)
+        if tag is None:
+            fragments.append(escape_text(node.text))
+        elif tag is not text_type:
+            fragments.append(f"<{tag}>{escape_text(node.text)}</{tag}>")
+        elif text_type == TextType.LINK:
+            fragments.append(f"{open_tag('a', {'href': node.url})}{escape_text(node.text)}</a>")
+        elif text_type == TextType.IMAGE:
+            fragments.append(f"{open_tag('img', {'src': node.url, 'alt': node.text})}</img>")
+        else:
+            raise ValueError(f"Invalid text type: {text_type}")
+
+    return "".join(fragments)
+
+
+def write_text_nodes_html(nodes, fp):
+    """
+    Writes the HTML of a list of TextNodes to a text stream.
+
+    Produces the same output as ``text_nodes_to_html(nodes)``. Text of
+    TextSpans over a ``str`` source is written with ``TextSpan.write_escaped``,
+    so spans are rendered without their text being materialized.
+
+    Raises:
+        ValueError: If a LINK or IMAGE node has no URL, or a node has an unknown text type
+    """
+    _validate_urls(nodes)
+    leaf_tags = _LEAF_TAGS
+    write = fp.write
+
+    for node in nodes:
+        text_type = node.text_type
+        tag = leaf_tags.get(text_type, text_type)
+        if tag is text_type:
+            write(text_nodes_to_html((node,)))
+            continue
+        if tag is not None:
+            write(f"<{tag}>")
+        if type(node) is TextSpan and type(node.source) is str:
+            node.write_escaped(fp)
+        else:
+            write(escape_text(node.text))
+        if tag is not None:
+            write(f"</{tag}>")
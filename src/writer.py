@@ -0,0 +1,184 @@
+"""
+Defines the OutputWriter class, which writes rendered pages on background threads
+"""
+import os
+import queue
+import threading
+import time
+
+
+class OutputWriter:
+    """
+    Writes files on a pool of threads while the caller keeps rendering.
+
+    ``submit`` puts a file on a bounded queue, so rendering can run at most
+    ``queue_size`` files ahead of the disk before it waits. Each file is
+    compared with what is already on disk first and left alone if the bytes
+    are identical. Otherwise it is written to a temporary file next to the
+    target and renamed over it, so readers only ever see a complete file.
+
+    With ``fsync``, each thread collects up to ``fsync_batch`` written files,
+    flushes them to disk together, renames them into place and then syncs the
+    directories holding them, instead of waiting on the disk once per file.
+    Renames are delayed until the batch is flushed; ``close`` flushes the
+    rest.
+
+    Attributes:
+        written: Number of files written
+        unchanged: Number of files skipped because their bytes were already on disk
+        bytes_written: Number of bytes written
+        seconds: Time the threads spent comparing, writing and syncing, summed
+    """
+
+    def __init__(self, threads=4, queue_size=64, fsync=True, fsync_batch=64):
+        self.fsync = fsync
+        self.fsync_batch = fsync_batch
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._error = None
+        self._queue = queue.Queue(queue_size)
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, path, data):
+        """
+        Queues ``data`` (bytes) to be written to ``path``, creating its
+        directory. Blocks while the queue is full.
+
+        Raises:
+            OSError: If an earlier write failed; other errors raised on the
+                threads, such as a TypeError for data that is not bytes, are
+                raised as they are
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((path, data))
+
+    def _run(self):
+        pending = []
+        written = unchanged = size = 0
+        busy = 0.0
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                if self._error is not None:
+                    continue
+                start = time.perf_counter()
+                path, data = job
+                if _same_bytes(path, data):
+                    unchanged += 1
+                else:
+                    entry = self._write_temp(path, data)
+                    if entry is not None:
+                        pending.append(entry)
+                    written += 1
+                    size += len(data)
+                    if len(pending) >= self.fsync_batch:
+                        self._commit(pending)
+                busy += time.perf_counter() - start
+            start = time.perf_counter()
+            self._commit(pending)
+            busy += time.perf_counter() - start
+        except BaseException as e:
+            # Any error, not only a failed write, would otherwise leave the
+            # queue without a reader and block submit and close for good
+            self._error = e
+            # Keep draining the queue so that submit and close do not block
+            while self._queue.get() is not None:
+                pass
+        finally:
+            for fd, tmp_path, _ in pending:
+                _close_quietly(fd)
+                _remove_quietly(tmp_path)
+            with self._lock:
+                self.written += written
+                self.unchanged += unchanged
+                self.bytes_written += size
+                self.seconds += busy
+
+    def _write_temp(self, path, data):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        except OSError:
+            _close_quietly(fd)
+            _remove_quietly(tmp_path)
+            raise
+        if not self.fsync:
+            os.close(fd)
+            os.replace(tmp_path, path)
+            return None
+        return fd, tmp_path, path
+
+    def _commit(self, pending):
+        # Sync a batch of temporary files, rename them into place and sync
+        # the directories, so the renames are durable as well
+        directories = set()
+        while pending:
+            fd, tmp_path, path = pending[-1]
+            os.fsync(fd)
+            os.close(fd)
+            os.replace(tmp_path, path)
+            directories.add(os.path.dirname(path) or ".")
+            pending.pop()
+        for directory in directories:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def close(self):
+        """
+        Waits until every queued file is written and synced, then stops the threads.
+
+        Raises:
+            OSError: If any write failed, or the error that stopped a thread
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _same_bytes(path, data):
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def _close_quietly(fd):
+    try:
+        os.close(fd)
+    except OSError:
+        pass
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass